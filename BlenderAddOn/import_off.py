@@ -19,9 +19,10 @@
 #
 # http://wiki.blender.org/index.php/Dev:2.5/Py/Scripts/Guidelines/Addons
 #
-import os
 import bpy
 import mathutils
+import numpy as np
+from bvp.utils.mesh_io import read_off, write_off
 from bpy.props import (BoolProperty,
     FloatProperty,
     StringProperty,
@@ -29,7 +30,6 @@ from bpy.props import (BoolProperty,
     )
 from bpy_extras.io_utils import (ImportHelper,
     ExportHelper,
-    unpack_list,
     unpack_face_list,
     axis_conversion,
     )
@@ -40,7 +40,7 @@ from bpy_extras.io_utils import (ImportHelper,
 
 bl_info = {
     "name": "OFF format",
-    "description": "Import-Export OFF, Import OFF mesh only, for now.",
+    "description": "Import-Export OFF (and COFF, NOFF) meshes.",
     "author": "Alex Tsui",
     "version": (0, 2),
     "blender": (2, 69, 0),
@@ -173,42 +173,17 @@ def unregister():
     bpy.types.INFO_MT_file_export.remove(menu_func_export)
 
 def load(operator, context, filepath):
-    # Parse mesh from OFF file
-    # TODO: Add support for NOFF and COFF
-    filepath = os.fsencode(filepath)
-    file = open(filepath, 'r')
-    file.readline()
-    vcount, fcount, ecount = [int(x) for x in file.readline().split()]
-    verts = []
-    facets = []
-    i=0;
-    while i<vcount:
-        line = file.readline()
-        try:
-            px, py, pz = [float(x) for x in line.split()]
-        except ValueError:
-            continue
-        verts.append((px, py, pz))
-        i=i+1
-
-    i=0;
-    while i<fcount:
-        line = file.readline()
-        try:
-            unused, vid1, vid2, vid3 = [int(x) for x in line.split()]
-        except ValueError:
-            continue
-        facets.append((vid1, vid2, vid3))
-        i=i+1
+    # Parse mesh (OFF, COFF, NOFF) from file; polygons are split into triangles
+    pts, facets = read_off(filepath)
 
     # Assemble mesh
     off_name = bpy.path.display_name_from_filepath(filepath)
     mesh = bpy.data.meshes.new(name=off_name)
-    mesh.vertices.add(len(verts))
-    mesh.vertices.foreach_set("co", unpack_list(verts))
+    mesh.vertices.add(len(pts))
+    mesh.vertices.foreach_set("co", pts.ravel())
 
     mesh.tessfaces.add(len(facets))
-    mesh.tessfaces.foreach_set("vertices_raw", unpack_face_list(facets))
+    mesh.tessfaces.foreach_set("vertices_raw", unpack_face_list(facets.tolist()))
 
     mesh.validate()
     mesh.update()
@@ -229,26 +204,12 @@ def save(operator, context, filepath,
     obj_mat = obj.matrix_world
     mesh.transform(global_matrix * obj_mat)
 
-    verts = mesh.vertices[:]
-    facets = [ f for f in mesh.tessfaces ]
+    verts = np.zeros(len(mesh.vertices) * 3)
+    mesh.vertices.foreach_get("co", verts)
+    facets = [f.vertices[:] for f in mesh.tessfaces]
 
     # Write geometry to file
-    filepath = os.fsencode(filepath)
-    fp = open(filepath, 'w')
-
-    fp.write('OFF\n')
-    fp.write('%d %d 0\n' % (len(verts), len(facets)))
-
-    for vert in verts:
-        fp.write('%.16f %.16f %.16f\n' % vert.co[:])
-
-    for facet in facets:
-        fp.write('%d' % len(facet.vertices))
-        for vid in facet.vertices:
-            fp.write(' %d' % vid)
-        fp.write('\n')
-
-    fp.close()
+    write_off(filepath, verts.reshape(-1, 3), facets, fmt='%.16f')
 
     return {'FINISHED'}
 
@@ -0,0 +1,84 @@
+"""
+Benchmark startup time for processes that import bvp (e.g. render workers, or
+scripts run with `blender -P`).
+
+Each statement is timed in fresh python processes (imports are cached within a
+process, so each measurement needs a new interpreter). The baseline is a bare
+interpreter (`pass`), so reported times are the additional cost of each statement.
+
+Usage:
+    python benchmark_import.py [n_repeats] [--importtime]
+
+With --importtime, also prints the slowest modules imported by `import bvp`
+(from python's -X importtime output).
+"""
+
+import os
+import sys
+import time
+import subprocess
+import numpy as np
+
+n_repeats = 10
+
+statements = [
+    ('baseline', 'pass'),
+    ('import bvp', 'import bvp'),
+    ('bvp.Scene', 'import bvp; bvp.Scene'),
+    ('bvp.DBInterface', 'import bvp; bvp.DBInterface'),
+    ('bvp.utils.math', 'import bvp; bvp.utils.math'),
+    ('bvp.utils.plot', 'import bvp; bvp.utils.plot'),
+    ]
+
+bvp_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def time_statement(statement, n_repeats=n_repeats):
+    """Wall clock time (s) for new python processes to run `statement`"""
+    env = dict(os.environ, PYTHONPATH=bvp_path + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    times = []
+    for _ in range(n_repeats):
+        t0 = time.time()
+        proc = subprocess.run([sys.executable, '-c', statement], env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        times.append(time.time() - t0)
+        if proc.returncode != 0:
+            return None
+    return np.array(times)
+
+
+def slowest_imports(statement='import bvp', n=15):
+    """Slowest (cumulative) imports for `statement`, from python -X importtime"""
+    env = dict(os.environ, PYTHONPATH=bvp_path + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, module = line.split('|')
+        rows.append((int(cumulative_us), module.rstrip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if args:
+        n_repeats = int(args[0])
+    baseline = None
+    print('%-20s %10s %10s'%('statement', 'median(ms)', 'min(ms)'))
+    for name, statement in statements:
+        times = time_statement(statement, n_repeats=n_repeats)
+        if times is None:
+            print('%-20s %21s'%(name, 'failed'))
+            continue
+        if baseline is None:
+            baseline = times.min()
+            print('%-20s %10.1f %10.1f'%(name, np.median(times) * 1000, baseline * 1000))
+        else:
+            print('%-20s %10.1f %10.1f'%(name, (np.median(times) - baseline) * 1000,
+                                        (times.min() - baseline) * 1000))
+    if '--importtime' in sys.argv:
+        print('\nSlowest imports for "import bvp" (cumulative, ms):')
+        for cumulative_us, module in slowest_imports():
+            print('%10.1f %s'%(cumulative_us / 1000., module))
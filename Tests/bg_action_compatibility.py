@@ -9,6 +9,7 @@ Prints:
     bad_actions: Actions with average compatibility lower than threshold
 """
 
+import sys
 import numpy as np
 import bvp
 from bvp.classes.object import Object
@@ -64,26 +65,19 @@ def check_compatibility(bg, act, debug=False):
 
 if __name__ == '__main__':
     dbi = bvp.DBInterface()
-    all_bgs = dbi.query(type="Background")[:10]
-    all_actions = dbi.query(type="Action")[:10]
-
-    # bg = dbi.query(1, type='Background', name='BG_019_Tent')
-    # act = dbi.query(1, type='Action', name='armada_01')
-    # ob = dbi.query(semantic_category='human')[0]
-
-    compat = np.zeros((len(all_bgs), len(all_actions)))
-
-    for ibg, bg in enumerate(all_bgs):
-        for iact, act in enumerate(all_actions):
-            compat[ibg,iact] += 1*(check_compatibility(bg, act, debug=True))
+    library = bvp.LibraryCache(dbi, element_types=('Action', 'Background'))
+    # Vectorized (actions x backgrounds) matrix, see bvp.Classes.constraint.compatibility_matrix
+    index = library.compatibility()
+    compat = index.matrix.T
+    n_bgs, n_actions = compat.shape
 
     bg_compats = np.sum(compat, axis=1)
     act_compats = np.sum(compat, axis=0)
 
-    bad_bg_indices = np.arange(x)[bg_compats < threshold*x]
-    bad_act_indices = np.arange(x)[act_compats < threshold*y]
+    bad_bg_indices = np.arange(n_bgs)[bg_compats < threshold*n_actions]
+    bad_act_indices = np.arange(n_actions)[act_compats < threshold*n_bgs]
 
-    np.set_printoptions(threshold=np.nan)
+    np.set_printoptions(threshold=sys.maxsize)
     print(compat)
-    print([all_bgs[bg].name for bg in bad_bg_indices])
-    print([all_actions[act].name for act in bad_act_indices])
\ No newline at end of file
+    print([library.get(index.background_ids[bg]).name for bg in bad_bg_indices])
+    print([library.get(index.action_ids[act]).name for act in bad_act_indices])
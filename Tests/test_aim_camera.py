@@ -0,0 +1,60 @@
+"""Tests for vectorized camera aiming (bvp.utils.math.aim_camera_array, camera_distance_locations)
+
+Run with pytest, or as a script.
+"""
+
+import numpy as np
+from bvp.utils import math as bvpmath
+
+
+def _locations(n=7, seed=0):
+    rng = np.random.RandomState(seed)
+    object_locations = rng.randn(n, 3)
+    camera_locations = object_locations + rng.randn(n, 3) * 5 + [0., -10., 2.]
+    return object_locations, camera_locations
+
+
+def test_aim_camera_array():
+    object_locations, camera_locations = _locations()
+    for image_location, image_size in [((0.3, 0.6), (1., 1.)),
+                                       ((0.5, 0.5), (1., 1.)),
+                                       ((400, 100), (640, 480)),
+                                       ((100, 300), (480, 640))]:
+        fix_locations = bvpmath.aim_camera_array(object_locations, image_location, camera_locations,
+                                                 camera_lens=35., image_size=image_size,
+                                                 aspect_ratio=4 / 3.)
+        expected = [bvpmath.aim_camera(ob_loc, image_location, cam_loc, camera_lens=35.,
+                                       image_size=image_size, aspect_ratio=4 / 3.)
+                    for ob_loc, cam_loc in zip(object_locations, camera_locations)]
+        assert fix_locations.shape == (len(object_locations), 3)
+        assert np.allclose(fix_locations, expected, rtol=0, atol=1e-12)
+
+
+def test_camera_distance_locations():
+    object_locations, camera_locations = _locations()
+    cam_to_obj_vectors = object_locations - camera_locations
+    cam_to_obj_distances = np.linalg.norm(cam_to_obj_vectors, axis=1)
+    # Framewise: every camera at `absolute_distance`, along its own vector to the object
+    new_locations = bvpmath.camera_distance_locations(camera_locations, object_locations,
+                                                      distance_to_set='framewise', absolute_distance=4.)
+    expected = [loc + vec * (dst - 4.) / dst
+                for loc, vec, dst in zip(camera_locations, cam_to_obj_vectors, cam_to_obj_distances)]
+    assert np.allclose(new_locations, expected, rtol=0, atol=1e-12)
+    assert np.allclose(np.linalg.norm(object_locations - new_locations, axis=1), 4.)
+    # Median: all cameras moved by the same vector
+    median_distance = np.median(cam_to_obj_distances)
+    median_vector = cam_to_obj_vectors[np.nonzero(median_distance == cam_to_obj_distances)[0][0]]
+    new_locations = bvpmath.camera_distance_locations(camera_locations, object_locations,
+                                                      distance_to_set='median', max_distance=5.)
+    expected = camera_locations + median_vector * (median_distance - 5.) / median_distance
+    assert np.allclose(new_locations, expected, rtol=0, atol=1e-12)
+    # ... and not at all if they are close enough already
+    new_locations = bvpmath.camera_distance_locations(camera_locations, object_locations,
+                                                      distance_to_set='median', max_distance=100.)
+    assert np.array_equal(new_locations, camera_locations)
+
+
+if __name__ == '__main__':
+    test_aim_camera_array()
+    test_camera_distance_locations()
+    print('All tests passed')
@@ -0,0 +1,54 @@
+"""Tests for camera trajectory checks & sampling in bvp.Classes.constraint
+
+Run with pytest, or as a script.
+"""
+
+import bvp.utils as bvpu
+from bvp.Classes.constraint import CamConstraint, CameraTrajectoryError, _sample_camera_trajectories
+
+
+def _location(theta, r=30., phi=20.):
+    # Camera constraint angles are relative to the -y axis (theta offset of 270 deg)
+    return bvpu.math.sph2cart(r, theta + 270., phi)
+
+
+def test_check_camera_locations_theta_wraps():
+    # Theta range behind the origin, crossing +/-180 deg
+    cc = CamConstraint(theta=(180., 10., 150., 210.), speed=None)
+    locations = [[_location(theta)] for theta in (170., -170., 155., 205., 0., 90., -90.)]
+    ok = cc.check_camera_locations(locations, frames=[1])
+    assert ok.tolist() == [True, True, True, True, False, False, False]
+
+
+def test_check_camera_locations_theta():
+    cc = CamConstraint(theta=(0., 60., -135., 135.), speed=None)
+    locations = [[_location(theta)] for theta in (0., 130., -130., 180., 140.)]
+    ok = cc.check_camera_locations(locations, frames=[1])
+    assert ok.tolist() == [True, True, True, False, False]
+
+
+def test_no_trajectory_raises_specific_error():
+    # Radius limits that cannot both be satisfied
+    cc = CamConstraint(r=(30., 3., 40., 20.))
+    try:
+        cc.sample_camera_location([1, 10], n_attempts=2, n_samples=5)
+    except CameraTrajectoryError:
+        pass
+    else:
+        raise AssertionError('Sampling an impossible trajectory should fail')
+    # Pool sampling skips failed trajectories...
+    assert _sample_camera_trajectories((cc, [1, 10], 15, 2, 2, 5, 0)) == []
+    # ... but not other errors
+    try:
+        _sample_camera_trajectories((None, [1, 10], 15, 1, 2, 5, 0))
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError('Unexpected errors should not be swallowed')
+
+
+if __name__ == '__main__':
+    test_check_camera_locations_theta_wraps()
+    test_check_camera_locations_theta()
+    test_no_trajectory_raises_specific_error()
+    print('All tests passed')
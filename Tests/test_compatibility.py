@@ -0,0 +1,113 @@
+"""Tests for action x background compatibility (bvp.Classes.constraint.action_compatibility,
+compatibility_matrix, CompatibilityIndex)
+
+Run with pytest, or as a script.
+"""
+
+import os
+import tempfile
+import numpy as np
+from bvp.Classes.constraint import (ObConstraint, CompatibilityIndex, action_compatibility, 
+                                    compatibility_matrix)
+
+# Actions: small (fits in a 2 x 2 area), big (needs a 6 x 6 area), and one that
+# does not contain its own origin (never compatible)
+MIN_XYZ = [(-1., -1., 0.), (-10., -10., 0.), (1., 1., 1.)]
+MAX_XYZ = [(1., 1., 2.), (10., 10., 5.), (2., 2., 2.)]
+# Object constraints (default size: 3, i.e. actions are scaled by 0.3)
+TIGHT_XY = dict(X=(0., 1., -1., 1.), Y=(0., 1., -1., 1.))
+TIGHT_R = dict(r=(0., 1., 0., 0.4))
+FLOOR = dict(Z=(0., 0., 0., 0.))
+
+
+def _index():
+    matrix = np.array([[True, False, True],
+                       [False, False, False],
+                       [False, True, True]])
+    return CompatibilityIndex(['a0', 'a1', 'a2'], ['b0', 'b1', 'b2'], matrix)
+
+
+def test_compatible_pairs():
+    index = _index()
+    pairs = index.compatible_pairs()
+    assert pairs == [('a0', 'b0'), ('a0', 'b2'), ('a2', 'b1'), ('a2', 'b2')]
+    assert index.compatible_pairs(actions=['a1']) == []
+    assert index.compatible_pairs(backgrounds=['b2', 'b0']) == [('a0', 'b2'), ('a0', 'b0'), ('a2', 'b2')]
+    assert all(index.is_compatible(a, b) for a, b in pairs)
+
+
+def test_action_compatibility():
+    compatible = action_compatibility(MIN_XYZ, MAX_XYZ, [TIGHT_XY, ObConstraint(**TIGHT_R), FLOOR, {}])
+    assert compatible.shape == (3, 4)
+    assert np.array_equal(compatible, [[True, False, True, True],
+                                       [False, False, True, True],
+                                       [False, False, False, False]])
+    # Larger objects need more room
+    compatible = action_compatibility(MIN_XYZ[:1], MAX_XYZ[:1], [dict(TIGHT_XY, sz=(12., 1., 12., 20.))])
+    assert np.array_equal(compatible, [[False]])
+
+
+def test_compatibility_matrix():
+    backgrounds = [[TIGHT_XY],          # one constraint
+                   None,                # unconstrained
+                   [TIGHT_R, FLOOR],    # compatible if any constraint is
+                   [],                  # no positions for objects at all
+                   TIGHT_R]             # a single dict
+    matrix = compatibility_matrix(MIN_XYZ, MAX_XYZ, backgrounds)
+    assert np.array_equal(matrix, [[True, True, True, False, False],
+                                   [False, True, True, False, False],
+                                   [False, False, False, False, False]])
+    assert compatibility_matrix(MIN_XYZ, MAX_XYZ, [[], []]).shape == (3, 2)
+    # Index built from database-style records
+    actions = [dict(_id='a%d'%i, _rev='1', min_xyz=mn, max_xyz=mx)
+               for i, (mn, mx) in enumerate(zip(MIN_XYZ, MAX_XYZ))]
+    backgrounds = [dict(_id='b%d'%i, _rev='1', object_constraints=oc) for i, oc in enumerate(backgrounds)]
+    index = CompatibilityIndex.from_records(actions, backgrounds)
+    assert np.array_equal(index.matrix, matrix)
+    assert index.compatible_backgrounds('a1') == ['b1', 'b2']
+    assert index.compatible_actions('b0') == ['a0']
+
+
+def test_sample_pairs():
+    index = _index()
+    np.random.seed(0)
+    pairs = index.sample_pairs(50)
+    assert len(pairs) == 50
+    assert all(index.is_compatible(a, b) for a, b in pairs)
+    assert all(b == 'b1' for _, b in index.sample_pairs(10, backgrounds=['b1']))
+    try:
+        index.sample_pairs(1, actions=['a1'])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Sampling with no compatible pairs should fail')
+    # Pairs are drawn uniformly from compatible pairs
+    pairs = index.sample_pairs(4000)
+    counts = [sum(p == pair for p in pairs) for pair in index.compatible_pairs()]
+    assert sum(counts) == 4000
+    assert all(abs(c - 1000) < 150 for c in counts), counts
+
+
+def test_save_load():
+    tmpdir = tempfile.mkdtemp()
+    fname = os.path.join(tmpdir, 'compatibility.npz')
+    index = _index()
+    index.save(fname)
+    loaded = CompatibilityIndex.load(fname)
+    assert loaded.key is None
+    assert loaded.action_ids == index.action_ids
+    assert loaded.background_ids == index.background_ids
+    assert np.array_equal(loaded.matrix, index.matrix)
+    index.key = 'rev-1'
+    index.save(fname)
+    assert CompatibilityIndex.load(fname, key='rev-1').key == 'rev-1'
+    assert CompatibilityIndex.load(fname, key='rev-2') is None
+
+
+if __name__ == '__main__':
+    test_action_compatibility()
+    test_compatibility_matrix()
+    test_compatible_pairs()
+    test_sample_pairs()
+    test_save_load()
+    print('All tests passed')
@@ -0,0 +1,100 @@
+"""Tests for precomputed object placement maps (bvp.Classes.constraint.FeasibilityMap)
+
+Run with pytest, or as a script.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+from bvp.Classes.constraint import FeasibilityMap, ObConstraint
+from bvp.Classes.object import Object
+from bvp.Classes.camera import Camera
+from bvp.Classes.placement import Placement
+
+
+def _box(center, dimensions):
+    # Stand-in for a static obstacle (only its bounding box is used)
+    return SimpleNamespace(bounding_box_center=center, bounding_box_dimensions=dimensions)
+
+
+def test_from_constraint():
+    constraint = ObConstraint(X=[0, 3, -5, 5], Y=[0, 3, -2, 2], Z=[0, 0, 1, 1])
+    fmap = FeasibilityMap.from_constraint(constraint, resolution=0.5)
+    assert fmap.shape == (20, 8)
+    assert fmap.z == 1
+    # Clearance to limits, from cell centers
+    assert np.allclose(fmap.bound_clearance[0], [0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.25])
+    assert np.isclose(fmap.bound_clearance.max(), 1.75)
+    # Cells with room for an object that extends 1 unit from its position
+    ok = fmap.feasible(bound_extent=1.)
+    xx, yy = np.meshgrid(fmap.x_centers, fmap.y_centers, indexing='ij')
+    assert not np.any(ok & ((np.abs(xx) > 4 - fmap.resolution / np.sqrt(2)) | (np.abs(yy) > 1)))
+    assert ok.sum() > 0
+    # Static obstacles, and obstacles added at sampling time
+    fmap = FeasibilityMap.from_constraint(constraint, obstacles=[_box((-3., 0., 0.), (2., 2., 2.))], resolution=0.5)
+    ok = fmap.feasible(obstacle_extent=0.5, obstacles=[_box((3., 0., 0.), (2., 2., 2.))])
+    assert not np.any(ok & (np.abs(np.abs(xx) - 3) < 1.5))
+    assert np.any(ok & (np.abs(xx) < 1))
+    # Radius & theta limits (only the region in front of the origin)
+    constraint = ObConstraint(X=None, Y=None, r=[0, 3, 1, 4], theta=[0, 30, -45, 45])
+    fmap = FeasibilityMap.from_constraint(constraint, resolution=0.25)
+    xx, yy = np.meshgrid(fmap.x_centers, fmap.y_centers, indexing='ij')
+    r = np.hypot(xx, yy)
+    ok = fmap.feasible()
+    assert np.all((r[ok] > 1) & (r[ok] < 4))
+    assert np.all(yy[ok] < 0)
+    try:
+        FeasibilityMap.from_constraint(ObConstraint(X=None, Y=None, r=None))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Unbounded constraints should fail')
+
+
+def test_sample():
+    constraint = ObConstraint(X=[0, 3, -5, 5], Y=[0, 3, -2, 2])
+    fmap = FeasibilityMap.from_constraint(constraint, obstacles=[_box((0., 0., 0.), (2., 4., 2.))], resolution=0.25)
+    np.random.seed(0)
+    for _ in range(200):
+        x, y, z = fmap.sample(bound_extent=0.5, obstacle_extent=0.5)
+        assert (-4.5 <= x <= 4.5) and (-1.5 <= y <= 1.5) and (abs(x) >= 1.5)
+    # No room for very large objects
+    assert fmap.sample(bound_extent=3.) is None
+
+
+def test_to_dict():
+    constraint = ObConstraint(X=[0, 3, -5, 5], Y=[0, 3, -2, 2])
+    fmap = FeasibilityMap.from_constraint(constraint, obstacles=[_box((1., 1., 0.), (1., 1., 1.))])
+    d = fmap.to_dict()
+    fmap2 = FeasibilityMap(**d)
+    for attr in ['x_min', 'y_min', 'resolution', 'z']:
+        assert getattr(fmap2, attr) == getattr(fmap, attr)
+    assert np.allclose(fmap2.bound_clearance, fmap.bound_clearance, atol=1e-3)
+    assert np.allclose(fmap2.obstacle_clearance, fmap.obstacle_clearance, atol=1e-3)
+    # As stored in background metadata
+    constraint2 = ObConstraint(X=[0, 3, -5, 5], Y=[0, 3, -2, 2], feasibility_map=d)
+    assert np.array_equal(constraint2.feasibility_map.feasible(0.5, 0.5), fmap2.feasible(0.5, 0.5))
+
+
+def test_sample_xyz_checks_sampled_position():
+    constraint = ObConstraint(X=[0, 3, -5, 5], Y=[0, 3, -5, 5])
+    constraint.compute_feasibility_map()
+    camera = Camera(location=[(0., -25., 8.)], fix_location=[(0., 0., 1.)], frames=(1,))
+    np.random.seed(0)
+    # The object's current position (far outside the constraint) must not affect the result
+    ob = Object(size3D=1., pos3D=(100., 100., 0.))
+    pos, image_position = constraint.sampleXYZ(ob, camera, n_iter=20)
+    assert pos is not None
+    placed = Placement.from_object(ob)
+    placed.pos3D = pos
+    bound_ok, _ = constraint.checkXYZS_3D(placed)
+    assert all(bound_ok)
+    assert ob.pos3D == (100., 100., 0.)
+
+
+if __name__ == '__main__':
+    test_from_constraint()
+    test_sample()
+    test_to_dict()
+    test_sample_xyz_checks_sampled_position()
+    print('All tests passed')
@@ -0,0 +1,78 @@
+"""Tests for opt-in timers, counters and histograms (bvp.utils.instrument)
+
+Run with pytest, or as a script.
+"""
+
+import os
+import json
+import tempfile
+import subprocess
+import sys
+
+from bvp.utils import instrument
+
+
+def _enabled_with(value):
+    """Whether instrumentation is on at import, given value of BVP_INSTRUMENT"""
+    env = dict(os.environ, BVP_INSTRUMENT=value)
+    out = subprocess.check_output([sys.executable, '-c', 
+                                   'from bvp.utils import instrument; print(instrument.enabled)'], 
+                                  env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return out.decode('utf-8').strip().splitlines()[-1] == 'True'
+
+
+def test_environment_variable():
+    for value in ('1', 'true', 'True', 'yes'):
+        assert _enabled_with(value), value
+    for value in ('', '0', 'false', 'no'):
+        assert not _enabled_with(value), value
+
+
+def test_measurements():
+    @instrument.timed('f')
+    def f(x):
+        return x * 2
+    instrument.enable()
+    try:
+        assert f(2) == 4
+        with instrument.timer('block'):
+            instrument.count('things', 3)
+            instrument.count('things')
+        instrument.histogram('rejections', 'collision')
+        instrument.histogram('rejections', 'collision')
+        instrument.histogram('rejections', 'out_of_bounds')
+        instrument.record('memory_mb', 0, 1200.5)
+        instrument.record('memory_mb', 1, 800.)
+        instrument.record('memory_mb', 1, 850.25)
+        rep = instrument.report()
+        assert rep['timers']['f']['n'] == 1
+        assert rep['timers']['block']['total'] >= 0
+        assert rep['counters'] == dict(things=4)
+        assert rep['histograms'] == dict(rejections=dict(collision=2, out_of_bounds=1))
+        assert rep['values'] == dict(memory_mb={0: 1200.5, 1: 850.25})
+        assert 'rejections' in instrument.summary()
+        assert '850.2' in instrument.summary()
+        with tempfile.TemporaryDirectory() as tmp:
+            instrument.save(os.path.join(tmp, 'timing.json'))
+            with open(os.path.join(tmp, 'timing.json')) as fid:
+                saved = json.load(fid)
+            assert saved['counters'] == dict(things=4)
+            assert saved['values'] == dict(memory_mb={'0': 1200.5, '1': 850.25})
+        # Nothing is recorded while disabled
+        instrument.disable()
+        f(1)
+        instrument.count('things')
+        instrument.record('memory_mb', 2, 1.)
+        assert instrument.report()['counters'] == dict(things=4)
+        assert instrument.report()['values'] == dict(memory_mb={0: 1200.5, 1: 850.25})
+        assert instrument.report()['timers']['f']['n'] == 1
+    finally:
+        instrument.disable()
+        instrument.clear()
+    assert instrument.report() == dict(timers={}, counters={}, histograms={}, values={})
+
+
+if __name__ == '__main__':
+    test_environment_variable()
+    test_measurements()
+    print('All tests passed')
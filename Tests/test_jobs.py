@@ -0,0 +1,114 @@
+"""Tests for chunked job arrays & memory estimates (bvp.utils.jobs)
+
+Runs a small shell script as a local job array (no scheduler needed). Run
+with pytest, or as a script.
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+import numpy as np
+from bvp.utils import jobs
+
+
+def test_chunk_range():
+    n_items, chunk_size = 10, 3
+    assert jobs.n_chunks(n_items, chunk_size) == 4
+    chunks = [list(jobs.chunk_range(i, n_items, chunk_size)) for i in range(jobs.n_chunks(n_items, chunk_size))]
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert jobs.n_chunks(9, 3) == 3
+    assert list(jobs.chunk_range(3, 9, 3)) == []
+
+
+def test_local_executor():
+    n_items, chunk_size = 7, 2
+    n_tasks = jobs.n_chunks(n_items, chunk_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Each task writes the items in its chunk (as the render script does); task 2 fails
+        out = os.path.join(tmp, 'items_${SLURM_ARRAY_TASK_ID}.txt')
+        command = ('%s -c "from bvp.utils import jobs; '
+                   'print(\' \'.join(str(i) for i in jobs.chunk_range(jobs.task_id(), %d, %d)))" > %s\n'
+                   'test "$SLURM_ARRAY_TASK_ID" != 2'%(sys.executable, n_items, chunk_size, out))
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = jobs.write_array_script(os.path.join(tmp, 'job.sh'), 'cd %s\n%s'%(repo_dir, command))
+        assert os.access(script, os.X_OK)
+        returncodes = jobs.LocalExecutor(max_workers=2).submit(script, n_tasks, name='test', log_dir=tmp)
+        assert returncodes == [0, 0, 1, 0]
+        items = []
+        for i in range(n_tasks):
+            with open(os.path.join(tmp, 'items_%d.txt'%i)) as fid:
+                items.extend(int(x) for x in fid.read().split())
+        # Every item is in exactly one chunk
+        assert items == list(range(n_items))
+        with open(os.path.join(tmp, 'test_local.log')) as fid:
+            log = fid.read()
+        assert all('task %d (exit %d)'%(i, rc) in log for i, rc in enumerate(returncodes))
+
+
+def test_slurm_executor():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stand-in for sbatch: records its arguments, prints a job ID
+        calls = os.path.join(tmp, 'calls.txt')
+        sbatch = jobs.write_array_script(os.path.join(tmp, 'sbatch'), 
+            'echo "$@" >> %s\nwc -l < %s | tr -d " " | sed "s/$/;cluster/"'%(calls, calls))
+        executor = jobs.SlurmArrayExecutor(partition=None, sbatch=sbatch, max_array_size=1000)
+        job_ids = executor.submit('job.sh', 2500, name='test', max_concurrent=50, memory=2000.)
+        assert job_ids == ['1', '2', '3']
+        with open(calls) as fid:
+            calls = [line.split() for line in fid.read().splitlines()]
+        assert [c[1] for c in calls] == ['--array=0-999%50', '--array=0-999%50', '--array=0-499%50']
+        assert [c[4] for c in calls] == ['--export=ALL,BVP_TASK_OFFSET=%d'%i for i in (0, 1000, 2000)]
+        assert all(c[-3:] == ['--mem', '2000', 'job.sh'] for c in calls)
+        # Small arrays are not split
+        assert len(executor.submit('job.sh', 10, name='test')) == 1
+
+
+def test_task_id():
+    old = [os.environ.pop(v, None) for v in (jobs.task_id_variable, jobs.task_offset_variable)]
+    try:
+        assert jobs.task_id() == 0
+        assert jobs.task_id(default=5) == 5
+        os.environ[jobs.task_id_variable] = '3'
+        assert jobs.task_id() == 3
+        # Task in the second of several arrays
+        os.environ[jobs.task_offset_variable] = '1000'
+        assert jobs.task_id() == 1003
+    finally:
+        for v, value in zip((jobs.task_id_variable, jobs.task_offset_variable), old):
+            os.environ.pop(v, None)
+            if value is not None:
+                os.environ[v] = value
+
+
+def test_memory():
+    assert jobs.peak_memory_mb() > 0
+    if jobs.reset_peak_memory():
+        # Peak is reset to current use, so a large allocation is forgotten
+        x = np.ones(200 * 1024**2 // 8)
+        peak = jobs.peak_memory_mb()
+        del x
+        assert jobs.reset_peak_memory()
+        assert jobs.peak_memory_mb() < peak - 100
+    with tempfile.TemporaryDirectory() as tmp:
+        reports = []
+        for i, values in enumerate([{'0': 1500., '1': 900.}, {'1': 1100., '3': 2000.}]):
+            reports.append(os.path.join(tmp, 'timing_%d.json'%i))
+            with open(reports[-1], 'w') as fid:
+                json.dump(dict(values={'BlenderRender.peak_memory_mb': values}), fid)
+        memory = jobs.scene_memory(reports, 5)
+        assert np.array_equal(memory, [1500., 1100., np.nan, 2000., np.nan], equal_nan=True)
+    assert jobs.task_memory(memory) == 2500
+    assert jobs.task_memory(memory, safety=1.) == 2000
+    assert jobs.task_memory([np.nan, np.nan]) == 1000
+    assert jobs.task_memory([100.], minimum=500) == 500
+
+
+if __name__ == '__main__':
+    test_chunk_range()
+    test_local_executor()
+    test_slurm_executor()
+    test_task_id()
+    test_memory()
+    print('All tests passed')
@@ -0,0 +1,80 @@
+"""Tests for Blender-style keyframe interpolation (bvp.utils.math.interpolate_keyframes,
+bvp.Camera.framewise)
+
+Run with pytest, or as a script.
+"""
+
+import numpy as np
+import bvp
+from bvp.utils.math import interpolate_keyframes
+
+
+def test_vector_is_linear():
+    keyframes = np.array([1., 4., 10., 30.])
+    values = np.array([[0., 1., -2.],
+                       [3., 1., 5.],
+                       [-1., 2., 5.5],
+                       [7., 0., 0.]])
+    frames = np.linspace(-5, 40, 181)
+    out = interpolate_keyframes(keyframes, values, frames, handle_type='VECTOR')
+    expected = np.array([np.interp(frames, keyframes, v) for v in values.T]).T
+    assert np.allclose(out, expected, atol=1e-10)
+
+
+def test_auto_reference_values():
+    # F-curve 0 -> 10 -> 0 over frames 1, 11, 21 with AUTO handles: handle length
+    # factor 2.5614 and flat first / last handles for constant extrapolation (as
+    # computed by Blender's BKE_nurb_handle_calc / BKE_fcurve_handles_recalc),
+    # with the Bezier parameter for each frame found as a root of the cubic in x
+    frames = [1, 3, 6, 9, 11, 14, 21]
+    reference = [0., 0.88888895, 5., 9.11111105, 10., 8.02628489, 0.]
+    out = interpolate_keyframes([1, 11, 21], [[0.], [10.], [0.]], frames, handle_type='AUTO')
+    assert np.allclose(out.ravel(), reference, atol=1e-6)
+    # Flat end handles: zero slope leaving the first key and entering the last
+    ends = interpolate_keyframes([1, 11, 21], [[0.], [10.], [0.]], [1.01, 20.99], handle_type='AUTO')
+    assert np.all(np.abs(ends) < 1e-3)
+    # ... unlike unflattened end handles
+    ends = interpolate_keyframes([1, 11, 21], [[0.], [10.], [0.]], [1.01, 20.99],
+                                 handle_type='AUTO', flat_ends=False)
+    assert np.all(np.abs(ends) > 1e-2)
+    # Constant extrapolation
+    out = interpolate_keyframes([1, 11, 21], [[0.], [10.], [0.]], [-10, 0, 22, 50], handle_type='AUTO')
+    assert np.allclose(out, 0)
+
+
+def test_mixed_handles():
+    # VECTOR handles on both sides of a segment give a straight line, whatever the other keys
+    out = interpolate_keyframes([1, 11, 21], [[0.], [10.], [0.]], [13, 16, 19],
+                                handle_type=['AUTO', 'VECTOR', 'VECTOR'])
+    assert np.allclose(out.ravel(), [8., 5., 2.], atol=1e-10)
+    try:
+        interpolate_keyframes([1, 11], [[0.], [1.]], [5], handle_type='BOUNCE')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Unsupported handle types should fail')
+
+
+def test_framewise_cache():
+    camera = bvp.Camera(location=((0., -10., 1.), (10., -10., 1.)),
+                        fix_location=((0., 0., 1.),), frames=(1, 11))
+    location, fix_location, camera_matrix = camera.framewise()
+    assert location.shape == (11, 3) and camera_matrix.shape == (11, 3, 3)
+    assert np.allclose(location[5], [5., -10., 1.])
+    assert camera.framewise()[0] is location
+    # Changing keyframes must give new values
+    camera.set_location((1, 11), ((0., -10., 1.), (0., -20., 1.)))
+    location = camera.framewise()[0]
+    assert np.allclose(location[5], [0., -15., 1.])
+    camera.set_fixation_location((1, 11), ((0., 0., 1.), (0., 0., 5.)))
+    assert np.allclose(camera.framewise()[1][-1], [0., 0., 5.])
+    camera.set_location((1, 21), ((0., -10., 1.), (0., -20., 1.)))
+    assert len(camera.framewise()[0]) == 21
+
+
+if __name__ == '__main__':
+    test_vector_is_linear()
+    test_auto_reference_values()
+    test_mixed_handles()
+    test_framewise_cache()
+    print('All tests passed')
@@ -0,0 +1,86 @@
+"""Tests for OFF mesh reading & writing (bvp.utils.mesh_io)
+
+Run with pytest, or as a script.
+"""
+
+import os
+import time
+import tempfile
+
+import numpy as np
+from bvp.utils.mesh_io import parse_off, read_off, write_off, triangulate
+
+_square = np.array([[0., 0., 0.], [1., 0., 0.], [1., 1., 0.], [0., 1., 0.]])
+
+
+def test_triangulate():
+    assert triangulate(np.array([[0, 1, 2, 3]])).tolist() == [[0, 1, 2], [0, 2, 3]]
+    assert triangulate([[0, 1, 2], [0, 2, 3, 4]]).tolist() == [[0, 1, 2], [0, 2, 3], [0, 3, 4]]
+
+
+def test_parse_off():
+    text = 'OFF\n4 1 0\n0 0 0\n1 0 0\n1 1 0\n0 1 0\n4 0 1 2 3\n'
+    mesh = parse_off(text)
+    assert np.array_equal(mesh['pts'], _square)
+    assert mesh['polys'].tolist() == [[0, 1, 2], [0, 2, 3]]
+    assert mesh['vertex_normals'] is None and mesh['vertex_colors'] is None
+    # Comments, counts on header line, and mixed polygons (slow path) give the same vertices
+    text = ('# comment\nOFF 5 2 0 # counts\n0 0 0\n1 0 0\n1 1 0\n0 1 0\n0.5 2 0\n'
+            '4 0 1 2 3 # quad\n3 3 2 4\n')
+    mesh = parse_off(text)
+    assert np.array_equal(mesh['pts'][:4], _square)
+    assert mesh['polys'].tolist() == [[0, 1, 2], [0, 2, 3], [3, 2, 4]]
+    # Face colors are repeated for each triangle of a face
+    mesh = parse_off('OFF\n4 1 0\n0 0 0\n1 0 0\n1 1 0\n0 1 0\n4 0 1 2 3 255 0 0\n')
+    assert mesh['face_colors'].tolist() == [[255, 0, 0], [255, 0, 0]]
+    try:
+        parse_off('PLY\n')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Non-OFF files should fail')
+
+
+def test_write_read():
+    normals = np.tile([0., 0., 1.], (4, 1))
+    colors = np.array([[1., 0., 0., 1.], [0., 1., 0., 1.], [0., 0., 1., 1.], [1., 1., 1., 1.]])
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, 'square.off')
+        write_off(fname, _square, np.array([[0, 1, 2, 3]]), vertex_normals=normals, vertex_colors=colors)
+        with open(fname) as fid:
+            assert fid.readline().strip() == 'CNOFF'
+        mesh = read_off(fname, return_dict=True)
+        assert np.array_equal(mesh['pts'], _square)
+        assert np.array_equal(mesh['vertex_normals'], normals)
+        assert np.array_equal(mesh['vertex_colors'], colors)
+        assert mesh['polys'].tolist() == [[0, 1, 2], [0, 2, 3]]
+        # List of polygons
+        write_off(fname, _square, [[0, 1, 2], [0, 2, 3]])
+        pts, polys = read_off(fname)
+        assert np.array_equal(pts, _square) and polys.tolist() == [[0, 1, 2], [0, 2, 3]]
+
+
+def test_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, 'square.off')
+        write_off(fname, _square, [[0, 1, 2, 3]])
+        cache_dir = os.path.join(tmp, 'cache')
+        os.makedirs(cache_dir)
+        pts, polys = read_off(fname, cache=True, cache_dir=cache_dir)
+        assert os.listdir(cache_dir) == ['square.npz']
+        pts2, polys2 = read_off(fname, cache=True, cache_dir=cache_dir)
+        assert np.array_equal(pts, pts2) and np.array_equal(polys, polys2)
+        # Cache is not used once the OFF file is newer
+        write_off(fname, _square * 2, [[0, 1, 2, 3]])
+        t = time.time() + 10
+        os.utime(fname, (t, t))
+        pts3, _ = read_off(fname, cache=True, cache_dir=cache_dir)
+        assert np.array_equal(pts3, _square * 2)
+
+
+if __name__ == '__main__':
+    test_triangulate()
+    test_parse_off()
+    test_write_read()
+    test_cache()
+    print('All tests passed')
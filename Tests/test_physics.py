@@ -0,0 +1,76 @@
+"""Tests for the rigid-body bake cache (bvp.utils.physics)
+
+Run with pytest, or as a script.
+"""
+
+import os
+import copy
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+from bvp.utils.physics import physics_key, BakedPhysics, PhysicsCache
+
+
+def _objects():
+    thrown = SimpleNamespace(name='ball', size3D=1., pos3D=(0., 0., 1.), rot3D=(0., 0., 0.),
+                             action=None, rigid_body=True, movement_locations=[(0., 0., 1.), (1., 0., 2.)],
+                             movement_frames=[1, 5], movement_rotation_euler=None)
+    static = SimpleNamespace(name='table', size3D=2., pos3D=(1., 1., 0.), rot3D=(0., 0., 90.),
+                             action=None, rigid_body=False, movement_locations=None,
+                             movement_frames=None, movement_rotation_euler=None)
+    return [thrown, static]
+
+
+def test_physics_key():
+    obs = _objects()
+    bg = SimpleNamespace(name='room', _id='bg0', _rev='1-a')
+    key = physics_key(obs, (1, 30), background=bg)
+    assert key == physics_key(copy.deepcopy(obs), (1, 30), background=copy.deepcopy(bg))
+    # Rounding noise does not change the key
+    moved = copy.deepcopy(obs)
+    moved[0].pos3D = (1e-9, 0., 1.)
+    assert physics_key(moved, (1, 30), background=bg) == key
+    # Anything the simulation depends on does
+    moved[1].pos3D = (1.5, 1., 0.)
+    assert physics_key(moved, (1, 30), background=bg) != key
+    thrown = copy.deepcopy(obs)
+    thrown[0].movement_locations = [(0., 0., 1.), (2., 0., 2.)]
+    assert physics_key(thrown, (1, 30), background=bg) != key
+    assert physics_key(obs, (1, 30), background=SimpleNamespace(name='room', _id='bg0', _rev='2-b')) != key
+    assert physics_key(obs, (1, 30), background=SimpleNamespace(name='room', _id='bg1', _rev='1-a')) != key
+    assert physics_key(obs, (1, 30)) != key
+    assert physics_key(obs, (1, 31), background=bg) != key
+    assert physics_key(obs, (1, 30), substeps_per_frame=20, background=bg) != key
+    assert physics_key(obs, (1, 30), background=bg, extra=[2, 79, 0]) != key
+
+
+def test_physics_cache():
+    frames = np.arange(1, 11)
+    location = np.random.randn(2, 10, 3)
+    rotation = np.random.randn(2, 10, 3)
+    baked = BakedPhysics(frames, location, rotation, names=['ball', 'box'])
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PhysicsCache(os.path.join(tmp, 'physics'))
+        assert 'abc' not in cache
+        assert cache.get('abc') is None
+        cache['abc'] = baked
+        assert 'abc' in cache
+        assert cache.keys() == ['abc']
+        loaded = cache['abc']
+        assert loaded.names == ['ball', 'box']
+        assert np.array_equal(loaded.frames, frames)
+        assert np.allclose(loaded.location, location, atol=1e-5)
+        assert np.allclose(loaded.rotation_euler, rotation, atol=1e-5)
+    try:
+        BakedPhysics(frames, location, rotation[:, :5])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Mismatched shapes should fail')
+
+
+if __name__ == '__main__':
+    test_physics_key()
+    test_physics_cache()
+    print('All tests passed')
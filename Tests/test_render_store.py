@@ -0,0 +1,118 @@
+"""Tests for the shared render store (bvp.utils.render_store) and linking stored scene renders
+
+Run with pytest, or as a script.
+"""
+
+import os
+import tempfile
+from types import SimpleNamespace
+
+from bvp.utils.render_store import RenderStore, list_files, list_scene_files
+from bvp.Classes.scene import Scene
+
+
+def _write(fname, content):
+    os.makedirs(os.path.dirname(fname), exist_ok=True)
+    with open(fname, 'w') as fid:
+        fid.write(content)
+
+
+def test_add_and_link():
+    with tempfile.TemporaryDirectory() as tmp:
+        out1 = os.path.join(tmp, 'list1')
+        for f in ['Scenes/Sc0000001_01.png', 'Scenes/Sc0000001_02.png', 'Masks/Sc0000001_01_m01.png']:
+            _write(os.path.join(out1, f), f)
+        store = RenderStore(os.path.join(tmp, 'store'))
+        assert 'abc123' not in store
+        store.add('abc123', sorted(list_files(out1)), out1, scene_name='Sc0000001_')
+        assert 'abc123' in store
+        assert store.keys() == ['abc123']
+        assert store.files('abc123') == ['Masks/{scene_name}01_m01.png', 
+                                         'Scenes/{scene_name}01.png', 'Scenes/{scene_name}02.png']
+        # Link under another scene name, in another output directory
+        out2 = os.path.join(tmp, 'list2')
+        linked = store.link('abc123', out2, scene_name='Sc0000007_')
+        assert sorted(list_files(out2)) == ['Masks/Sc0000007_01_m01.png', 
+                                            'Scenes/Sc0000007_01.png', 'Scenes/Sc0000007_02.png']
+        assert all(os.path.exists(f) for f in linked)
+        with open(os.path.join(out2, 'Scenes', 'Sc0000007_02.png')) as fid:
+            assert fid.read() == 'Scenes/Sc0000001_02.png'
+
+
+def test_list_scene_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        for f in ['Scenes/Sc0000001_01.png', 'Masks/Sc0000001_01_m01.png', 'Sc0000001_log.txt',
+                  'Scenes/Sc0000002_01.png', 'Scenes/old/Sc0000001_01.png', 'Masks/x_Sc0000001_01.png']:
+            _write(os.path.join(tmp, f), f)
+        files = list_scene_files(tmp, 'Sc0000001_')
+        assert sorted(files) == sorted([os.path.join('Masks', 'Sc0000001_01_m01.png'), 
+                                        os.path.join('Scenes', 'Sc0000001_01.png'), 'Sc0000001_log.txt'])
+        assert sorted(list_scene_files(tmp, 'Sc0000002_')) == [os.path.join('Scenes', 'Sc0000002_01.png')]
+        assert list_scene_files(tmp, None) == list_files(tmp)
+        assert list_scene_files(os.path.join(tmp, 'missing'), 'Sc0000001_') == {}
+
+
+def test_incomplete_entries_ignored():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RenderStore(tmp)
+        # Files without a manifest (e.g. from an interrupted add) are not in the store
+        _write(os.path.join(tmp, 'de', 'def456', 'Scenes', 'x.png'), 'x')
+        assert 'def456' not in store
+        assert store.keys() == []
+        try:
+            store.files('def456')
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('Incomplete entries should not be readable')
+
+
+def test_link_rendered():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stand-in for RenderOptions (which requires Blender)
+        ro = SimpleNamespace(BVPopts=dict(BasePath=os.path.join(tmp, 'list2', 'Scenes', '{scene_name}')),
+                             get_content_dict=lambda: dict(Type='All', resolution_x=512))
+        scene = Scene(number=3, frame_range=(1, 2))
+        store = RenderStore(os.path.join(tmp, 'store'))
+        # Not rendered yet
+        assert not scene.link_rendered(ro, store)
+        # Same scene, rendered under another name & output directory
+        out1 = os.path.join(tmp, 'list1')
+        _write(os.path.join(out1, 'Scenes', 'Sc0000001_01.png'), '1')
+        store.add(Scene(number=1, frame_range=(1, 2)).content_hash(ro), 
+                  ['Scenes/Sc0000001_01.png'], out1, scene_name='Sc0000001_')
+        assert scene.link_rendered(ro, store)
+        assert list(list_files(os.path.join(tmp, 'list2'))) == [os.path.join('Scenes', 'Sc0000003_01.png')]
+        # Different scene content does not match
+        assert not Scene(number=3, frame_range=(1, 5)).link_rendered(ro, store)
+
+
+def test_link_rendered_video():
+    class Encoder(object):
+        def __init__(self):
+            self.submitted = []
+        def submit(self, frames, fname, fps=15):
+            self.submitted.append((frames, fname, fps))
+    with tempfile.TemporaryDirectory() as tmp:
+        ro = SimpleNamespace(BVPopts=dict(BasePath=os.path.join(tmp, 'out', 'Scenes', '{scene_name}')),
+                             get_content_dict=lambda: dict(Type='All'))
+        scene = Scene(number=2, frame_range=(1, 2), frame_rate=30)
+        store = RenderStore(os.path.join(tmp, 'store'))
+        src = os.path.join(tmp, 'src')
+        for f in ['Scenes/Sc0000009_02.png', 'Scenes/Sc0000009_01.png', 'Masks/Sc0000009_01_m01.png']:
+            _write(os.path.join(src, f), f)
+        store.add(scene.content_hash(ro), sorted(list_files(src)), src, scene_name='Sc0000009_')
+        encoder = Encoder()
+        assert scene.link_rendered(ro, store, video_encoder=encoder)
+        frame_dir = os.path.join(tmp, 'out', 'Scenes')
+        assert encoder.submitted == [([os.path.join(frame_dir, 'Sc0000002_01.png'), os.path.join(frame_dir, 'Sc0000002_02.png')],
+                                      os.path.join(tmp, 'out', 'Movies', 'Sc0000002.mp4'), 30)]
+
+
+if __name__ == '__main__':
+    test_add_and_link()
+    test_list_scene_files()
+    test_incomplete_entries_ignored()
+    test_link_rendered()
+    test_link_rendered_video()
+    print('All tests passed')
@@ -0,0 +1,64 @@
+"""Tests for fast scene save / load (bvp.utils.serialize)
+
+Uses scenes without database elements, so no database is needed. Run with
+pytest, or as a script.
+"""
+
+import os
+import json
+import tempfile
+
+import numpy as np
+from bvp.utils import serialize
+from bvp.Classes.scene import Scene
+from bvp.Classes.object import Object
+from bvp.Classes.camera import Camera
+from bvp.Classes.placement import Placement
+
+
+def _scene(number=1):
+    box = Object(size3D=2., pos3D=(np.float64(1.), 2., 0.), rot3D=(0, 0, 90.))
+    ball = Placement.from_object(Object(pos3D=(0., 0., np.float64(1.))))
+    camera = Camera(location=[(0., -10., 2.), (1., -10., 2.)], fix_location=[(0., 0., 1.)], frames=(1, 30))
+    return Scene(number=number, objects=[box, ball], camera=camera, frame_range=(1, 30))
+
+
+def test_to_datadict():
+    scene = _scene()
+    datadict = serialize.to_datadict(scene)
+    # Same as (slower) MappedClass method, but json-native without a json round trip
+    assert datadict == json.loads(json.dumps(scene.get_datadict()))
+    assert datadict['objects'][0]['pos3D'] == [1., 2., 0.]
+    assert type(datadict['objects'][0]['pos3D'][0]) is float
+    # Placement records are saved as the objects they place
+    assert datadict['objects'][1]['bvp_object'] == 'object.Object'
+    scene2 = serialize.from_datadict(datadict)
+    assert isinstance(scene2, Scene)
+    assert serialize.to_datadict(scene2) == datadict
+
+
+def test_save_load():
+    scenes = [_scene(i) for i in range(1, 4)]
+    formats = ['json'] + (['msgpack'] if serialize.has_msgpack else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            fname = os.path.join(tmp, 'scenes.%s'%fmt)
+            serialize.save_many(scenes, fname)
+            loaded = serialize.load_many(fname)
+            assert [s.fname for s in loaded] == ['Sc0000001_##', 'Sc0000002_##', 'Sc0000003_##']
+            assert [serialize.to_datadict(s) for s in loaded] == [serialize.to_datadict(s) for s in scenes]
+            fname = os.path.join(tmp, 'scene.%s'%fmt)
+            serialize.save(scenes[0], fname)
+            assert serialize.to_datadict(serialize.load(fname)) == serialize.to_datadict(scenes[0])
+        try:
+            serialize.save(scenes[0], os.path.join(tmp, 'scene.json'), fmt='yaml')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('Unknown formats should fail')
+
+
+if __name__ == '__main__':
+    test_to_datadict()
+    test_save_load()
+    print('All tests passed')
@@ -0,0 +1,47 @@
+"""Tests for array-based mesh topology in bvp.Classes.shape
+
+Run with pytest, or as a script.
+"""
+
+import numpy as np
+from bvp.Classes.shape import Shape, make_cube, trace_poly
+
+
+def test_closed_mesh_has_no_boundary():
+    pts, polys = make_cube()
+    shape = Shape(pts, polys)
+    assert len(shape.boundary_edges) == 0
+    assert shape.boundary_loops == []
+
+
+def test_trace_poly_no_edges():
+    assert list(trace_poly(np.zeros((0, 2), dtype=np.int64))) == []
+
+
+def test_open_mesh_boundary_loop():
+    # Cube with one face (two triangles) removed has one square hole
+    pts, polys = make_cube()
+    shape = Shape(pts, polys[2:])
+    loops = shape.boundary_loops
+    assert len(loops) == 1
+    loop = loops[0]
+    assert loop[0] == loop[-1]
+    assert sorted(loop[:-1]) == sorted(np.unique(polys[:2]).tolist())
+
+
+def test_connected_components():
+    pts, polys = make_cube()
+    # Two separate cubes
+    shape = Shape(np.vstack([pts, pts + 10]), np.vstack([polys, polys + len(pts)]))
+    n_components, labels = shape.connected_components
+    assert n_components == 2
+    assert len(np.unique(labels[:len(pts)])) == 1
+    assert labels[0] != labels[len(pts)]
+
+
+if __name__ == '__main__':
+    test_closed_mesh_has_no_boundary()
+    test_trace_poly_no_edges()
+    test_open_mesh_boundary_loop()
+    test_connected_components()
+    print('All shape topology tests passed')
@@ -0,0 +1,69 @@
+"""Tests for frame-by-frame collisions of moving objects (bvp.Classes.object.GeometryView.swept_collisions)
+
+Run with pytest, or as a script.
+"""
+
+import numpy as np
+import bvp
+from bvp.Classes.object import GeometryView
+
+
+def _actor(path):
+    """Object (size 1, i.e. action units of 0.1) walking along `path`, one (x, y) point per frame"""
+    path = np.asarray(path, dtype=float) * 10
+    min_xyz = [(x - 2., y - 2., 0.) for x, y in path]
+    max_xyz = [(x + 2., y + 2., 10.) for x, y in path]
+    action = bvp.Action(min_xyz=tuple(np.min(min_xyz, axis=0)), max_xyz=tuple(np.max(max_xyz, axis=0)),
+                        min_xyz_trajectory=min_xyz, max_xyz_trajectory=max_xyz)
+    return bvp.Object(pos3D=(0., 0., 0.), size3D=1., action=action)
+
+
+def _walk(n_frames, start, end):
+    return np.linspace(start, end, n_frames)
+
+
+def test_same_frame():
+    # Paths cross at the origin at frame 5
+    a = _actor(_walk(11, (-5, 0), (5, 0)))
+    b = _actor(_walk(11, (0, -5), (0, 5)))
+    assert GeometryView([a]).swept_collisions([b])[0, 0]
+    assert a.collides_with(b, swept=True)
+    # Same path as `b`, but at the origin at frame 15 (tracks are not stretched to the same length)
+    c = _actor(_walk(21, (0, -15), (0, 5)))
+    # Same path as `b` for the first 11 frames
+    d = _actor(_walk(21, (0, -5), (0, 15)))
+    collides = GeometryView([a]).swept_collisions([b, c, d])[0]
+    assert collides.tolist() == [True, False, True]
+    # Boxes covering whole actions always overlap
+    assert GeometryView([a]).collisions([b, c, d]).all()
+
+
+def test_different_frames():
+    a = _actor(_walk(11, (-5, 0), (5, 0)))
+    # Crosses `a`'s path at the origin at frame 0, before `a` gets there
+    b = _actor(_walk(11, (0, 0), (0, 10)))
+    assert not GeometryView([a]).swept_collisions([b])[0, 0]
+    assert not a.collides_with(b, swept=True)
+    assert a.collides_with(b)
+
+
+def test_hold_last_pose():
+    # `a` stops at (5, 0) at frame 10, and stays there
+    a = _actor(_walk(11, (-5, 0), (5, 0)))
+    # ... where `b` passes at frame 15
+    b = _actor(_walk(21, (5, -15), (5, 5)))
+    # ... and `c` passes at frame 5 (before `a` arrives)
+    c = _actor(_walk(21, (5, -5), (5, 15)))
+    view = GeometryView([a, b, c])
+    assert view.n_frames == 21
+    assert np.allclose(view.xyz_trajectory[0, 10:, :2], [5, 0], atol=1e-6)
+    collides = view.swept_collisions()
+    assert collides[0].tolist() == [True, True, False]
+    assert np.array_equal(collides, collides.T)
+
+
+if __name__ == '__main__':
+    test_same_frame()
+    test_different_frames()
+    test_hold_last_pose()
+    print('All tests passed')
@@ -0,0 +1,66 @@
+"""Tests for frame collection & background video encoding (bvp.utils.video)
+
+Uses a stand-in for ffmpeg (a shell script that copies piped frames to the
+output file), so ffmpeg need not be installed. Run with pytest, or as a script.
+"""
+
+import os
+import tempfile
+
+from bvp.utils.video import frame_files, VideoEncoder
+
+_fake_ffmpeg = '#!/bin/sh\nfor last; do true; done\ncat > "$last"\n'
+_failing_ffmpeg = '#!/bin/sh\ncat > /dev/null\necho "encoding failed" >&2\nexit 1\n'
+
+
+def _write(fname, content):
+    os.makedirs(os.path.dirname(fname), exist_ok=True)
+    with open(fname, 'w') as fid:
+        fid.write(content)
+    return fname
+
+
+def _script(tmp, name, content):
+    fname = _write(os.path.join(tmp, 'bin', name), content)
+    os.chmod(fname, 0o755)
+    return fname
+
+
+def test_frame_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        for f in ['Sc0000001_10.png', 'Sc0000001_02.png', 'Sc0000001_01.png', 
+                  'Sc0000011_01.png', 'Sc0000001_01_m01.png', 'Sc0000001_03.jpg']:
+            _write(os.path.join(tmp, f), f)
+        frames = frame_files(tmp, 'Sc0000001_')
+        assert [os.path.basename(f) for f in frames] == ['Sc0000001_01.png', 'Sc0000001_02.png', 'Sc0000001_10.png']
+        assert [os.path.basename(f) for f in frame_files(tmp, 'Sc0000001_', ext='jpg')] == ['Sc0000001_03.jpg']
+
+
+def test_encoder():
+    with tempfile.TemporaryDirectory() as tmp:
+        frames = [_write(os.path.join(tmp, 'Scenes', 'Sc0000001_%02d.png'%i), 'frame%d;'%i) for i in range(1, 4)]
+        fname = os.path.join(tmp, 'Movies', 'Sc0000001.mp4')
+        with VideoEncoder(ffmpeg=_script(tmp, 'ffmpeg', _fake_ffmpeg)) as encoder:
+            encoder.submit(frames, fname, fps=15)
+        assert encoder.wait() == [fname]
+        with open(fname) as fid:
+            assert fid.read() == 'frame1;frame2;frame3;'
+
+
+def test_encoder_errors_raise_on_exit():
+    with tempfile.TemporaryDirectory() as tmp:
+        frames = [_write(os.path.join(tmp, 'Scenes', 'Sc0000001_01.png'), 'frame')]
+        try:
+            with VideoEncoder(ffmpeg=_script(tmp, 'ffmpeg', _failing_ffmpeg)) as encoder:
+                encoder.submit(frames, os.path.join(tmp, 'Movies', 'Sc0000001.mp4'))
+        except RuntimeError as e:
+            assert 'encoding failed' in str(e)
+        else:
+            raise AssertionError('Encoding errors should be raised when the encoder exits')
+
+
+if __name__ == '__main__':
+    test_frame_files()
+    test_encoder()
+    test_encoder_errors_raise_on_exit()
+    print('All tests passed')
@@ -0,0 +1,89 @@
+"""Tests for compressed, chunked voxel storage (bvp.utils.voxels)
+
+Run with pytest, or as a script.
+"""
+
+import os
+import itertools
+import tempfile
+
+import numpy as np
+from bvp.utils.voxels import write_voxels, read_header, VoxelVolume, VoxelStore
+
+
+def test_write_read():
+    rng = np.random.RandomState(0)
+    vol = rng.rand(37, 9, 11) > 0.7
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, 'vol.vox')
+        write_voxels(fname, vol, resolution=0.1, origin=[0, 0, 0], chunk_size=8, source_hash='abc')
+        header = read_header(fname)
+        assert header['shape'] == [37, 9, 11]
+        assert header['source_hash'] == 'abc'
+        v = VoxelVolume(fname)
+        assert v.shape == vol.shape and v.n_chunks == 5
+        assert np.array_equal(v.to_array(), vol)
+        # Slices within & across chunks, integer & negative indices, other indexing
+        for idx in [slice(3, 5), slice(6, 30), slice(30, None), slice(10, 5), 0, 17, -1, 
+                    (slice(5, 20), 3), (12, slice(2, 4), -2), slice(0, 37, 3)]:
+            assert np.array_equal(v[idx], vol[idx]), idx
+        # Only chunks that were accessed are decompressed
+        v = VoxelVolume(fname)
+        v[9:12]
+        assert sorted(v._chunks) == [1]
+        with open(os.path.join(tmp, 'bad.vox'), 'wb') as fid:
+            fid.write(b'not a voxel file')
+        try:
+            read_header(os.path.join(tmp, 'bad.vox'))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('Files without header should fail')
+
+
+def _write_verts(fname, offset=0.):
+    # Surface of a 3 x 3 x 3 voxel block (at vRes=10, buf=2), with a hollow center
+    coords = [-1.5, -0.5, 0.5]
+    with open(fname, 'w') as fid:
+        for x, y, z in itertools.product(coords, coords, coords):
+            if (x, y, z) != (-0.5, -0.5, -0.5):
+                fid.write('%g,%g,%g\n'%(x + offset, y, z))
+
+
+def test_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = dict(ob1=os.path.join(tmp, 'ob1.verts'), ob2=os.path.join(tmp, 'ob2.verts'))
+        _write_verts(sources['ob1'])
+        _write_verts(sources['ob2'], offset=1.)
+        store = VoxelStore(os.path.join(tmp, 'vox'), vRes=10, buf=2, chunk_size=4)
+        assert sorted(store.update(sources, n_jobs=1)) == ['ob1', 'ob2']
+        assert store.keys() == ['ob1', 'ob2']
+        vol = store['ob1'].to_array()
+        assert vol.shape == (12, 12, 14)
+        # Hollow center is filled
+        assert vol.sum() == 27 and vol[5, 5, 1]
+        # Nothing to do until a source file changes
+        assert store.update(sources, n_jobs=1) == []
+        _write_verts(sources['ob2'], offset=2.)
+        assert store.update(sources, n_jobs=1) == ['ob2']
+        assert store.update(sources, n_jobs=1, overwrite=True) == ['ob1', 'ob2']
+        # Volumes are recomputed when the store is reopened with other settings
+        for kw in [dict(vRes=30, buf=2, chunk_size=4), 
+                   dict(vRes=30, buf=4, chunk_size=4), 
+                   dict(vRes=30, buf=4, chunk_size=8)]:
+            store = VoxelStore(os.path.join(tmp, 'vox'), **kw)
+            assert store.update(sources, n_jobs=1) == ['ob1', 'ob2'], kw
+            assert store['ob1'].shape == tuple(store.shape)
+            assert store.update(sources, n_jobs=1) == []
+        try:
+            store['ob3']
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('Missing objects should raise KeyError')
+
+
+if __name__ == '__main__':
+    test_write_read()
+    test_store()
+    print('All tests passed')
@@ -4,7 +4,9 @@ Script to render via Blender using SLURM / other parallel computing.
 This file is called by the Render() and RenderSlurm() commands in SceneList 
 class. In order to render many files, multiple instances of Blender need to be
 opened, and each one needs to call this script (or, a modified version of this
-script). 
+script). SceneList.Render() writes one modified version of this script per 
+render, which renders the chunk of scenes given by the job array task index 
+(SLURM_ARRAY_TASK_ID; see bvp.utils.jobs).
 
 Useful info for command-line Blender can be found at: 
 http://wiki.blender.org/index.php/Doc:Manual/Render/Command_Line_Options
@@ -18,7 +20,7 @@ TempFile = os.path.join(bvp.__path__[0],'Scripts','CurrentRender.pik')
 
 # Jitter read time to avoid stupid NFS bugs:
 time.sleep(random.random())
-if bvp.Verbosity_Level > 3: print('Attempting to load: %s'%TempFile)
+print('Attempting to load: %s'%TempFile)
 SL = bvp.utils.basics.load_pik(TempFile)
 
 ### --- REPLACE 2 --- ###
@@ -26,20 +28,55 @@ ScnToRender = range(len(SL.ScnList))
 ### --- To here --- ###
 
 # Set memory saving mode
-bvp.utils.blender.SetNoMemoryMode(nThreads=2,nPartsXY=4)
+bvp.utils.blender.set_no_memory_mode(n_threads=2, n_parts_xy=4)
+
+# Linked library data (objects, backgrounds...) is kept loaded across scenes in this chunk
+asset_cache = bvp.utils.blender.AssetCache()
+# Shared store of rendered scenes (see SceneList.Render(render_store=...))
+if getattr(SL, 'render_store', None) is not None:
+    render_store = bvp.utils.render_store.RenderStore(SL.render_store)
+else:
+    render_store = None
+# Videos are encoded in background threads while the next scenes render
+if getattr(SL, 'video', None) is not None:
+    video_encoder = bvp.utils.video.VideoEncoder(**SL.video)
+else:
+    video_encoder = None
 
 # Specify type of render *(??) This should be specified by SL.RenderOptions.
 #fpath = copy.copy(SL.RenderOptions.filepath)
 for ii in ScnToRender:
     Scn = SL.ScnList[ii]
+    # Scenes rendered before (e.g. in another scene list) are linked, not created & rendered
+    if (render_store is not None) and Scn.link_rendered(SL.RenderOptions, render_store, video_encoder=video_encoder):
+        bvp.utils.instrument.count('BlenderRender.linked')
+        continue
+    # Measure peak memory for this scene alone (where possible; see bvp.utils.jobs)
+    bvp.utils.jobs.reset_peak_memory()
     # Create scene in Blender (load all objects)
-    Scn.Create(SL.RenderOptions)
+    with bvp.utils.instrument.timer('BlenderRender.create'):
+        Scn.create(SL.RenderOptions, asset_cache=asset_cache)
     ## include scene number in file path
     #SL.RenderOptions.filepath = fpath%Scn.fpath
     # Render (animate)
-    Scn.Render(SL.RenderOptions)
+    with bvp.utils.instrument.timer('BlenderRender.render'):
+        Scn.render(SL.RenderOptions, render_store=render_store, video_encoder=video_encoder)
     # Clear all objects to prep for next render
-    Scn.Clear()
+    with bvp.utils.instrument.timer('BlenderRender.clear'):
+        Scn.clear(asset_cache=asset_cache)
+    bvp.utils.instrument.count('BlenderRender.scenes')
+    # Peak memory of process while creating & rendering this scene (or peak so far, if not reset)
+    bvp.utils.instrument.record('BlenderRender.peak_memory_mb', ii, bvp.utils.jobs.peak_memory_mb())
+
+# Finish encoding videos for this chunk (raises any encoding error)
+if video_encoder is not None:
+    with bvp.utils.instrument.timer('BlenderRender.video'):
+        video_encoder.close()
+        video_encoder.wait()
+
+# Save timing for this chunk (run with environment variable BVP_INSTRUMENT=1)
+if bvp.utils.instrument.enabled:
+    bvp.utils.instrument.save(TempFile.replace('.pik', '_timing_%d.json'%os.getpid()))
 
 # Remove temp files?
 #if ii==len(SL.ScnList):
@@ -24,10 +24,11 @@ see https://docs.python.org/2/howto/regex.html
 """
 ## -- Imports -- ##
 import numpy as np
-import pymongo
 import bvp
 import re
 import os
+import json
+import multiprocessing
 
 # Parsing functions: 
 # Array pattern
@@ -37,9 +38,9 @@ def parse_array(s):
     """
     arr = pat.findall(s)
     if len(arr)>1:
-        arr = [[np.float(a) for a in b.split(',')] for b in arr]
+        arr = [[float(a) for a in b.split(',')] for b in arr]
     elif len(arr)==1:
-        arr = [np.float(a) for a in arr[0].split(',')]
+        arr = [float(a) for a in arr[0].split(',')]
     return np.array(arr)
 
 def parse_info(fname):
@@ -67,30 +68,114 @@ def parse_info(fname):
             else:
                 finfo[k] = v
     return finfo
+
+# Imports many objects in one Blender session; prints a line for each imported object
 off_object_import = """
 import bpy
 import bvp
-# Set scene
-scn = bpy.data.scenes.new('{new_name}')
-# Import object & rename
-bpy.ops.import_mesh.off(filepath='{off_file}')
-ob = bpy.data.objects['{old_name}']
-ob.name = '{new_name}'
-# prettify
-bpy.ops.object.shade_smooth()
-# Link to new scene? Unnecessary? 
-# Establish a blender group
-bvp.utils.blender.set_up_group([ob])
+from bvp.utils.mesh_io import read_off
+for new_name, off_file in {models!r}:
+    # Import object (mesh cached as .npz by parse_model)
+    pts, polys = read_off(off_file, cache=True)
+    me = bpy.data.meshes.new(new_name)
+    me.from_pydata(pts.tolist(), [], polys.tolist())
+    me.update()
+    ob = bpy.data.objects.new(new_name, me)
+    if bpy.app.version < (2, 80, 0):
+        bpy.context.scene.objects.link(ob)
+    else:
+        bpy.context.scene.collection.objects.link(ob)
+    # prettify
+    for poly in me.polygons:
+        poly.use_smooth = True
+    # Establish a blender group
+    bvp.utils.blender.set_up_group([ob])
+    print('BVP_IMPORTED ' + new_name)
 # Save file
 bpy.ops.wm.save_mainfile(filepath='{blend_file}')
-# Done!
+print('BVP_SAVED')
 """
-def import_psb(sdir,psd_dir,dbname='bvp_psb',port=9194):
-    client = pymongo.MongoClient(port=port)
-    # Check for existence of database
-    if dbname in client.database_names():
-        raise Exception('Database "%s" already exists! Aborting.'%dbname)
-    dbi = client[dbname]
+
+def parse_model(args):
+    """Parse info & mesh for one benchmark model (run in worker processes)
+
+    Parameters
+    ----------
+    args : tuple
+        (model number, model directory, output .blend file)
+
+    Returns
+    -------
+    model : dict or None
+        `name`, `off_file`, and database document `doc` for the model, 
+        or None if model directory is missing
+    """
+    n, mdir, blend_file = args
+    mm = 'm%d'%n
+    if not os.path.exists(mdir):
+        return None
+    ob_dict = parse_info(os.path.join(mdir, mm+'_info.txt'))
+    name = 'psb%04d_%s'%(n, os.path.split(ob_dict['url'])[-1])
+    off_file = os.path.join(mdir, mm+'.off')
+    # Parse mesh once; cached as .npz for the Blender import
+    pts, polys = bvp.utils.mesh_io.read_off(off_file, cache=True)
+    ob = bvp.Object(name=name, fname=os.path.basename(blend_file), real_world_size=ob_dict['scale'],
+                    n_faces=ob_dict['polygons'], n_vertices=len(pts))
+    return dict(name=name, off_file=off_file, doc=ob.get_docdict())
+
+def import_group(args):
+    """Import a group of models into one .blend file, in a single Blender session"""
+    blend_file, models = args
+    script = off_object_import.format(blend_file=blend_file,
+        models=[(m['name'], m['off_file']) for m in models])
+    stdout, stderr = bvp.blend(script)
+    if not 'BVP_SAVED' in stdout:
+        return blend_file, None, stderr
+    imported = [L.split(' ', 1)[1].strip() for L in stdout.split('\n') if L.startswith('BVP_IMPORTED ')]
+    return blend_file, imported, stderr
+
+def _load_progress(progress_file):
+    if os.path.exists(progress_file):
+        with open(progress_file) as fid:
+            return json.load(fid)
+    return {}
+
+def _save_progress(progress, progress_file):
+    tmp = progress_file + '.tmp'
+    with open(tmp, 'w') as fid:
+        json.dump(progress, fid)
+    os.replace(tmp, progress_file)
+
+def import_psb(sdir, psd_dir, dbname='bvp_psb', dbhost=None, n_jobs=None, progress_file=None):
+    """Import all Princeton Shape Benchmark models into .blend files and the bvp database
+
+    Model info & meshes are parsed in parallel, each group of (100) models is imported
+    in a single Blender session (sessions also run in parallel), and database 
+    documents for each group are uploaded in one batch once the group's .blend file
+    is saved. Completed groups are recorded in `progress_file`, so an interrupted 
+    import can be re-started and will resume where it left off.
+
+    Parameters
+    ----------
+    sdir : str
+        directory for output .blend files
+    psd_dir : str
+        directory containing benchmark/db/<0-18>/m<n>/ folders
+    dbname : str
+        name of database
+    dbhost : str
+        database host (defaults to config file value)
+    n_jobs : int
+        number of parallel processes (defaults to number of CPUs)
+    progress_file : str
+        json file to record completed groups. Defaults to psb_import_progress.json in `sdir`
+    """
+    if dbhost is None:
+        dbhost = bvp.config.get('db','dbhost')
+    dbi = bvp.DBInterface(dbhost=dbhost, dbname=dbname)
+    if progress_file is None:
+        progress_file = os.path.join(sdir, 'psb_import_progress.json')
+    progress = _load_progress(progress_file)
     n_shapes_per_file=100 # Better off fixed; lame numbering w/ no zero-padding, it's easier this way.
     fdirs = [os.path.join(psd_dir,'benchmark','db',str(n)) for n in range(19)]
     fdirs = [fd for fd in fdirs if os.path.isdir(fd)]
@@ -98,47 +183,50 @@ def import_psb(sdir,psd_dir,dbname='bvp_psb',port=9194):
     if len(fdirs) != 19:
         raise Exception('Princeton Shape Benchmark does not seem to be downloaded/set up properly!\n'+
             'Check help in %s!'%__file__)
+    # All models not yet imported
+    to_parse = []
     for f_ct,fd in enumerate(fdirs):
-        if f_ct==0:
+        blend_file = os.path.join(sdir, 'PrincetonShapeBenchmark_%03d.blend'%f_ct)
+        if blend_file in progress:
             continue # Done already!
-        blend_file = 'PrincetonShapeBenchmark_%03d.blend'%f_ct
-        blend_file = os.path.join(sdir,blend_file)
-        for f in range(100):
-            n = f_ct*100+f
-            mm = 'm%d'%n
-            mdir = os.path.join(fd,mm)
-            if not os.path.exists(mdir):
-                print('WTF! Skipping object: %s'%mm)
+        for f in range(n_shapes_per_file):
+            n = f_ct*n_shapes_per_file+f
+            to_parse.append((n, os.path.join(fd,'m%d'%n), blend_file))
+    print('Importing %d models (%d groups done already)'%(len(to_parse), len(progress)))
+    pool = multiprocessing.Pool(n_jobs)
+    try:
+        # Parse model info & meshes
+        groups = {}
+        for (n, mdir, blend_file), model in zip(to_parse, pool.map(parse_model, to_parse, chunksize=10)):
+            if model is None:
+                print('WTF! Skipping object: m%d'%n)
                 continue
-            # Get object info
-            ob_dict=parse_info(os.path.join(mdir,mm+'_info.txt'))
-            # Run script to insert object into Blender file
-            name = 'psb%04d_%s'%(n, os.path.split(ob_dict['url'])[-1])
-            # TO DO : Construct database representation
-            dbob = dict(name=name,basicCat=None,semantic_category=None,
-                wordnet_label=None,real_world_size=[ob_dict['scale']],
-                nFaces=ob_dict['polygons'],nVertices=None,nPoses=None,
-                constraints=None,verified=False,fname=blend_file)
-            dbi.objects.insert([dbob])
-            script = off_object_import.format(blend_file=blend_file,
-                off_file=os.path.join(mdir,mm+'.off'),
-                old_name=mm,new_name=name)
-            if f==0:
-                bvp.blend(script)
-            else:
-                bvp.blend(script,blend_file=blend_file)
+            groups.setdefault(blend_file, []).append(model)
+        # One Blender session per .blend file
+        for blend_file, imported, stderr in pool.imap_unordered(import_group, list(groups.items())):
+            if imported is None:
+                print('Import failed for %s:\n%s'%(blend_file, stderr))
+                continue
+            docs = [m['doc'] for m in groups[blend_file] if m['name'] in imported]
+            for doc in docs:
+                doc['_id'] = dbi.get_uuid()
+            dbi.put_documents(docs)
+            progress[blend_file] = [d['name'] for d in docs]
+            _save_progress(progress, progress_file)
+            print('Imported %d models to %s'%(len(docs), blend_file))
+    finally:
+        pool.close()
+        pool.join()
 
 if __name__=='__main__':
     ## -- Parameters & setup -- ##
     dbname = 'bvp_psb' # B.lender V.ision P.roject P.rinceton S.hape B.enchmark
-    port = 9194 # BVP default for mongodb
-    n_shapes_per_file = 100 # Seems reasonable
     # Define these two as sys.argv inputs
     sdir = '/auto/k7/mark/BVP_PSB/Objects'
     psd_dir = '/auto/k6/mark/BlenderFiles/Object_Working/PrincetonDatabase_off_format/'
 
     ## -- Bidness -- ##
-    import_psb(sdir,psd_dir,dbname=dbname,port=port)
+    import_psb(sdir,psd_dir,dbname=dbname)
 
 
 # """
@@ -18,7 +18,7 @@ class Action(MappedClass):
     def __init__(self, name='DummyAction', fname=None, armature='mixamo_human', type='Action',
         wordnet_label=None, wordnet_frames=None, is_armature=True, _id=None, _rev=None, n_frames=None,
         is_cyclic=False, is_translating=False, is_broken=False, bg_interaction=False, obj_interaction=False, 
-        is_interactive=False, is_animal=False, fps=24, min_xyz=None, max_xyz=None, min_xyz_trajectory=None, max_xyz_trajectory = None, dbi=None):
+        is_interactive=False, is_animal=False, fps=24, min_xyz=None, max_xyz=None, min_xyz_trajectory=None, max_xyz_trajectory = None, bbox_track=None, dbi=None):
         """Class to store an armature-based action for an object in a BVP scene. 
 
         Parameters
@@ -67,6 +67,9 @@ class Action(MappedClass):
             min points of the object's bounding box at different points in trajectory
         max_xyz_trajectory : list of tuples
             max points of the object's bounding box at different points in trajectory
+        bbox_track : str
+            min and max points of the object's bounding box at every frame of the action, 
+            as a base64-encoded float32 (n_frames, 2, 3) array (see `get_bbox_track()`)
         dbi : DBInterface object
             Database interface (for saving, loading, etc)
 
@@ -93,8 +96,36 @@ class Action(MappedClass):
                     setattr(self, k, v)        # Set _temp_params, etc.
         self._temp_fields = []
         self._data_fields = []
+        self._bbox_track = None # decoded `bbox_track`
         # self.motion_trajectory = [(0,0,0) for i in range(5)]
 
+    def get_bbox_track(self):
+        """Get min and max points of the bounding box of the action at each frame
+
+        Decoded from `bbox_track` (and cached) if it is available; otherwise 
+        interpolated linearly between `min_xyz_trajectory` and `max_xyz_trajectory`
+        samples across `n_frames` frames (or constant at `min_xyz`, `max_xyz`).
+
+        Returns
+        -------
+        bbox_track : array
+            (n_frames, 2, 3) array of [min_xyz, max_xyz] for each frame
+        """
+        if self._bbox_track is None:
+            if self.bbox_track is not None:
+                track = bvpu.basics.decode_array(self.bbox_track)
+            elif self.min_xyz_trajectory is not None:
+                track = np.stack([self.min_xyz_trajectory, self.max_xyz_trajectory], axis=1)
+                n_frames = len(track) if self.n_frames is None else max(int(self.n_frames), 1)
+                t = np.linspace(0, 1, len(track))
+                t_new = np.linspace(0, 1, n_frames)
+                track = np.array([[np.interp(t_new, t, track[:, i, j]) for j in range(3)] for i in range(2)])
+                track = track.transpose(2, 0, 1)
+            else:
+                track = np.array([[self.min_xyz, self.max_xyz]])
+            self._bbox_track = np.asarray(track, dtype=np.float32)
+        return self._bbox_track
+
     #def save(self, context):
     #    """Save Action to database; must be called inside an active Blender session"""
     #    if not is_blender:
@@ -151,9 +182,11 @@ class Action(MappedClass):
             mx.append(mxtmp)
         min_xyz = np.min(np.vstack(mn), axis=0).tolist()
         max_xyz = np.max(np.vstack(mx), axis=0).tolist()
-        idx = np.floor(np.linspace(st, fin, n_samples)).astype(np.int)
+        idx = np.floor(np.linspace(0, len(mn)-1, n_samples)).astype(int)
         min_xyz_trajectory = [mn[ii].tolist() for ii in idx]
         max_xyz_trajectory = [mx[ii].tolist() for ii in idx]
+        # Keep full bounding box track (all frames) as well
+        bbox_track = bvpu.basics.encode_array(np.stack([np.vstack(mn), np.vstack(mx)], axis=1))
 
         #bvpu.blender.make_cube('bbox', min_xyz, max_xyz) # works. This shows the bounding box, if you want. 
         bvpu.blender.grab_only(ob)
@@ -187,8 +220,9 @@ class Action(MappedClass):
             fps=act.Action.fps, 
             min_xyz=min_xyz, 
             max_xyz=max_xyz,
-            min_xyz_trajectory = np.array(mn)[np.floor(np.linspace(1,len(mn),num=5))],
-            max_xyz_trajectory = np.array(mn)[np.floor(np.linspace(1,len(mx),num=5))],
+            min_xyz_trajectory = min_xyz_trajectory,
+            max_xyz_trajectory = max_xyz_trajectory,
+            bbox_track = bbox_track,
             dbi=dbi)
         return bvpact
 
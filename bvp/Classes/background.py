@@ -1,7 +1,7 @@
 # Imports
 import os
 from bvp.utils.blender import add_group, grab_only, apply_material
-from .constraint import ObConstraint, CamConstraint
+from .constraint import ObConstraint, CamConstraint, CameraTrajectoryPool
 from .mapped_class import MappedClass
 from .object import Object
 
@@ -84,9 +84,12 @@ class Background(MappedClass):
                         pass 
                 else:
                     print(obstacles)
-    def place(self, scn=None, proxy=False):
+    def place(self, scn=None, proxy=False, asset_cache=None):
         """
         Adds background to Blender scene
+
+        If `asset_cache` (a bvp.utils.blender.AssetCache) is provided and `proxy` 
+        is True, the background is linked only once per Blender session.
         """
         # Make file local, if it isn't already
         if self.path is not None:
@@ -97,7 +100,7 @@ class Background(MappedClass):
         if self.name is not 'DummyBackground':
             # Add group of mesh object(s)
             #print('{}, {}'.format(self.path, self.name))
-            bg_ob = add_group(self.name, self.fname, self.path, proxy=proxy)
+            bg_ob = add_group(self.name, self.fname, self.path, proxy=proxy, asset_cache=asset_cache)
             # Next clause is a HACK because some background groups are not 
             # stored with a parent. Remove me when library is fixed.
             if isinstance(bg_ob, (list, tuple)):
@@ -121,6 +124,54 @@ class Background(MappedClass):
                 self.apply_materials(bg_ob.users_collection[0], self.materials)
 
 
+    def compute_feasibility_maps(self, resolution=0.25):
+        """Precompute feasible object positions for each of this background's object constraints
+
+        Rasterizes the floor region allowed by each object constraint (X, Y,
+        r and theta limits, minus static `obstacles`) onto a grid. Maps are
+        stored in the `feasibility_map` field of each entry of
+        `object_constraints`, so they are saved with the background's metadata
+        (call `save(is_overwrite=True)` to store them in the database).
+        `ObConstraint.sampleXY()` then only draws positions from feasible cells.
+
+        Parameters
+        ----------
+        resolution : scalar
+            width of grid cells in Blender units
+
+        Returns
+        -------
+        feasibility_maps : list
+            list of FeasibilityMap instances, one per object constraint
+        """
+        if self.object_constraints is None:
+            return []
+        if isinstance(self.object_constraints, dict):
+            constraint_list = [self.object_constraints]
+        else:
+            constraint_list = self.object_constraints
+        feasibility_maps = []
+        for cdict in constraint_list:
+            kw = dict((k, v) for k, v in cdict.items() if k != 'feasibility_map')
+            fmap = ObConstraint(**kw).compute_feasibility_map(obstacles=self.obstacles,
+                                                              resolution=resolution)
+            cdict['feasibility_map'] = fmap.to_dict()
+            feasibility_maps.append(fmap)
+        if isinstance(self.object_constraints, dict):
+            self.ObConstraint.feasibility_map = feasibility_maps[0]
+        return feasibility_maps
+
+    def camera_trajectory_pool(self, frames, fps=15, path=None, **kwargs):
+        """Pre-sampled camera trajectories for this background (see CameraTrajectoryPool)
+
+        Loaded from `path` if a pool for these camera constraints, `frames` and 
+        `fps` has been saved there; otherwise sampled (and saved, if `path` is 
+        given). Pass the pool to `Scene.populate()` to draw camera locations 
+        from it. Keyword arguments (n_trajectories, n_jobs, etc) are passed to 
+        `CameraTrajectoryPool.from_constraint()`.
+        """
+        return CameraTrajectoryPool.for_background(self, frames, fps=fps, path=path, **kwargs)
+
     def apply_materials(self, bpy_grp, materials):
         """Apply materials to already-placed background.
         
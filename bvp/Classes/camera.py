@@ -83,6 +83,7 @@ class Camera(MappedClass):
             self.fix_frames = copy.copy(self.frames)
         self.blender_camera = None
         self.blender_fixation = None
+        self._framewise_cache = {}
 
     @property
     def n_loc(self):
@@ -100,6 +101,73 @@ class Camera(MappedClass):
     def n_keyframes(self):
         return len(self.frames)
 
+    @staticmethod
+    def _keyframes(frames, values):
+        """Keyframes for each of `values`, reconciled as in bvpu.blender.make_locrotscale_animation
+
+        Where that would fail (e.g. several locations sampled for a single-frame
+        scene), values are spread evenly from the first to the last frame.
+        """
+        if len(values) == len(frames) or len(values) == 1:
+            return np.asarray(frames[:len(values)], dtype=float)
+        # Start and end frame only provided (or no usable keyframe info) - interpolate
+        return np.linspace(frames[0], frames[-1], len(values))
+
+    def framewise(self, frames=None):
+        """Camera location, fixation location and rotation at each of many frames
+
+        Keyframed locations are interpolated as Blender interpolates them (with 
+        `cam_handle_type` and `fix_handle_type` handles), so that the camera can 
+        be evaluated outside Blender. Results are cached (per set of frames and 
+        camera keyframes).
+
+        Parameters
+        ----------
+        frames : array-like | None
+            frames at which to evaluate camera. Defaults to every frame from
+            the first to the last keyframe.
+
+        Returns
+        -------
+        location : array
+            (n_frames, 3) camera locations
+        fix_location : array
+            (n_frames, 3) fixation target locations. For cameras specified by 
+            `rotation_euler`, a point one unit in front of the camera.
+        camera_matrix : array
+            (n_frames, 3, 3) camera matrices (rows are the camera's right, up, 
+            and backward axes in world coordinates; see bvpu.math.get_camera_matrix)
+        """
+        if frames is None:
+            frames = np.arange(min(self.frames), max(self.frames) + 1)
+        frames = np.asarray(frames, dtype=float).ravel()
+        key = (tuple(frames), tuple(self.frames), tuple(self.fix_frames), 
+               repr(self.location), repr(self.fix_location), repr(self.rotation_euler), 
+               repr(self.cam_handle_type), repr(self.fix_handle_type))
+        if key not in self._framewise_cache:
+            location = bvpu.math.interpolate_keyframes(self._keyframes(self.frames, self.location), 
+                self.location, frames, handle_type=self.cam_handle_type)
+            if self.fix_location is not None:
+                fix_location = bvpu.math.interpolate_keyframes(
+                    self._keyframes(self.fix_frames, self.fix_location),
+                    self.fix_location, frames, handle_type=self.fix_handle_type)
+                camera_matrix = bvpu.math.get_camera_matrices(location, fix_location)
+            elif self.rotation_euler is not None:
+                rotation_euler = bvpu.math.interpolate_keyframes(
+                    self._keyframes(self.frames, self.rotation_euler),
+                    self.rotation_euler, frames, handle_type=self.cam_handle_type)
+                camera_matrix = np.swapaxes(bvpu.math.euler_to_matrices(rotation_euler), -1, -2)
+                # Camera looks down its local -z axis
+                fix_location = location - camera_matrix[:, 2, :]
+            else:
+                raise ValueError('Either `fix_location` or `rotation_euler` must be specified!')
+            if len(self._framewise_cache) > 32:
+                self._framewise_cache.clear()
+            for x in (location, fix_location, camera_matrix):
+                x.flags.writeable = False
+            self._framewise_cache[key] = (location, fix_location, camera_matrix)
+        return self._framewise_cache[key]
+
     def __repr__(self):
         S = '\n~C~ Camera ~C~\n'
         S += 'Camera lens: %s, clipping: %s, frames: %s\n %d cam location key points\n %d fix location key points'%(str(self.lens), 
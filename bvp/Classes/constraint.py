@@ -2,15 +2,23 @@
 Class for general constraints on random distributions. 
 """
 # Imports
+import os
 import sys
 import copy
+import json
 import random
+import multiprocessing
 import numpy as np
 import bvp.utils as bvpu
-from bvp.Classes.object import Object # Should this be here...? Unclear. 
+from bvp.Classes.object import GeometryView # Should this be here...? Unclear. 
+from bvp.Classes.placement import Placement
 
 verbosity_level = 3
 
+class CameraTrajectoryError(Exception):
+    """Raised when no camera trajectory satisfies a camera constraint"""
+    pass
+
 class Constraint(object):
     """General class to hold constraints on position, etc"""
     def __init__(self, X=None):
@@ -107,11 +115,307 @@ class PosConstraint(Constraint):
         # Check for obstacles! 
         return x, y, z      
 
+class FeasibilityMap(object):
+    """Rasterized map of floor (x, y) positions that satisfy an object constraint"""
+    def __init__(self, x_min, y_min, resolution, z, bound_clearance, obstacle_clearance):
+        """Grid of clearances over the floor region of an object constraint
+
+        Each cell stores two clearances, both measured from the cell center:
+        the distance to the nearest limit of the constraint (X, Y, r; cells
+        outside the theta limits are negative), and the (chessboard) distance
+        to the nearest static obstacle. An object fits in a cell if its
+        horizontal extent is smaller than both clearances. Storing clearances
+        rather than a binary mask allows one map to serve objects of any size.
+
+        Parameters
+        ----------
+        x_min, y_min : scalar
+            x, y coordinates of the lower edge of the first cell of the grid
+        resolution : scalar
+            width of each (square) cell, in Blender units
+        z : scalar
+            height of the floor on which objects are placed
+        bound_clearance : array-like
+            (n_x, n_y) array of distances to the nearest constraint limit
+        obstacle_clearance : array-like
+            (n_x, n_y) array of distances to the nearest static obstacle
+
+        Notes
+        -----
+        Create these with `ObConstraint.compute_feasibility_map()` (or, for all
+        of a background's constraints, `Background.compute_feasibility_maps()`).
+        `to_dict()` gives the form that is stored in the background's metadata.
+        """
+        self.x_min = float(x_min)
+        self.y_min = float(y_min)
+        self.resolution = float(resolution)
+        self.z = float(z)
+        self.bound_clearance = np.asarray(bound_clearance, dtype=np.float32)
+        self.obstacle_clearance = np.asarray(obstacle_clearance, dtype=np.float32)
+
+    def __repr__(self):
+        return 'FeasibilityMap: %d x %d cells @ %.2f, %d feasible'%(self.shape + (self.resolution, self.feasible().sum()))
+
+    @property
+    def shape(self):
+        return self.bound_clearance.shape
+
+    @property
+    def x_centers(self):
+        return self.x_min + (np.arange(self.shape[0]) + 0.5) * self.resolution
+
+    @property
+    def y_centers(self):
+        return self.y_min + (np.arange(self.shape[1]) + 0.5) * self.resolution
+
+    @classmethod
+    def from_constraint(cls, constraint, obstacles=None, resolution=0.25):
+        """Rasterize the floor region allowed by an object constraint
+
+        Parameters
+        ----------
+        constraint : ObConstraint
+            constraint for which to compute the map. Must be bounded, either
+            by X and Y limits or by a maximum radius `r`.
+        obstacles : list
+            list of bvp.Object instances (static obstacles in the background)
+        resolution : scalar
+            width of grid cells, in Blender units
+        """
+        ox, oy, oz = constraint.origin
+        if constraint.Z and constraint.Z[2] is not None:
+            z = constraint.Z[2]
+        else:
+            z = oz
+        # Grid extent: X, Y limits if present, otherwise maximum radius
+        limits = []
+        for dim, o in zip(['X', 'Y'], [ox, oy]):
+            value = getattr(constraint, dim)
+            if value and (value[2] is not None) and (value[3] is not None):
+                limits.append((value[2], value[3]))
+            elif constraint.r and (constraint.r[3] is not None):
+                limits.append((o - constraint.r[3], o + constraint.r[3]))
+            else:
+                raise ValueError('Cannot compute feasibility map for unbounded constraint (%s)'%dim)
+        (x_min, x_max), (y_min, y_max) = limits
+        n_x = max(int(np.ceil((x_max - x_min) / resolution)), 1)
+        n_y = max(int(np.ceil((y_max - y_min) / resolution)), 1)
+        x = x_min + (np.arange(n_x) + 0.5) * resolution
+        y = y_min + (np.arange(n_y) + 0.5) * resolution
+        xx, yy = np.meshgrid(x, y, indexing='ij')
+        # Stand-in for infinite clearance (json-safe)
+        far = float(np.hypot(x_max - x_min, y_max - y_min))
+        # (1) Distance to constraint limits (same limits as in checkXYZS_3D)
+        bound_clearance = np.full(xx.shape, far)
+        for dim, pos in zip(['X', 'Y'], [xx, yy]):
+            value = getattr(constraint, dim)
+            if value:
+                if value[2] is not None:
+                    bound_clearance = np.minimum(bound_clearance, pos - value[2])
+                if value[3] is not None:
+                    bound_clearance = np.minimum(bound_clearance, value[3] - pos)
+        if constraint.r:
+            r = np.sqrt((xx - ox)**2 + (yy - oy)**2 + (z - oz)**2)
+            if constraint.r[2] is not None:
+                bound_clearance = np.minimum(bound_clearance, r - constraint.r[2])
+            if constraint.r[3] is not None:
+                bound_clearance = np.minimum(bound_clearance, constraint.r[3] - r)
+        if (not constraint.X) and constraint.theta:
+            # Spherical constraints; theta is only used if X, Y are absent (see sampleXYZ)
+            theta_min, theta_max = constraint.theta[2:]
+            if (theta_min is not None) and (theta_max is not None) and (theta_max - theta_min < 360):
+                theta_offset = 270.
+                theta = bvpu.math.circ_dist(np.degrees(np.arctan2(yy - oy, xx - ox)) - theta_offset, 0.)
+                in_range = np.mod(theta - theta_min, 360.) <= (theta_max - theta_min)
+                bound_clearance[~in_range] = -far
+        # (2) Distance to static obstacles (same boxes as in Object.collides_with)
+        obstacle_clearance = np.full(xx.shape, far)
+        if obstacles:
+            obstacle_clearance = np.minimum(obstacle_clearance, _box_clearance(xx, yy, obstacles))
+        return cls(x_min=x_min, y_min=y_min, resolution=resolution, z=z,
+                   bound_clearance=bound_clearance, obstacle_clearance=obstacle_clearance)
+
+    def feasible(self, bound_extent=0., obstacle_extent=0., obstacles=None):
+        """Boolean (n_x, n_y) mask of cells in which an object can be placed
+
+        Parameters
+        ----------
+        bound_extent : scalar
+            horizontal distance the object extends from its position (toward
+            constraint limits)
+        obstacle_extent : scalar
+            horizontal half-width of the object's bounding box (toward obstacles)
+        obstacles : list
+            additional bvp.Objects to avoid (e.g. objects already placed in a scene)
+        """
+        # Samples are jittered within cells; keep clear by the cell half-diagonal
+        margin = self.resolution / np.sqrt(2)
+        ok = ((self.bound_clearance >= bound_extent + margin) &
+              (self.obstacle_clearance >= obstacle_extent + margin))
+        if obstacles:
+            xx, yy = np.meshgrid(self.x_centers, self.y_centers, indexing='ij')
+            ok &= _box_clearance(xx, yy, obstacles) >= obstacle_extent + margin
+        return ok
+
+    def sample(self, bound_extent=0., obstacle_extent=0., obstacles=None):
+        """Draw a random (x, y, z) position from the feasible cells of the map
+
+        Inputs are as for `feasible()`. Returns None if no cell is feasible.
+        """
+        idx = np.flatnonzero(self.feasible(bound_extent, obstacle_extent, obstacles))
+        if len(idx) == 0:
+            return None
+        ix, iy = np.unravel_index(np.random.choice(idx), self.shape)
+        x = self.x_min + (ix + np.random.rand()) * self.resolution
+        y = self.y_min + (iy + np.random.rand()) * self.resolution
+        return [float(x), float(y), self.z]
+
+    def to_dict(self):
+        """Dictionary representation (for storage in background metadata)"""
+        return dict(x_min=self.x_min, y_min=self.y_min, resolution=self.resolution, z=self.z,
+                    bound_clearance=np.round(self.bound_clearance, 3).tolist(),
+                    obstacle_clearance=np.round(self.obstacle_clearance, 3).tolist())
+
+
+def _box_clearance(xx, yy, obstacles):
+    """Chessboard distance from grid points to the nearest bounding box in `obstacles`"""
+    clearance = np.full(xx.shape, np.inf)
+    for obst in obstacles:
+        cx, cy, _ = obst.bounding_box_center
+        dx, dy, _ = obst.bounding_box_dimensions
+        d = np.maximum(np.abs(xx - cx) - dx / 2., np.abs(yy - cy) - dy / 2.)
+        clearance = np.minimum(clearance, d)
+    return clearance
+
+
+class ProjectionCache(object):
+    """Per-camera cache of image projections, for 2D checks on object placement"""
+    def __init__(self, camera, n_samples=5, image_size=(100., 100.)):
+        """Precompute camera matrices for a fixed camera, and cache projected obstacles
+
+        While objects are placed in a scene (see `Scene.populate`), the camera
+        and the objects already placed do not change. This class computes the
+        camera location, fixation and camera matrix once for each of
+        `n_samples` frames spanning the camera's keyframes, and projects each
+        obstacle only once. Each candidate object is then checked against all
+        frames and all obstacles at once.
+
+        Parameters
+        ----------
+        camera : bvp.Camera
+            camera for the scene
+        n_samples : int | None
+            number of frames (evenly spaced between first and last camera
+            keyframes) at which to check projections. Object trajectories
+            (per-frame bounding box tracks, see `Object.get_bbox_track()`) are
+            evaluated at the same frames, counting from the first camera 
+            keyframe. If None, every frame is checked.
+        image_size : tuple
+            (x, y) size of image in which to compute projections. Default is
+            (100, 100), i.e. percent of image (as in ObConstraint.checkXYZS_2D)
+        """
+        self.camera = camera
+        self.image_size = tuple(image_size)
+        if n_samples is None:
+            n_samples = int(camera.frames[-1] - camera.frames[0]) + 1
+        frames = np.linspace(camera.frames[0], camera.frames[-1], n_samples)
+        self.camera_location, self.fix_location, self.camera_matrix = camera.framewise(frames)
+        self.frames = frames
+        self.n_samples = n_samples
+        self._obstacles = {}
+
+    def project(self, obj):
+        """Project 2D bounding boxes of `obj` for all sampled frames
+
+        Returns
+        -------
+        box : array
+            (n_samples, 4) array of (left, top, right, bottom) image coordinates
+            of the box. nan for frames in which the object is behind the camera.
+        """
+        return self.project_many([obj])[0]
+
+    def project_many(self, objects):
+        """Project 2D bounding boxes of all `objects` for all sampled frames at once
+
+        Returns
+        -------
+        box : array
+            (n_objects, n_samples, 4) array (see `project()`)
+        """
+        view = GeometryView(objects, frames=self.frames - self.camera.frames[0])
+        # Bottom middle of bounding box at each frame (as in Object.xyz_trajectory)
+        pos = view.xyz_trajectory
+        sz = np.array([float(ob.size3D) for ob in objects]).reshape(-1, 1, 1)
+        # Bottom, top, left & right (wrt camera) edges of objects
+        right = self.camera_matrix[None, :, 0, :]
+        up = np.zeros_like(pos)
+        up[..., 2:] = sz
+        pts = np.stack([pos, pos + up, pos - right * sz / 2., pos + right * sz / 2.], axis=2)
+        # (n_objects, n_samples, 4, 3) -> (n_samples, n_objects * 4, 3)
+        n = len(objects)
+        pts = pts.transpose(1, 0, 2, 3).reshape(self.n_samples, n * 4, 3)
+        im = bvpu.math.perspective_projection_array(pts, self.camera_location, self.camera_matrix,
+                                                    camera_lens=self.camera.lens, image_size=self.image_size)
+        im = im.reshape(self.n_samples, n, 4, 2).transpose(1, 0, 2, 3)
+        return np.stack([im[..., 2, 0], im[..., 1, 1], im[..., 3, 0], im[..., 0, 1]], axis=-1)
+
+    @staticmethod
+    def box_center_size(box):
+        """(..., 2) box centers and (...) box sizes (mean of width & height) for (..., 4) boxes"""
+        center = np.stack([(box[..., 0] + box[..., 2]) / 2., (box[..., 1] + box[..., 3]) / 2.], axis=-1)
+        size = (np.abs(box[..., 2] - box[..., 0]) + np.abs(box[..., 3] - box[..., 1])) / 2.
+        return center, size
+
+    def project_obstacles(self, obstacles):
+        """Projected boxes for a list of obstacles, cached per obstacle
+
+        Returns
+        -------
+        box : array
+            (n_obstacles, n_samples, 4) array (see `project()`)
+        """
+        # Key on position and size as well, in case obstacles are modified in place
+        keys = [(id(obst), tuple(np.ravel(obst.pos3D)), obst.size3D) for obst in obstacles]
+        new = [(key, obst) for key, obst in zip(keys, obstacles) if key not in self._obstacles]
+        if len(new) > 0:
+            boxes = self.project_many([obst for key, obst in new])
+            for (key, obst), box in zip(new, boxes):
+                self._obstacles[key] = box
+        return np.array([self._obstacles[key] for key in keys]).reshape(-1, self.n_samples, 4)
+
+    def check(self, obj, obstacles=None, edge_dist=0., object_overlap=50.):
+        """Check a candidate object against image edges and obstacles in all sampled frames
+
+        See ObConstraint.checkXYZS_2D for inputs and outputs.
+        """
+        box = self.project(obj)
+        left, top, right, bot = box.T
+        x_sz, y_sz = self.image_size
+        # (1) Check distance from screen edges (nan, i.e. behind camera, fails)
+        with np.errstate(invalid='ignore'):
+            edge_ok = np.all((edge_dist < top) & (y_sz - edge_dist > bot) &
+                             (edge_dist < left) & (x_sz - edge_dist > right))
+        # (2) Check distance from other objects in 2D
+        if not obstacles:
+            return bool(edge_ok), []
+        center, size = self.box_center_size(box)
+        obst_center, obst_size = self.box_center_size(self.project_obstacles(obstacles))
+        dist = np.linalg.norm(obst_center - center[None], axis=-1)
+        # Note: this is an approximation! But we're ok for now (2012.10.08) with overlap being a rough measure
+        threshold = (obst_size / 2. + size / 2.) - np.minimum(size, obst_size) * object_overlap
+        with np.errstate(invalid='ignore'):
+            # Obstacles behind the camera (nan) can't overlap
+            ob_dist_ok = (dist > threshold) | np.isnan(dist)
+        return bool(edge_ok), [bool(x) for x in np.all(ob_dist_ok, axis=1)]
+
+
 class ObConstraint(PosConstraint):
     """Constraints on objects, specifically"""
     def __init__(self, X=None, Y=None, Z=None, 
                 theta=(None, None, 0., 360.), phi=(0., 0., 0., 0.), r=(0., 5., -25., 25.), 
-                origin=(0., 0., 0.), sz=(6., 1., 3., 10.), Zrot=(None, None, -180., 180.)):
+                origin=(0., 0., 0.), sz=(6., 1., 3., 10.), Zrot=(None, None, -180., 180.),
+                feasibility_map=None):
         """Class to store 3D position constraints for objects
 
         All inputs (X, Y, ...) are 4-element lists: [Mean, Std, Min, Max]
@@ -121,6 +425,11 @@ class ObConstraint(PosConstraint):
         "obstacles" is a list of Objects (with a size and position) that 
         are to be avoided in positioning objects
 
+        `feasibility_map` is an (optional) FeasibilityMap or dict representation
+        of one, precomputed with compute_feasibility_map(). If present, object
+        positions are only drawn from cells of the map that satisfy the
+        constraints.
+
         ML 2012.10
         """
         self.type = 'ObConstraint'
@@ -130,7 +439,37 @@ class ObConstraint(PosConstraint):
         for i in inpt.keys():
             if not i=='self':
                 setattr(self, i, inpt[i])
-    
+        if isinstance(feasibility_map, dict):
+            self.feasibility_map = FeasibilityMap(**feasibility_map)
+
+    def compute_feasibility_map(self, obstacles=None, resolution=0.25):
+        """Precompute the map of floor positions that satisfy this constraint
+
+        Parameters
+        ----------
+        obstacles : list
+            list of static bvp.Object instances (background obstacles) to avoid
+        resolution : scalar
+            width of grid cells in Blender units
+
+        Returns
+        -------
+        feasibility_map : FeasibilityMap
+            also set as `self.feasibility_map`
+        """
+        self.feasibility_map = FeasibilityMap.from_constraint(self, obstacles=obstacles, resolution=resolution)
+        return self.feasibility_map
+
+    def _sample_feasible_position(self, obj, size3D, obstacles=None):
+        """Draw a position for `obj` (at size `size3D`) from self.feasibility_map"""
+        # Horizontal extent of the object (incl. its action) around its position
+        tmp_ob = Placement.from_object(obj)
+        tmp_ob.pos3D, tmp_ob.size3D = (0., 0., 0.), size3D
+        offsets = np.abs(np.array([tmp_ob.min_xyz_pos, tmp_ob.max_xyz_pos]))[:, :2]
+        bound_extent = offsets.max()
+        obstacle_extent = max(tmp_ob.bounding_box_dimensions[:2]) / 2.
+        return self.feasibility_map.sample(bound_extent, obstacle_extent, obstacles=obstacles)
+
     def checkXYZS_3D(self, obj, obstacles=None, check_bounds=True):
         """Verify that a particular position and size is acceptable given 
         `obstacles` and the position constraints of this object (in 3-D). 
@@ -186,12 +525,14 @@ class ObConstraint(PosConstraint):
         else:
             n_obj = 0
         ob_dist_ok_3d = [True] * n_obj
-        for c in range(n_obj):
-            # print(obstacles[c])
-            ob_dist_ok_3d[c] = not obj.collides_with(obstacles[c])
+        if n_obj > 0:
+            # Same test as obj.collides_with(obstacle, swept=True), for all obstacles at once:
+            # moving objects may cross paths, as long as they are not in the same place at once
+            collides = GeometryView([obj]).swept_collisions(obstacles)[0]
+            ob_dist_ok_3d = (~collides).tolist()
         return bg_bound_ok_3d, ob_dist_ok_3d
 
-    def checkXYZS_2D(self, obj, camera, obstacles=None, edge_dist=0., object_overlap=50.):
+    def checkXYZS_2D(self, obj, camera, obstacles=None, edge_dist=0., object_overlap=50., projection_cache=None):
         """
         Verify that a particular position and size is acceptable given "obstacles" obstacles and 
         the position constraints of this object (in 2D images space). 
@@ -202,77 +543,29 @@ class ObConstraint(PosConstraint):
             obstacles = list of "Object" instances to specify positions of obstacles to avoid
             edge_dist = proportion of object that can go outside of the 2D image (0.-100.)
             object_overlap = proportion of object that can overlap with other objects (0.-100.)
+            projection_cache = ProjectionCache for `camera` (re-used across candidates; 
+                created if not provided)
         Returns:
             ImBoundOK = boolean; True if 2D projection of XYZpos is less than (edge_dist) outside of image boundary 
             ObDistOK = boolean; True if 2D projection of XYZpos overlaps less than (object_overlap) with other objects/obstacles 
         """
         # (TODO: Make flexible for edge_dist, object_overlap being 0-1 or 0-100?)
-        #TODO: Currently only looks at object one_wall_distances in the first frame. It is computationally hard, and possibly unnecessary to check it for every frame.
-        edge_ok_list = []
-        obdst_ok_list = []
-        ob_positions = obj.xyz_trajectory
-        num_frames = len(ob_positions)
-        cam_frames_idx = np.floor(np.linspace(0, camera.frames[-1], num_frames, endpoint = True)).astype(np.int) #select 5 equally spaced camera frames
-        cam_fix_location = list(np.array([np.linspace(camera.fix_location[0][i], camera.fix_location[-1][i],camera.frames[-1]) for i in range(3)]).T) #interpolate cam fixation location for those frames
-        cam_location = list(np.array([np.linspace(camera.location[0][i], camera.location[-1][i], camera.frames[-1]) for i in range(3)]).T) #same for camera position
-               
-        for frame_num in range(num_frames):
-            object_pos = ob_positions[frame_num]
-            tmp_ob = Object(pos3D=object_pos, size3D=obj.size3D)
-            tmp_ip_top, tmp_ip_bot, tmp_ip_L, tmp_ip_r = bvpu.math.perspective_projection(object_pos, 
-                            cam_location[frame_num],
-                            cam_fix_location[frame_num], 
-                            camera_lens=camera.lens,
-                            image_size=(100, 100),)
-            TmpObSz_X = abs(tmp_ip_r[0]-tmp_ip_L[0])
-            TmpObSz_Y = abs(tmp_ip_bot[1]-tmp_ip_top[1])
-            Tmpimage_position = [np.mean([tmp_ip_r[0], tmp_ip_L[0]]), np.mean([tmp_ip_bot[1], tmp_ip_top[1]])]
-            ### --- (1) Check distance from screen edges --- ###
-            top_OK = edge_dist < tmp_ip_top[1]
-            Bot_OK = 100-edge_dist > tmp_ip_bot[1]
-            L_OK = edge_dist < tmp_ip_L[0]
-            R_OK = 100-edge_dist > tmp_ip_r[0]
-            edge_ok_2d = all([top_OK, Bot_OK, L_OK, R_OK])
-            ### --- (2) Check distance from other objects in 2D --- ###
-            if obstacles:
-                n_obj = len(obstacles)
-            else:
-                n_obj = 0
-            obstPos2D_List = []
-            Dist_List = []
-            Dthresh_List = []
-            ObstSz_List = []
-            ob_dist_ok_2d = [True for x in range(n_obj)]
-            for c in range(n_obj):
-                # Get position of obstacle
-                obstIP_top, obstIP_Bot, obstIP_L, obstIP_r = bvpu.math.perspective_projection(obstacles[c], camera, image_size=(1., 1.))
-                obstSz_X = abs(obstIP_r[0]-obstIP_L[0])
-                obstSz_Y = abs(obstIP_Bot[1]-obstIP_top[1])
-                obstPos2D = [np.mean([obstIP_r[0], obstIP_L[0]]), np.mean([obstIP_Bot[1], obstIP_top[1]])]
-                ObstSz2D = np.mean([obstSz_X, obstSz_Y])
-                ObjSz2D = np.mean([TmpObSz_X, TmpObSz_Y])
-                # Note: this is an approximation! But we're ok for now (2012.10.08) with overlap being a rough measure
-                PixDstThresh = (ObstSz2D/2. + ObjSz2D/2.) - (min([ObjSz2D, ObstSz2D]) * object_overlap)
-                ob_dist_ok_2d[c] = bvpu.math.vecDist(Tmpimage_position, obstPos2D) > PixDstThresh
-                # For debugging
-                obstPos2D_List.append(obstPos2D) 
-                Dist_List.append(bvpu.math.vecDist(Tmpimage_position, obstPos2D))
-                Dthresh_List.append(PixDstThresh)
-                ObstSz_List.append(ObstSz2D)
-            edge_ok_list.append(edge_ok_2d)
-            obdst_ok_list.append(ob_dist_ok_2d)
-        return all(edge_ok_list), [all([obdst_ok[i] for obdst_ok in obdst_ok_list]) for i in range(len(obdst_ok_list[0]))]
-
-    def check_size_2d(self, Obj, camera, min_size_2d):
+        if (projection_cache is None) or (projection_cache.camera is not camera):
+            projection_cache = ProjectionCache(camera)
+        return projection_cache.check(obj, obstacles=obstacles, edge_dist=edge_dist, 
+                                      object_overlap=object_overlap)
+
+    def check_size_2d(self, Obj, camera, min_size_2d, projection_cache=None):
         """Check whether (projected) 2D size of objects meets a minimum size criterion         
         """
-        tmp_ip_top, tmp_ip_bot, tmp_ip_L, tmp_ip_r = bvpu.math.perspective_projection(Obj, camera, image_size=(1., 1.))
-        TmpObSz_X = abs(tmp_ip_r[0]-tmp_ip_L[0])
-        TmpObSz_Y = abs(tmp_ip_bot[1]-tmp_ip_top[1])
-        SzOK_2D = sum([TmpObSz_X, TmpObSz_Y])/2. > min_size_2d
+        if (projection_cache is None) or (projection_cache.camera is not camera):
+            projection_cache = ProjectionCache(camera)
+        # First frame only, as a proportion of the image
+        _, size_2d = projection_cache.box_center_size(projection_cache.project(Obj))
+        SzOK_2D = size_2d[0] / np.mean(projection_cache.image_size) > min_size_2d
         return SzOK_2D
 
-    def sampleXYZ(self, obj, camera, obstacles=None, edge_dist=0., object_overlap=50., raise_error=False, n_iter=100, min_size_2d=0.):
+    def sampleXYZ(self, obj, camera, obstacles=None, edge_dist=0., object_overlap=50., raise_error=False, n_iter=100, min_size_2d=0., projection_cache=None):
         """Randomly sample object positions across the 3D space of a scene
 
         ... given constraints (in 3D) on that scene and the position of a camera.
@@ -301,6 +594,8 @@ class ObConstraint(PosConstraint):
         n_iter = number of attempts to make at finding a scene arrangement
             that works with constraints.
         min_size_2d = minimum size of an object in 2D, given as proportion of screen (0-1)
+        projection_cache = ProjectionCache for `camera`; pass the same cache for all
+            objects placed with the same camera to avoid re-projecting obstacles.
         
         Returns
         ------- 
@@ -332,6 +627,8 @@ class ObConstraint(PosConstraint):
         #TODO: May be broken as of 2016/09/27 
         """
         #Compute
+        if (projection_cache is None) or (projection_cache.camera is not camera):
+            projection_cache = ProjectionCache(camera)
         Sz = obj.size3D
         XYZpos = obj.pos3D
         TooClose = True
@@ -343,31 +640,43 @@ class ObConstraint(PosConstraint):
         while TooClose and Iter<n_iter:
             if verbosity_level > 9:
                 print("--------- Iteration %d ---------"%Iter)
-            # Draw random position to start:
-            c = copy.copy
-            kws = dict((k, getattr(self, k).copy()) for k in ['X', 'Y', 'Z', 'r', 'theta', 'phi'])
-            tmpC = PosConstraint(**kws)
-            # change x, y position (and/or radius) limits to reflect the size of the object 
-            # (can't come closer to limit than Sz/2)
-            ToLimit = ['X', 'Y', 'r']
-            for pNm in ToLimit:
-                value = getattr(tmpC, pNm)
-                if value: # (?) if any(value): (?)
-                    if value[2]:
-                        value[2]+=Sz/2. # increase min by Sz/2
-                    if value[3]:
-                        value[3]-=Sz/2. # decrease max by Sz/2
-                print(pNm + '='+ str(value))
-                setattr(tmpC, pNm, value)
-            tmp_pos = tmpC.sampleXYZ()
-            bound_ok_3d, ob_dist_ok_3d = self.checkXYZS_3D(obj, obstacles=obstacles)
-            edge_ok_2d, ob_dist_ok_2d = self.checkXYZS_2D(obj, camera, obstacles=obstacles, edge_dist=edge_dist, object_overlap=object_overlap)
-            SzOK_2D = self.check_size_2d(obj, camera, min_size_2d)
+            if self.feasibility_map is not None:
+                # Draw position from precomputed feasible floor cells
+                tmp_pos = self._sample_feasible_position(obj, Sz, obstacles=obstacles)
+                if tmp_pos is None:
+                    Iter = n_iter
+                    break
+            else:
+                # Draw random position to start:
+                c = copy.copy
+                kws = dict((k, getattr(self, k).copy()) for k in ['X', 'Y', 'Z', 'r', 'theta', 'phi'])
+                tmpC = PosConstraint(**kws)
+                # change x, y position (and/or radius) limits to reflect the size of the object 
+                # (can't come closer to limit than Sz/2)
+                ToLimit = ['X', 'Y', 'r']
+                for pNm in ToLimit:
+                    value = getattr(tmpC, pNm)
+                    if value: # (?) if any(value): (?)
+                        if value[2]:
+                            value[2]+=Sz/2. # increase min by Sz/2
+                        if value[3]:
+                            value[3]-=Sz/2. # decrease max by Sz/2
+                    print(pNm + '='+ str(value))
+                    setattr(tmpC, pNm, value)
+                tmp_pos = tmpC.sampleXYZ()
+            # Light-weight record (not a full Object) at the sampled position for checks
+            tmp_ob = Placement.from_object(obj)
+            tmp_ob.pos3D, tmp_ob.size3D = tmp_pos, Sz
+            bound_ok_3d, ob_dist_ok_3d = self.checkXYZS_3D(tmp_ob, obstacles=obstacles)
+            edge_ok_2d, ob_dist_ok_2d = self.checkXYZS_2D(tmp_ob, camera, obstacles=obstacles, edge_dist=edge_dist, object_overlap=object_overlap, projection_cache=projection_cache)
+            SzOK_2D = self.check_size_2d(tmp_ob, camera, min_size_2d, projection_cache=projection_cache)
             if all(ob_dist_ok_3d) and all(ob_dist_ok_2d) and all(bound_ok_3d) and edge_ok_2d:
                 TooClose = False
-                tmp_ob = obj
-                tmp_ip_top, tmp_ip_bot, tmp_ip_L, tmp_ip_r = bvpu.math.perspective_projection(tmp_ob, camera, image_size=(1., 1.))
-                image_position = [np.mean([tmp_ip_r[0], tmp_ip_L[0]]), np.mean([tmp_ip_bot[1], tmp_ip_top[1]])]
+                # Image position of the sampled location (as in sampleXY)
+                image_position = bvpu.math.perspective_projection(tmp_pos,
+                                                                  camera.location[0],
+                                                                  camera.fix_location[0],
+                                                                  camera_lens=camera.lens)
                 return tmp_pos, image_position
             else:
                 if verbosity_level > 9:
@@ -394,7 +703,8 @@ class ObConstraint(PosConstraint):
                 raise Exception('Iterated %d x without finding good position!'%n_iter)
             else: 
                 return None, None
-    def sampleXY(self, obj, camera, obstacles=None, image_position_count=None, edge_dist=0., object_overlap=.50, raise_error=False, n_iter=100, min_size_2d=0.):
+    @bvpu.instrument.timed('ObConstraint.sampleXY')
+    def sampleXY(self, obj, camera, obstacles=None, image_position_count=None, edge_dist=0., object_overlap=.50, raise_error=False, n_iter=100, min_size_2d=0., projection_cache=None):
         """
         Usage: sampleXY(Sz, camera, obstacles=None, image_position_count=None, edge_dist=0., object_overlap=.50, raise_error=False, n_iter=100, min_size_2d=0.)
 
@@ -424,16 +734,24 @@ class ObConstraint(PosConstraint):
             instead of a position. 
         n_iter = number of attempts to make at finding a scene arrangement
             that works with constraints.
+        projection_cache = ProjectionCache for `camera`; pass the same cache for all
+            objects placed with the same camera to avoid re-projecting obstacles.
 
         Outputs: 
         Position (x, y, z), ImagePosition (x, y)
 
         NOTE: This is currently (2012.08) the preferred method for sampling
         object positions in a scene. See notes in sampleXYZ for more.
+
+        If this constraint has a `feasibility_map`, positions are drawn from 
+        the feasible cells of the map instead of from image positions (and 
+        `image_position_count` is ignored); the 2D checks still apply.
         
         ML 2012.02
         """
         #Compute
+        if (projection_cache is None) or (projection_cache.camera is not camera):
+            projection_cache = ProjectionCache(camera)
         if not image_position_count:
             image_position_count = bvpu.math.image_positionCount(0, 0, image_size=1., n_bins=5, e=1)
         TooClose = True
@@ -449,29 +767,50 @@ class ObConstraint(PosConstraint):
             #Zbase = self.sampleXYZ(Sz, camera)[2]
             Zbase = self.origin[2]
             Sz = obj.size3D
-            # Draw random (x, y) image position to start:
-            image_position = image_position_count.sampleXY() 
-            oPosZ = bvpu.math.perspective_projection_inv(image_position, 
-                                                         camera.location[0], 
-                                                         camera.fix_location[0],
-                                                         Z=100,
-                                                         camera_fov=None,
-                                                         camera_lens=camera.lens,)
-            oPosUp = bvpu.math.line_plane_intersection(camera.location[0], oPosZ, P0=(0, 0, Zbase+Sz/2.))
-            tmp_pos = oPosUp
-            tmp_pos[2] -= Sz/2.
-            tmp_ob = Object(pos3D=tmp_pos, size3D=Sz, action = obj.action)
+            if self.feasibility_map is not None:
+                # Draw position from precomputed feasible floor cells
+                tmp_pos = self._sample_feasible_position(obj, Sz, obstacles=obstacles)
+                if tmp_pos is None:
+                    # No feasible cells for this object; further iterations won't help
+                    bvpu.instrument.histogram('ObConstraint.sampleXY.rejections', 'no_feasible_cells')
+                    Iter = n_iter
+                    break
+                image_position = bvpu.math.perspective_projection(tmp_pos,
+                                                                  camera.location[0],
+                                                                  camera.fix_location[0],
+                                                                  camera_lens=camera.lens)
+            else:
+                # Draw random (x, y) image position to start:
+                image_position = image_position_count.sampleXY()
+                oPosZ = bvpu.math.perspective_projection_inv(image_position,
+                                                             camera.location[0],
+                                                             camera.fix_location[0],
+                                                             Z=100,
+                                                             camera_fov=None,
+                                                             camera_lens=camera.lens,)
+                oPosUp = bvpu.math.line_plane_intersection(camera.location[0], oPosZ, P0=(0, 0, Zbase+Sz/2.))
+                tmp_pos = oPosUp
+                tmp_pos[2] -= Sz/2.
+            # Light-weight record (not a full Object) for checks
+            tmp_ob = Placement.from_object(obj)
+            tmp_ob.pos3D, tmp_ob.size3D = tmp_pos, Sz
             # Check on 3D bounds
             bound_ok_3d, ob_dist_ok_3d = self.checkXYZS_3D(tmp_ob, obstacles=obstacles)
            # bound_ok_3d = [True for i in bound_ok_3d] #Adding these for debugging purposes. Make sure to remove later
             # Check on 2D bounds
             #TODO Insert loop here that checks tmpOb cam compatibility at different points
-            edge_ok_2d, ob_dist_ok_2d = self.checkXYZS_2D(tmp_ob, camera, obstacles=obstacles, edge_dist=edge_dist, object_overlap=object_overlap)
+            edge_ok_2d, ob_dist_ok_2d = self.checkXYZS_2D(tmp_ob, camera, obstacles=obstacles, edge_dist=edge_dist, object_overlap=object_overlap, projection_cache=projection_cache)
             # Instantiate temp object and...
             # ... check on 2D size
 
-            SzOK_2D = self.check_size_2d(tmp_ob, camera, min_size_2d)
-
+            SzOK_2D = self.check_size_2d(tmp_ob, camera, min_size_2d, projection_cache=projection_cache)
+            bvpu.instrument.count('ObConstraint.sampleXY.iterations')
+            if bvpu.instrument.enabled:
+                checks = [('bounds_3d', all(bound_ok_3d)), ('collision_3d', all(ob_dist_ok_3d)), 
+                          ('overlap_2d', all(ob_dist_ok_2d)), ('edge_2d', edge_ok_2d), ('size_2d', SzOK_2D)]
+                for reason, ok in checks:
+                    if not ok:
+                        bvpu.instrument.histogram('ObConstraint.sampleXY.rejections', reason)
             if all(ob_dist_ok_3d) and all(ob_dist_ok_2d) and edge_ok_2d and all(bound_ok_3d) and SzOK_2D:
                 TooClose = False
                 tmp_pos = bvpu.basics.make_blender_safe(tmp_pos, 'float')
@@ -507,6 +846,7 @@ class ObConstraint(PosConstraint):
             if raise_error:
                 raise Exception('MaxAttemptReached', 'Iterated %d x without finding good position!'%n_iter)
             else:
+                bvpu.instrument.count('ObConstraint.sampleXY.failures')
                 if verbosity_level > 3:
                     print('Warning! Iterated %d x without finding good position!'%n_iter)
                 else:
@@ -541,6 +881,201 @@ class ObConstraint(PosConstraint):
         return (0, 0, zRot)
 
 
+def _bound(value, i, default):
+    """Min (i=2) or max (i=3) of a [Mean, Std, Min, Max] constraint (`default` if unconstrained)"""
+    if not value or value[i] is None:
+        return default
+    return float(value[i])
+
+
+def action_compatibility(min_xyz, max_xyz, object_constraints):
+    """Check which actions fit within which object constraints
+
+    Vectorized over actions and constraints. An action is compatible with a
+    constraint if its bounding box (scaled for the smallest object size allowed
+    by the constraint) fits within the X, Y, Z and r limits of the constraint,
+    and if the bounding box contains the action's origin (see 
+    `Scene.check_compatibility`).
+
+    Parameters
+    ----------
+    min_xyz : array-like
+        (n_actions, 3) minimum (x, y, z) bounds of actions (Action.min_xyz)
+    max_xyz : array-like
+        (n_actions, 3) maximum (x, y, z) bounds of actions (Action.max_xyz)
+    object_constraints : list
+        list of ObConstraints (or dicts of ObConstraint inputs, as stored in 
+        Background.object_constraints)
+
+    Returns
+    -------
+    compatible : array
+        (n_actions, n_constraints) boolean array
+    """
+    min_xyz = np.atleast_2d(np.asarray(min_xyz, dtype=float))
+    max_xyz = np.atleast_2d(np.asarray(max_xyz, dtype=float))
+    object_constraints = [ObConstraint(**c) if isinstance(c, dict) else c for c in object_constraints]
+    inf = np.inf
+    # Constraint bounds: (n_constraints, ) arrays
+    size = np.array([min(c.sz[2], c.sz[3]) for c in object_constraints], dtype=float)
+    max_size = np.array([c.sz[3] for c in object_constraints], dtype=float)
+    x_range = np.array([_bound(c.X, 3, inf) - _bound(c.X, 2, -inf) for c in object_constraints])
+    y_range = np.array([_bound(c.Y, 3, inf) - _bound(c.Y, 2, -inf) for c in object_constraints])
+    z_range = np.array([_bound(c.Z, 3, inf) - _bound(c.Z, 2, -inf) for c in object_constraints])
+    # Constant Z constraint (e.g. floor): check against max object size instead
+    z_fixed = np.array([bool(c.Z) and (c.Z[2] is not None) and (c.Z[2] == c.Z[3]) for c in object_constraints])
+    z_range = np.where(z_fixed, max_size - size, z_range)
+    max_r = np.array([2 * _bound(c.r, 3, inf) for c in object_constraints])
+    # Extent of (scaled) actions: (n_actions, n_constraints, 3)
+    extent = (max_xyz - min_xyz)[:, None, :] * (size / 10.)[None, :, None]
+    with np.errstate(invalid='ignore'):
+        ok = ((extent[..., 0] < x_range) & (extent[..., 1] < y_range) & (extent[..., 2] < z_range) & 
+              (np.linalg.norm(extent, axis=-1) <= max_r))
+    contains_origin = np.all((max_xyz >= 0) & (min_xyz <= 0), axis=1)
+    return ok & contains_origin[:, None]
+
+
+def compatibility_matrix(min_xyz, max_xyz, backgrounds):
+    """Action x background compatibility matrix
+
+    Parameters
+    ----------
+    min_xyz, max_xyz : array-like
+        (n_actions, 3) action bounds (see `action_compatibility`)
+    backgrounds : list
+        list of Backgrounds, or of `object_constraints` (a dict or list of dicts) 
+        for each background
+
+    Returns
+    -------
+    compatible : array
+        (n_actions, n_backgrounds) boolean array; True if the action fits within 
+        any of the object constraints for the background
+    """
+    constraints, bg_index = [], []
+    for i, bg in enumerate(backgrounds):
+        oc = getattr(bg, 'object_constraints', bg)
+        if oc is None:
+            oc = [ObConstraint()]
+        elif not isinstance(oc, (list, tuple)):
+            oc = [oc]
+        constraints.extend(oc)
+        bg_index.extend([i] * len(oc))
+    n_actions = len(np.atleast_2d(min_xyz))
+    compatible = np.zeros((n_actions, len(backgrounds)), dtype=bool)
+    if len(constraints) == 0:
+        return compatible
+    per_constraint = action_compatibility(min_xyz, max_xyz, constraints)
+    # Background is compatible if any of its constraints are
+    np.logical_or.at(compatible, (slice(None), np.array(bg_index)), per_constraint)
+    return compatible
+
+
+class CompatibilityIndex(object):
+    """Precomputed action x background compatibility matrix with fast lookups"""
+    def __init__(self, action_ids, background_ids, matrix, key=None):
+        """Index of which actions fit within which backgrounds
+
+        Parameters
+        ----------
+        action_ids : list
+            database `_id`s of actions (rows of `matrix`)
+        background_ids : list
+            database `_id`s of backgrounds (columns of `matrix`)
+        matrix : array
+            (n_actions, n_backgrounds) boolean array
+        key : str
+            revision key for actions & backgrounds (see `revision_key()`)
+        """
+        self.action_ids = list(action_ids)
+        self.background_ids = list(background_ids)
+        self.matrix = np.asarray(matrix, dtype=bool)
+        self.key = key
+        self._action_index = dict((_id, i) for i, _id in enumerate(self.action_ids))
+        self._background_index = dict((_id, i) for i, _id in enumerate(self.background_ids))
+
+    def __repr__(self):
+        return '<CompatibilityIndex: %d actions x %d backgrounds, %d compatible pairs>'%(
+            len(self.action_ids), len(self.background_ids), self.matrix.sum())
+
+    @staticmethod
+    def revision_key(actions, backgrounds):
+        """Key that changes whenever any action or background record is added, removed or changed"""
+        docs = [[getattr(r, 'doc', r) for r in records] for records in (actions, backgrounds)]
+        return json.dumps([[(d['_id'], d.get('_rev')) for d in records] for records in docs])
+
+    @classmethod
+    def from_records(cls, actions, backgrounds):
+        """Compute index from ElementMetadata records (or database documents) for actions & backgrounds"""
+        docs = [getattr(a, 'doc', a) for a in actions]
+        min_xyz = np.array([d['min_xyz'] for d in docs], dtype=float).reshape(-1, 3)
+        max_xyz = np.array([d['max_xyz'] for d in docs], dtype=float).reshape(-1, 3)
+        object_constraints = [getattr(b, 'doc', b).get('object_constraints') for b in backgrounds]
+        matrix = compatibility_matrix(min_xyz, max_xyz, object_constraints)
+        return cls([d['_id'] for d in docs], [getattr(b, 'doc', b)['_id'] for b in backgrounds], 
+                   matrix, key=cls.revision_key(actions, backgrounds))
+
+    def _id(self, element):
+        return element if isinstance(element, str) else element._id
+
+    def is_compatible(self, action, background):
+        """Whether `action` fits within `background` (elements or `_id`s)"""
+        return bool(self.matrix[self._action_index[self._id(action)], 
+                                self._background_index[self._id(background)]])
+
+    def compatible_backgrounds(self, action):
+        """`_id`s of all backgrounds compatible with `action` (element or `_id`)"""
+        row = self.matrix[self._action_index[self._id(action)]]
+        return [self.background_ids[i] for i in np.flatnonzero(row)]
+
+    def compatible_actions(self, background):
+        """`_id`s of all actions compatible with `background` (element or `_id`)"""
+        column = self.matrix[:, self._background_index[self._id(background)]]
+        return [self.action_ids[i] for i in np.flatnonzero(column)]
+
+    def compatible_pairs(self, actions=None, backgrounds=None):
+        """All compatible (action `_id`, background `_id`) pairs
+
+        Parameters
+        ----------
+        actions, backgrounds : list | None
+            actions / backgrounds (elements or `_id`s) to consider. Defaults
+            to all actions / backgrounds in the index.
+        """
+        ai = np.arange(len(self.action_ids)) if actions is None else \
+            np.array([self._action_index[self._id(a)] for a in actions], dtype=int)
+        bi = np.arange(len(self.background_ids)) if backgrounds is None else \
+            np.array([self._background_index[self._id(b)] for b in backgrounds], dtype=int)
+        rows, cols = np.nonzero(self.matrix[np.ix_(ai, bi)])
+        return [(self.action_ids[ai[r]], self.background_ids[bi[c]]) for r, c in zip(rows, cols)]
+
+    def sample_pairs(self, n, actions=None, backgrounds=None):
+        """Draw `n` (action `_id`, background `_id`) pairs (with replacement) from compatible pairs only
+
+        Use this to choose actions & backgrounds for scenes before calling
+        `Scene.populate()`, so no scene is built from an incompatible pair.
+        Arguments `actions` and `backgrounds` are as for `compatible_pairs()`.
+        """
+        pairs = self.compatible_pairs(actions=actions, backgrounds=backgrounds)
+        if len(pairs) == 0:
+            raise ValueError('No compatible action / background pairs to sample from!')
+        return [pairs[i] for i in np.random.randint(len(pairs), size=n)]
+
+    def save(self, fname):
+        """Save index to a .npz file"""
+        np.savez(fname, action_ids=np.array(self.action_ids), background_ids=np.array(self.background_ids), 
+                 matrix=self.matrix, key=np.array(self.key or ''))
+
+    @classmethod
+    def load(cls, fname, key=None):
+        """Load index from a .npz file; returns None if `key` is given and does not match the saved key"""
+        with np.load(fname, allow_pickle=False) as npz:
+            saved_key = str(npz['key']) or None
+            if (key is not None) and (saved_key != key):
+                return None
+            return cls(npz['action_ids'].tolist(), npz['background_ids'].tolist(), npz['matrix'], key=saved_key)
+
+
 class CamConstraint(PosConstraint):
     """Constraints to specify camera & fixation position"""
     def __init__(self, 
@@ -620,6 +1155,7 @@ class CamConstraint(PosConstraint):
             fix_location.append(Tmpfix_location)
         return fix_location
 
+    @bvpu.instrument.timed('CamConstraint.sample_camera_location')
     def sample_camera_location(self, frames=None, fps=15, n_attempts=1000, n_samples=500):
         """Sample a new camera position given constraints on position and movement
 
@@ -722,6 +1258,8 @@ class CamConstraint(PosConstraint):
                     # Keep one sampled position or loop again if no samples
                     if len(pPosSphCs) == 0:
                         # No positions satisfy constraints!
+                        bvpu.instrument.histogram('CamConstraint.sample_camera_location.rejections', 
+                                                  'no_position_at_frame_%d'%ifr)
                         break
                     else:
                         # Sample pPos (spherical coordinates for all possible new positions)    
@@ -730,11 +1268,223 @@ class CamConstraint(PosConstraint):
                 location.append(tmp_pos)
                 if fr==frames[-1]:
                     failed=False
+        bvpu.instrument.count('CamConstraint.sample_camera_location.attempts', ct)
         if failed:
-            raise Exception(['Could not find camera trajectory to match constraints!'])
+            raise CameraTrajectoryError('Could not find camera trajectory to match constraints!')
         else:
             return location
 
+    def check_camera_locations(self, locations, frames, fps=15, tolerance=1e-6):
+        """Check sampled camera trajectories against position & speed constraints
+
+        Vectorized over trajectories. Checks the constraints that 
+        `sample_camera_location()` enforces: X, Y, Z limits (if X is specified) 
+        or r, theta, phi limits, and the maximum (and minimum) distance between 
+        keyframes given the speed limits.
+
+        Parameters
+        ----------
+        locations : array-like
+            (n_trajectories, n_keyframes, 3) camera locations
+        frames : list
+            keyframes for each location (as passed to `sample_camera_location()`)
+        fps : scalar
+            frame rate
+        tolerance : scalar
+            tolerance for rounding error
+
+        Returns
+        -------
+        ok : array
+            (n_trajectories, ) boolean array
+        """
+        locations = np.asarray(locations, dtype=float).reshape(-1, len(frames), 3)
+        ok = np.ones(locations.shape[:2], dtype=bool)
+        def within(value, limits):
+            lo = -np.inf if limits[2] is None else limits[2] - tolerance
+            hi = np.inf if limits[3] is None else limits[3] + tolerance
+            return (value >= lo) & (value <= hi)
+        if self.X:
+            for i, limits in enumerate([self.X, self.Y, self.Z]):
+                if limits:
+                    ok &= within(locations[..., i], limits)
+        else:
+            theta_offset = 270.
+            r, theta, phi = bvpu.math.cart2sph(*(locations - np.asarray(self.origin)).transpose(2, 0, 1))
+            theta = bvpu.math.circ_dist(theta - theta_offset, 0.)
+            for value, limits in zip([r, phi], [self.r, self.phi]):
+                if limits:
+                    ok &= within(value, limits)
+            if self.theta:
+                # Theta range may wrap around +/-180 deg; compare modulo 360 (as in FeasibilityMap)
+                theta_min, theta_max = self.theta[2:]
+                if (theta_min is not None) and (theta_max is not None) and (theta_max - theta_min < 360):
+                    ok &= np.mod(theta - theta_min + tolerance, 360.) <= (theta_max - theta_min + 2 * tolerance)
+        ok = np.all(ok, axis=1)
+        if (self.speed is not None) and (len(frames) > 1):
+            step = np.linalg.norm(np.diff(locations[..., :2], axis=1), axis=-1)
+            dt = np.diff(np.asarray(frames, dtype=float)) / fps
+            ok &= np.all(within(step / np.maximum(dt, 1e-12), self.speed) | (dt == 0), axis=1)
+        return ok
+
+
+def _constraint_key(constraint):
+    """String that changes whenever any parameter of `constraint` changes"""
+    return json.dumps(vars(constraint), sort_keys=True, default=str)
+
+
+def _sample_camera_trajectories(args):
+    constraint, frames, fps, n_trajectories, n_attempts, n_samples, seed = args
+    random.seed(seed)
+    np.random.seed(seed)
+    trajectories = []
+    for _ in range(n_trajectories):
+        try:
+            trajectories.append(constraint.sample_camera_location(frames, fps=fps, n_attempts=n_attempts, 
+                                                                  n_samples=n_samples))
+        except CameraTrajectoryError:
+            # No trajectory found in `n_attempts` attempts; skip
+            continue
+    return trajectories
+
+
+class CameraTrajectoryPool(object):
+    """Pre-sampled, validated camera trajectories for one camera constraint (i.e. one background)
+
+    Sampling camera trajectories (`CamConstraint.sample_camera_location()`) can 
+    take hundreds of attempts for tight constraints. A pool is sampled once per 
+    background (and frame range), stored on disk, and then serves random 
+    trajectories for any number of scenes (see `Scene.populate()`).
+    """
+    def __init__(self, locations, frames, fps=15, key=None):
+        """
+        Parameters
+        ----------
+        locations : array-like
+            (n_trajectories, n_keyframes, 3) camera locations
+        frames : list
+            keyframes (as passed to `CamConstraint.sample_camera_location()`)
+        fps : scalar
+            frame rate for which trajectories were sampled
+        key : str
+            parameters of camera constraint used to sample trajectories (to check 
+            whether a saved pool is up to date)
+        """
+        self.frames = tuple(int(f) for f in frames)
+        self.locations = np.asarray(locations, dtype=np.float32).reshape(-1, len(self.frames), 3)
+        self.fps = fps
+        self.key = key
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __repr__(self):
+        return '<CameraTrajectoryPool: %d trajectories, frames=%s, fps=%s>'%(len(self), self.frames, self.fps)
+
+    @classmethod
+    def from_constraint(cls, constraint, frames, fps=15, n_trajectories=1000, n_attempts=1000, 
+                        n_samples=500, n_jobs=None, seed=None):
+        """Sample a pool of camera trajectories
+
+        Parameters
+        ----------
+        constraint : CamConstraint
+            camera constraint (e.g. Background.CamConstraint)
+        frames : list
+            keyframes at which to sample camera locations
+        fps : scalar
+            frame rate (for speed constraints)
+        n_trajectories : int
+            number of trajectories to sample. Trajectories that cannot be found 
+            (or fail `CamConstraint.check_camera_locations()`) are dropped, so the 
+            pool may be smaller.
+        n_attempts, n_samples : int
+            see `CamConstraint.sample_camera_location()`
+        n_jobs : int
+            number of processes. Defaults to number of CPUs; 1 samples in this process.
+        seed : int
+            random seed
+        """
+        n_chunks = 1 if n_jobs == 1 else min(n_trajectories, 4 * (n_jobs or multiprocessing.cpu_count()))
+        sizes = np.diff(np.linspace(0, n_trajectories, n_chunks + 1).astype(int))
+        seeds = np.random.RandomState(seed).randint(2**31 - 1, size=n_chunks)
+        jobs = [(constraint, frames, fps, int(n), n_attempts, n_samples, int(sd)) for n, sd in zip(sizes, seeds)]
+        if n_jobs == 1:
+            results = [_sample_camera_trajectories(job) for job in jobs]
+        else:
+            pool = multiprocessing.Pool(n_jobs)
+            try:
+                results = pool.map(_sample_camera_trajectories, jobs)
+            finally:
+                pool.close()
+                pool.join()
+        trajectories = [t for result in results for t in result]
+        if len(trajectories) == 0:
+            raise Exception('Could not find any camera trajectories to match constraints!')
+        locations = np.array(trajectories, dtype=float).reshape(len(trajectories), -1, 3)
+        locations = locations[constraint.check_camera_locations(locations, frames, fps=fps)]
+        return cls(locations, frames, fps=fps, key=_constraint_key(constraint))
+
+    def matches(self, constraint, frames, fps=15):
+        """Whether this pool was sampled for `constraint`, `frames` and `fps`"""
+        return ((self.key == _constraint_key(constraint)) and 
+                (self.frames == tuple(int(f) for f in frames)) and (self.fps == fps))
+
+    def sample(self):
+        """Draw a random trajectory (list of (x, y, z) tuples, as from `CamConstraint.sample_camera_location()`)"""
+        if len(self) == 0:
+            raise Exception('No camera trajectories in pool!')
+        location = self.locations[np.random.randint(len(self))]
+        return [tuple(float(x) for x in xyz) for xyz in location]
+
+    def save(self, fname):
+        """Save pool to a (compressed) .npz file"""
+        tmp = fname + '.tmp'
+        with open(tmp, 'wb') as fid:
+            np.savez_compressed(fid, locations=self.locations, frames=np.array(self.frames), 
+                                fps=np.array(self.fps), key=np.array(self.key or ''))
+        os.replace(tmp, fname)
+
+    @classmethod
+    def load(cls, fname):
+        """Load pool saved with `save()`"""
+        with np.load(fname, allow_pickle=False) as npz:
+            fps = npz['fps'].item()
+            return cls(npz['locations'], npz['frames'].tolist(), fps=fps, key=str(npz['key']) or None)
+
+    @classmethod
+    def for_background(cls, background, frames, fps=15, path=None, **kwargs):
+        """Load the trajectory pool for a background if it is saved and up to date, otherwise sample (and save) it
+
+        Parameters
+        ----------
+        background : Background
+            background, with camera constraints
+        frames : list
+            keyframes at which to sample camera locations (e.g. Scene.frame_range)
+        fps : scalar
+            frame rate
+        path : str | None
+            directory for saved pools. If None, pools are not saved.
+        kwargs : 
+            passed to `from_constraint()` (n_trajectories, n_jobs, etc)
+        """
+        constraint = background.CamConstraint
+        fname = None
+        if path is not None:
+            fname = os.path.join(path, '%s_camera_%s_%sfps.npz'%(background.name, 
+                                 '-'.join('%d'%f for f in frames), fps))
+            if os.path.exists(fname):
+                pool = cls.load(fname)
+                if pool.matches(constraint, frames, fps=fps):
+                    return pool
+        pool = cls.from_constraint(constraint, frames, fps=fps, **kwargs)
+        if fname is not None:
+            if not os.path.exists(path):
+                os.makedirs(path)
+            pool.save(fname)
+        return pool
+
 # THIS SHOULD BE CONVERTED TO CLASS METHOD from_background(),  
 # SEPARATELY FOR EACH TYPE OF CONSTRAINT.
 def get_constraint(grp, LockZtoFloor=True): #self, bgLibDir='/auto/k6/mark/BlenderFiles/Scenes/'):
@@ -206,7 +206,8 @@ class MappedClass(object):
                 continue
             # Tmp is a list of BVP objects
             if isinstance(tmp, (list, tuple)):
-                if len(tmp) > 0 and isinstance(tmp[0], MappedClass): #hasattr(tmp[0], 'data'):
+                # (lists may also hold lightweight records w/ `data`, e.g. Placement)
+                if len(tmp) > 0 and (isinstance(tmp[0], MappedClass) or hasattr(tmp[0], 'get_datadict')):
                     output[field] = [t.data for t in tmp]
                     continue
             # Tmp is a BVP object
@@ -1,6 +1,7 @@
 # Imports
 import os
 import warnings
+import numpy as np
 from .mapped_class import MappedClass
 from bvp import utils
 from bvp.options import config
@@ -113,7 +114,7 @@ class Object(MappedClass):
         #     ob_str+='%d Verts; %d Faces'%(self.n_vertices, self.n_faces)
         return(ob_str)
  
-    def place(self, scn=None, proxy=False, substeps_per_frame=1, fps=15):
+    def place(self, scn=None, proxy=False, substeps_per_frame=1, fps=15, asset_cache=None):
         """Places object into Blender scene, with pose & animation information
 
         Parameters
@@ -125,6 +126,9 @@ class Object(MappedClass):
             If True, places a proxy object (non-editable linked version of the object)
             into the scene. This is sufficient for most rendering purposes, and minimizes
             the complexity of the scene if you are working within Blender. 
+        asset_cache : bvp.utils.blender.AssetCache | None
+            If provided (and proxy is True), the object's group is linked only 
+            once per Blender session, and re-used for later scenes.
         """
         # Make file local, if it isn't already
         self.cloud_download()
@@ -145,10 +149,14 @@ class Object(MappedClass):
             proxy = False
             new_ob = self.add_dummy()
         else:
-            new_ob = utils.blender.add_group(self.name, self.fname, self.path, proxy=proxy)
+            new_ob = utils.blender.add_group(self.name, self.fname, self.path, proxy=proxy, 
+                                             asset_cache=asset_cache)
         # Get group of meshes in this object / proxy object
         if proxy:
-            new_grp = new_ob.dupli_group
+            if bpy.app.version < (2, 80, 0):
+                new_grp = new_ob.dupli_group
+            else:
+                new_grp = new_ob.instance_collection
         else:
             # Necessary?
             #assert len(self.blender_object.users_group) == 1
@@ -360,11 +368,7 @@ class Object(MappedClass):
         (x,y,z): 3-tuple of the object's maximum x,y, and z coordinates respectively.
         """
         #
-        if self.action:
-            sf = self.size3D/10
-            return (sf*self.action.max_xyz[0] + self.pos3D[0],sf*self.action.max_xyz[1] + self.pos3D[1],sf*self.action.max_xyz[2] + self.pos3D[2])
-        else:
-            return self.pos3D
+        return self.get_geometry().max_xyz
 
     @property
     def min_xyz_pos(self):
@@ -383,11 +387,7 @@ class Object(MappedClass):
         (x,y,z): 3-tuple of the object's minimum x,y, and z coordinates respectively.
         """
         #
-        sf = self.size3D/10
-        if self.action:
-            return (sf*self.action.min_xyz[0] + self.pos3D[0],sf*self.action.min_xyz[1] + self.pos3D[1],sf*self.action.min_xyz[2] + self.pos3D[2])
-        else:
-            return self.pos3D
+        return self.get_geometry().min_xyz
 
     @property
     def bounding_box_center(self):
@@ -406,12 +406,7 @@ class Object(MappedClass):
         (x,y,z): 3-tuple of the x,y,z coordinates of the center of the object's bounding box.
         """   
         # 
-        if self.action is not None:
-            return self.pos3D
-        else:
-            max_pos =  self.max_xyz_pos
-            min_pos =  self.min_xyz_pos
-            return ((max_pos[0]+min_pos[0])/2,(max_pos[1]+min_pos[1])/2,(max_pos[2]+min_pos[2])/2)
+        return self.get_geometry().center
 
     @property
     def bounding_box_dimensions(self):
@@ -430,11 +425,9 @@ class Object(MappedClass):
         (x,y,z): 3-tuple of the the x,y,z dimensions of the object's bounding box
         """
         # 
-        max_pos =  self.max_xyz_pos
-        min_pos =  self.min_xyz_pos
-        return ((max_pos[0]-min_pos[0])+self.size3D,(max_pos[1]-min_pos[1])+self.size3D,(max_pos[2]-min_pos[2])+self.size3D)
+        return self.get_geometry().dimensions
 
-    def collides_with(self, target):
+    def collides_with(self, target, swept=False):
         """Returns whether or not this object's bounding box collides  with the bounding box of target
 
         The bounding box for the object is defined as an xyz-aligned cuboid with one vertex as the max position, and its diagonally opposite vertex as the min position. This function calculates its dimensions
@@ -444,12 +437,19 @@ class Object(MappedClass):
         Parameters
         ----------
         self: self
+        target : Object
+            object to check for collisions
+        swept : bool
+            if True, compare bounding boxes frame by frame over the objects' 
+            actions (see GeometryView.swept_collisions), rather than boxes that
+            cover each whole action
         
         Returns
         -------
         Bool collides: True if there are collisions, False if there are none.
         """
-        # 
+        if swept:
+            return bool(GeometryView([self]).swept_collisions([target])[0, 0])
         c1 = self.bounding_box_center
         d1 = self.bounding_box_dimensions
         c2 = target.bounding_box_center
@@ -475,13 +475,7 @@ class Object(MappedClass):
         -------
         List of tuples: list of (default 5) positions at equally spaced points in time
         """
-        pos = self.pos3D
-        if self.action:
-            sf = self.size3D/10
-            min_points = self.action.min_xyz_trajectory
-            return [(pos[0]+sf*pt[0], pos[1]+sf*pt[1], pos[2]+sf*pt[2]) for pt in min_points]
-        else:
-            return [self.pos3D]
+        return self.get_geometry().min_xyz_trajectory
 
     @property
     def max_xyz_trajectory(self):
@@ -495,20 +489,44 @@ class Object(MappedClass):
         -------
         List of tuples: list of (default 5) positions at equally spaced points in time
         """
-        pos = self.pos3D
-        if self.action:
-            sf = self.size3D/10
-            max_points = self.action.max_xyz_trajectory
-            return [(pos[0]+sf*pt[0], pos[1]+sf*pt[1], pos[2]+sf*pt[2]) for pt in max_points]
-        else:
-            return [self.pos3D]
+        return self.get_geometry().max_xyz_trajectory
+
+    def get_bbox_track(self):
+        """Returns the min and max points of the object's bounding box at every frame of its action
+
+        Action bounding boxes are scaled by `size3D` and offset by `pos3D` (as for `min_xyz_pos`, 
+        `max_xyz_pos`). Objects without actions have a single (static) frame.
+
+        Returns
+        -------
+        bbox_track : array
+            (n_frames, 2, 3) array of [min_xyz, max_xyz] for each frame
+        """
+        geometry = self.get_geometry()
+        if geometry.bbox_track is None:
+            pos = np.asarray(self.pos3D, dtype=np.float32)
+            if self.action:
+                sf = self.size3D/10
+                geometry.bbox_track = self.action.get_bbox_track() * sf + pos
+            else:
+                geometry.bbox_track = np.tile(pos, (1, 2, 1))
+        return geometry.bbox_track
 
     @property
     def xyz_trajectory(self):
-        min_pt = self.min_xyz_trajectory
-        max_pt = self.max_xyz_trajectory
-        pos = self.pos3D
-        return [((mi[0]+ma[0])/2,(mi[1]+ma[1])/2, mi[2]) for mi, ma in zip(min_pt, max_pt)]
+        return self.get_geometry().xyz_trajectory
+
+    def get_geometry(self):
+        """Get cached bounding box geometry for this object (see ObjectGeometry)
+
+        Geometry is re-computed only if `pos3D`, `size3D` or `action` have changed.
+        """
+        key = (None if self.pos3D is None else tuple(self.pos3D), self.size3D, id(self.action))
+        geometry = getattr(self, '_geometry', None)
+        if (geometry is None) or (geometry.key != key):
+            geometry = ObjectGeometry(self, key)
+            self._geometry = geometry
+        return geometry
     
     def clear(self, scn=None, instance=-1):
         """Unlink an object from a scene"""
@@ -527,3 +545,210 @@ class Object(MappedClass):
         _ = self.proxy.pop(instance)
         # Go further? Delete from memory? 
         
+
+
+class ObjectGeometry(object):
+    """Bounding box geometry of an object at its current position, size and action
+
+    Computed once (by Object.get_geometry()) and re-used by the Object bounding box
+    properties (min_xyz_pos, max_xyz_pos, bounding_box_center, etc) until the
+    object's `pos3D`, `size3D` or `action` change.
+    """
+    __slots__ = ('key', 'min_xyz', 'max_xyz', 'center', 'dimensions', 'min_xyz_trajectory', 
+                 'max_xyz_trajectory', 'xyz_trajectory', 'bbox_track')
+
+    def __init__(self, ob, key):
+        self.key = key
+        self.bbox_track = None # computed on demand by Object.get_bbox_track()
+        pos = ob.pos3D
+        if pos is None:
+            # Nothing to compute for unplaced objects
+            self.min_xyz = self.max_xyz = self.center = self.dimensions = None
+            self.min_xyz_trajectory = self.max_xyz_trajectory = self.xyz_trajectory = [None]
+            return
+        pos = tuple(pos)
+        if ob.action:
+            sf = ob.size3D/10
+            act = ob.action
+            self.min_xyz = tuple(sf*m + p for m, p in zip(act.min_xyz, pos))
+            self.max_xyz = tuple(sf*m + p for m, p in zip(act.max_xyz, pos))
+            self.center = pos
+            min_points = [act.min_xyz] if act.min_xyz_trajectory is None else act.min_xyz_trajectory
+            max_points = [act.max_xyz] if act.max_xyz_trajectory is None else act.max_xyz_trajectory
+            self.min_xyz_trajectory = [tuple(sf*m + p for m, p in zip(pt, pos)) for pt in min_points]
+            self.max_xyz_trajectory = [tuple(sf*m + p for m, p in zip(pt, pos)) for pt in max_points]
+        else:
+            self.min_xyz = self.max_xyz = self.center = pos
+            self.min_xyz_trajectory = self.max_xyz_trajectory = [pos]
+        self.dimensions = tuple(ma - mi + ob.size3D for mi, ma in zip(self.min_xyz, self.max_xyz))
+        self.xyz_trajectory = [((mi[0]+ma[0])/2, (mi[1]+ma[1])/2, mi[2]) 
+                               for mi, ma in zip(self.min_xyz_trajectory, self.max_xyz_trajectory)]
+
+
+def _track_at_frames(track, frames):
+    """Boxes of an (n, 2, 3) per-frame bounding box track at (0-based, possibly fractional) frames
+
+    Tracks are aligned by frame index, interpolated linearly between frames, 
+    and hold their last box after their last frame (as Blender holds the last 
+    pose of an action).
+    """
+    track = np.asarray(track, dtype=float)
+    frames = np.asarray(frames, dtype=float)
+    if len(track) == 1:
+        return np.repeat(track, len(frames), axis=0)
+    flat = np.reshape(track, (len(track), 6))
+    return np.array([np.interp(frames, np.arange(len(track)), flat[:, i]) 
+                     for i in range(6)]).T.reshape(len(frames), 2, 3)
+
+
+class GeometryView(object):
+    """Array view of the bounding box geometry of a set of objects
+
+    Collects the (cached) geometry of each object into arrays, so that 
+    collision checks and projections can be computed for all objects at once.
+    """
+    def __init__(self, objects, n_frames=None, frames=None):
+        """
+        Parameters
+        ----------
+        objects : list
+            list of bvp.Object (or Placement) instances; all must have `pos3D` set
+        n_frames : int | None
+            number of frames for per-frame bounding box arrays. Shorter bounding
+            box tracks hold their last box for the remaining frames (longer 
+            tracks are cut off). If None, the longest track of any object is used.
+        frames : array-like | None
+            frames (0-based frame indices into each object's track, possibly 
+            fractional) for per-frame bounding box arrays, instead of `n_frames`
+        """
+        self.objects = list(objects)
+        geometry = [ob.get_geometry() for ob in self.objects]
+        self.min_xyz = np.array([g.min_xyz for g in geometry], dtype=float).reshape(-1, 3)
+        self.max_xyz = np.array([g.max_xyz for g in geometry], dtype=float).reshape(-1, 3)
+        self.center = np.array([g.center for g in geometry], dtype=float).reshape(-1, 3)
+        self.dimensions = np.array([g.dimensions for g in geometry], dtype=float).reshape(-1, 3)
+        self._n_frames = n_frames
+        self._frames = frames
+        self._bbox_track = None
+
+    def __len__(self):
+        return len(self.objects)
+
+    @property
+    def bbox_track(self):
+        """(n_objects, n_frames, 2, 3) array of [min, max] bounding box points for each frame"""
+        if self._bbox_track is None:
+            tracks = [ob.get_bbox_track() for ob in self.objects]
+            frames = self._frames
+            if frames is None:
+                n_frames = self._n_frames
+                if n_frames is None:
+                    n_frames = max([len(t) for t in tracks] + [1])
+                frames = np.arange(n_frames)
+            self._bbox_track = np.array([_track_at_frames(t, frames) for t in tracks], 
+                                        dtype=float).reshape(-1, len(frames), 2, 3)
+        return self._bbox_track
+
+    @property
+    def n_frames(self):
+        return self.bbox_track.shape[1]
+
+    @property
+    def min_xyz_trajectory(self):
+        """(n_objects, n_frames, 3) array of minimum bounding box points"""
+        return self.bbox_track[:, :, 0]
+
+    @property
+    def max_xyz_trajectory(self):
+        """(n_objects, n_frames, 3) array of maximum bounding box points"""
+        return self.bbox_track[:, :, 1]
+
+    @property
+    def xyz_trajectory(self):
+        """(n_objects, n_frames, 3) array of bottom-middle bounding box points (as Object.xyz_trajectory)"""
+        track = self.bbox_track
+        return np.concatenate([track.mean(axis=2)[..., :2], track[:, :, 0, 2:]], axis=-1)
+
+    def collisions(self, other=None):
+        """Bounding box collisions between these objects and `other` objects
+
+        Uses the same test as Object.collides_with()
+
+        Parameters
+        ----------
+        other : GeometryView or list of objects
+            other objects. If None, collisions between all pairs of these objects 
+            are computed (including each object with itself)
+
+        Returns
+        -------
+        collides : array
+            (n_objects, n_other) boolean array
+        """
+        if other is None:
+            other = self
+        elif not isinstance(other, GeometryView):
+            other = GeometryView(other)
+        dist = np.abs(self.center[:, None] - other.center[None])
+        extent = (self.dimensions[:, None] + other.dimensions[None]) / 2
+        return np.all(dist < extent, axis=-1)
+
+    def _boxes(self, n_frames):
+        """(n_objects, n_frames, 3) min and max points of per-frame boxes, padded by `size3D` 
+        (as the boxes in Object.collides_with() are)"""
+        track = self.bbox_track
+        if track.shape[1] < n_frames:
+            # Hold last box
+            track = np.concatenate([track, np.repeat(track[:, -1:], n_frames - track.shape[1], axis=1)], axis=1)
+        pad = np.array([ob.size3D for ob in self.objects], dtype=float).reshape(-1, 1, 1) / 2
+        return track[:, :, 0] - pad, track[:, :, 1] + pad
+
+    def swept_collisions(self, other=None, chunk_size=16):
+        """Per-frame bounding box collisions between these objects and `other` objects
+
+        Unlike `collisions()`, which uses boxes that cover each object's whole 
+        action, this compares bounding boxes frame by frame (see `bbox_track`), 
+        so moving objects only collide if they are in the same place at the same 
+        time. Tracks are aligned by frame index; objects with shorter tracks 
+        hold their last box until the end of the longest track.
+
+        Pairs of objects whose boxes over all frames do not overlap are skipped; 
+        remaining pairs are checked a chunk of frames at a time, and each pair is 
+        dropped as soon as a collision is found.
+
+        Parameters
+        ----------
+        other : GeometryView or list of objects
+            other objects. If None, collisions between all pairs of these objects 
+            are computed (including each object with itself)
+        chunk_size : int
+            number of frames to check at once
+
+        Returns
+        -------
+        collides : array
+            (n_objects, n_other) boolean array; True if boxes overlap in any frame
+        """
+        if other is None:
+            other = self
+        elif not isinstance(other, GeometryView):
+            other = GeometryView(other)
+        collides = np.zeros((len(self), len(other)), dtype=bool)
+        if len(self) == 0 or len(other) == 0:
+            return collides
+        n_frames = max(self.n_frames, other.n_frames)
+        lo_a, hi_a = self._boxes(n_frames)
+        lo_b, hi_b = other._boxes(n_frames)
+        # Broad phase: boxes over all frames
+        overlap = np.all((lo_a.min(1)[:, None] < hi_b.max(1)[None]) & 
+                         (lo_b.min(1)[None] < hi_a.max(1)[:, None]), axis=-1)
+        ii, jj = np.nonzero(overlap)
+        for start in range(0, n_frames, chunk_size):
+            if len(ii) == 0:
+                break
+            frames = slice(start, start + chunk_size)
+            hit = np.all((lo_a[ii, frames] < hi_b[jj, frames]) & 
+                         (lo_b[jj, frames] < hi_a[ii, frames]), axis=-1).any(axis=1)
+            collides[ii[hit], jj[hit]] = True
+            ii, jj = ii[~hit], jj[~hit]
+        return collides
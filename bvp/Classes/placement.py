@@ -0,0 +1,116 @@
+# Lightweight placement records for objects in scenes
+
+import copy
+from .object import Object
+
+
+class Placement(object):
+    """Compact record of how a library object is placed in a scene
+
+    Stores only the per-scene state of an object (position, rotation, size,
+    pose, and image position) plus a reference to the (shared, un-copied)
+    library Object it places. `Scene.populate` creates one of these per
+    candidate object per attempt, rather than copying full Object instances;
+    full Objects are only built (via `to_object()`) when the scene is created
+    in Blender.
+
+    Attributes not stored in the record (name, action, semantic_category,
+    etc) are read from the library object.
+    """
+    __slots__ = ('source', 'pos3D', 'rot3D', 'size3D', 'pose', 'pos2D', '_geometry')
+    _record_fields = ('pos3D', 'rot3D', 'size3D', 'pose', 'pos2D')
+
+    def __init__(self, source, pos3D=None, rot3D=None, size3D=None, pose=None, pos2D=None):
+        """Create a placement record
+
+        Parameters
+        ----------
+        source : bvp.Object
+            library object to be placed. Not copied or modified.
+        pos3D : tuple
+            Position [X, Y, Z] in 3D
+        rot3D : tuple
+            rotation (xyz euler) in 3D
+        size3D : float
+            Size of largest dimension
+        pose : int | None
+            Index for pose in object's pose library
+        pos2D : tuple
+            location in the image plane (normalized 0-1)
+        """
+        self.source = source
+        self.pos3D = pos3D
+        self.rot3D = rot3D
+        self.size3D = size3D
+        self.pose = pose
+        self.pos2D = pos2D
+        self._geometry = None
+
+    @classmethod
+    def from_object(cls, ob):
+        """Create a placement record from an Object (or copy another Placement)"""
+        if isinstance(ob, Placement):
+            return ob.copy()
+        return cls(ob, pos3D=ob.pos3D, rot3D=ob.rot3D, size3D=ob.size3D,
+                   pose=ob.pose, pos2D=getattr(ob, 'pos2D', None))
+
+    def copy(self):
+        return Placement(self.source, pos3D=self.pos3D, rot3D=self.rot3D,
+                         size3D=self.size3D, pose=self.pose, pos2D=self.pos2D)
+
+    __copy__ = copy
+
+    def __getattr__(self, k):
+        # Only called for attributes not in the record; fall back on library object
+        if k in Placement.__slots__ or k.startswith('__'):
+            raise AttributeError(k)
+        return getattr(self.source, k)
+
+    def __getstate__(self):
+        return dict((k, getattr(self, k)) for k in ('source',) + self._record_fields)
+
+    def __setstate__(self, state):
+        self._geometry = None
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    def __repr__(self):
+        return '<Placement of "%s": pos3D=%s, size3D=%s>'%(self.source.name, self.pos3D, self.size3D)
+
+    @property
+    def object_id(self):
+        """Database _id of placed object"""
+        return self.source._id
+
+    @property
+    def action_id(self):
+        """Database _id of action for placed object (None if no action)"""
+        action = self.source.action
+        return None if action is None else action._id
+
+    # Bounding box geometry is computed exactly as for Objects
+    max_xyz_pos = Object.max_xyz_pos
+    min_xyz_pos = Object.min_xyz_pos
+    bounding_box_center = Object.bounding_box_center
+    bounding_box_dimensions = Object.bounding_box_dimensions
+    collides_with = Object.collides_with
+    min_xyz_trajectory = Object.min_xyz_trajectory
+    max_xyz_trajectory = Object.max_xyz_trajectory
+    xyz_trajectory = Object.xyz_trajectory
+    get_bbox_track = Object.get_bbox_track
+    get_geometry = Object.get_geometry
+
+    def to_object(self):
+        """Build a full Object with this placement (for Scene.create)"""
+        ob = copy.copy(self.source)
+        for k in self._record_fields:
+            setattr(ob, k, getattr(self, k))
+        return ob
+
+    def get_datadict(self, fields=None):
+        """Data dict for saving (same format as for the equivalent Object)"""
+        return self.to_object().get_datadict(fields=fields)
+
+    @property
+    def data(self):
+        return self.get_datadict()
@@ -203,6 +203,22 @@ class RenderOptions(object):
         S = 'Class "RenderOptions":\n'+self.__dict__.__repr__()
         return S
 
+    def get_content_dict(self, exclude=('BasePath', 'RenderFile', 'LogFileAdd')):
+        """Options that affect rendered output, as a json-serializable dict
+
+        Output paths & render scripts (`exclude` fields in BVPopts) are left out, 
+        so that the same scene rendered to different places has the same content 
+        (see `Scene.content_hash`).
+        """
+        out = {}
+        for k, v in self.__dict__.items():
+            if k.startswith('_') or hasattr(v, '__call__'):
+                continue
+            if k == 'BVPopts':
+                v = dict((kk, vv) for kk, vv in v.items() if kk not in exclude)
+            out[k] = bvpu.serialize._to_native(v)
+        return out
+
     def apply_opts(self, scn=None, objects_to_mask=None, use_occlusion=False):
         if scn is None:
             # Get current scene if input not supplied
@@ -6,8 +6,11 @@ Class for scenes, composed of background, sky, object(s), [shadows], camera
 """
 
 # Imports
+import os
 import copy
 import json
+import time
+import hashlib
 import numpy as np
 
 from .mapped_class import MappedClass
@@ -17,7 +20,8 @@ from .background import Background
 from .object import Object
 from .sky import Sky
 from .shadow import Shadow
-from .constraint import ObConstraint, CamConstraint
+from .constraint import ObConstraint, CamConstraint, ProjectionCache, action_compatibility
+from .placement import Placement
 from .. import utils
 from ..options import config
 
@@ -149,7 +153,9 @@ class Scene(MappedClass):
 
         Notes
         -----
-        Could possibly extend to objects with a certain size
+        Could possibly extend to objects with a certain size. For many 
+        actions and backgrounds, see bvp.Classes.constraint.compatibility_matrix 
+        or LibraryCache.compatibility()
         """
         if bg == None or act == None:
             if raise_error:
@@ -157,54 +163,21 @@ class Scene(MappedClass):
             if debug:
                 print('Invalid Background or Action passed into check_compatibility!')
             return
-        act_contains_x_origin = act.max_xyz[0] >= 0 >= act.min_xyz[0]
-        act_contains_y_origin = act.max_xyz[1] >= 0 >= act.min_xyz[1]
-        act_contains_z_origin = act.max_xyz[2] >= 0 >= act.min_xyz[2]
-        tmp_ob = Object()
-        tmp_ob.action = act
-        const = bg.object_constraints
-        tmp_ob.size3D = min(bg.object_constraints.Sz[2],bg.object_constraints.Sz[3])
-        max_pos = tmp_ob.max_xyz_pos
-        min_pos = tmp_ob.min_xyz_pos
-        X_OK, Y_OK, Z_OK, r_OK = [True,True,True, True]
-        if const.X:
-            X_OK = (max_pos[0] - min_pos[0]) < (const.X[3] - const.X[2])
-        if const.Y:
-            Y_OK = (max_pos[1] - min_pos[1]) < (const.Y[3] - const.Y[2])
-        if const.Z:
-            if (const.Z[2] == const.Z[3]):
-                if debug:
-                    print('Constraint Z is constant for background %s. Ignoring Z constraint'%bg.name)
-                Z_OK = (max_pos[2] - min_pos[2]) < const.Sz[3] - tmp_ob.size3D
-            else:
-                Z_OK = (max_pos[2] - min_pos[2]) < (const.Z[3] - const.Z[2])
-        if const.r:
-            maxR = ((max_pos[0]-min_pos[0])**2+(max_pos[1]-min_pos[1])**2+(max_pos[2]-min_pos[2])**2)**.5 #TODO: Enforce this better
-            rB = True if const.r[3] is None else (maxR)<=2*const.r[3]
-            r_OK = rB
-        if all([X_OK, Y_OK, Z_OK, r_OK, act_contains_x_origin, act_contains_y_origin, act_contains_z_origin]):
+        object_constraints = bg.object_constraints
+        if not isinstance(object_constraints, (list, tuple)):
+            object_constraints = [object_constraints]
+        compatible = action_compatibility(act.min_xyz, act.max_xyz, object_constraints)[0]
+        if np.any(compatible):
             return True
         else:
             if debug:
-                print("Action", act.name,"incompatible with bg",bg.name)
+                print("Action", act.name, "incompatible with bg", bg.name)
                 print("max pos for action", act.max_xyz)
                 print("min pos for action", act.min_xyz)
-                print("ObConstraints:")
-                print("Origin:", const.origin)
-                print("X", const.X)
-                print("Y", const.Y)
-                print("Z", const.Z)
-                if const.r:
-                    print("R", const.r)
-                print("Size", const.Sz)
-                print("Temp Object Size", tmp_ob.size3D)
-                print("Temp Object action max", max_pos)
-                print("Temp Object action min", min_pos)
-                print("X,Y,Z ok:", [X_OK, Y_OK, Z_OK, r_OK])
-                print("origin containment:", [act_contains_x_origin, act_contains_y_origin, act_contains_z_origin])
+                print("ObConstraints:", object_constraints)
             return False
-
     
+    @utils.instrument.timed('Scene.populate')
     def populate(self, object_list, 
                 reset_camera=True, 
                 image_position_count=None, 
@@ -212,7 +185,9 @@ class Scene(MappedClass):
                 object_overlap=0.50, 
                 min_size_2d=0, 
                 raise_error=False, 
-                n_iter=50):
+                n_iter=50, 
+                camera_pool=None,
+                compatibility_index=None):
         """Choose positions for all objects in "object_list" input within the scene, 
         according to constraints provided by scene background.
         
@@ -220,6 +195,15 @@ class Scene(MappedClass):
         has had an object in it. Can be omitted for single scenes (defaults
         to randomly sampling whole image)
 
+        camera_pool is an (optional) CameraTrajectoryPool for this background and 
+        frame range (see CameraTrajectoryPool.for_background()); if provided, 
+        camera locations are drawn from the pool rather than sampled anew.
+
+        compatibility_index is an (optional) CompatibilityIndex (see
+        LibraryCache.compatibility()); if provided, incompatible actions are
+        rejected by lookup, and action bounds are only checked against each of
+        the background's constraints when the background has more than one.
+
         """
         # raise Exception("WIP! FiX ME!") # TODO
         # (This just might work doubtful)
@@ -227,42 +211,73 @@ class Scene(MappedClass):
         from random import shuffle
         if not image_position_count:
             image_position_count = utils.math.ImPosCount(0, 0, image_size=1., n_bins=5, e=1)
+        if (camera_pool is not None) and (camera_pool.frames != tuple(self.frame_range)):
+            raise ValueError('Camera trajectory pool is for frames %s, not %s'%(camera_pool.frames, tuple(self.frame_range)))
         attempt = 0
         done = False
+        projection_cache = None
+        # Parse background object constraints once, not once per attempt
+        if type(self.background.object_constraints) is list:
+            all_object_constraints = [ObConstraint(**x) for x in self.background.object_constraints]
+        else:
+            all_object_constraints = [ObConstraint(**self.background.object_constraints)]
+        # Constraints each object's action fits within, computed once for all objects
+        object_constraints = []
+        for ob in object_list:
+            constraints = all_object_constraints
+            if ob.action is not None:
+                if compatibility_index is not None:
+                    # Look up whole-background compatibility; per-constraint
+                    # bounds only matter if there are several constraints
+                    if compatibility_index.is_compatible(ob.action, self.background):
+                        compatible = np.ones(len(all_object_constraints), dtype=bool)
+                        if len(all_object_constraints) > 1:
+                            compatible = action_compatibility(ob.action.min_xyz, ob.action.max_xyz, all_object_constraints)[0]
+                    else:
+                        compatible = np.zeros(len(all_object_constraints), dtype=bool)
+                else:
+                    compatible = action_compatibility(ob.action.min_xyz, ob.action.max_xyz, all_object_constraints)[0]
+                if not np.any(compatible):
+                    if raise_error:
+                        raise Exception('Action ' + ob.action.name + ' is incompatible with bg ' + self.background.name)
+                    print('Warning! Action %s is incompatible with bg %s'%(ob.action.name, self.background.name))
+                else:
+                    constraints = [c for c, ok in zip(all_object_constraints, compatible) if ok]
+            object_constraints.append(constraints)
         while (attempt <= n_iter) and not done:
             fail = False
             objects_to_add = []
             print('### --- Running populate_scene, attempt %d --- ###'%attempt)
+            utils.instrument.count('Scene.populate.attempts')
             if reset_camera:
                 # Start w/ random camera, fixation position
-                camera_location = self.background.CamConstraint.sample_camera_location(self.frame_range) #TODO fix
-                fixation_location = self.background.CamConstraint.sample_fixation_location(self.frame_range, obj=objects_to_add)
+                with utils.instrument.timer('Scene.populate.camera'):
+                    if camera_pool is not None:
+                        camera_location = camera_pool.sample()
+                    else:
+                        camera_location = self.background.CamConstraint.sample_camera_location(self.frame_range) #TODO fix
+                    fixation_location = self.background.CamConstraint.sample_fixation_location(self.frame_range, obj=objects_to_add)
                 self.camera = Camera(location=camera_location, 
                                      fix_location=fixation_location, 
                                      frames=self.frame_range, 
                                      lens=self.background.lens)
+            # Camera is fixed from here on; project camera & obstacles once for all objects
+            if (projection_cache is None) or (projection_cache.camera is not self.camera):
+                projection_cache = ProjectionCache(self.camera)
             # Multiple object constraints for moving objects
             current_object_constraints = []
-            for ob in object_list:
+            for ob, constraints in zip(object_list, object_constraints):
                 # Randomly cycle through object constraints (in case there are multiple exclusive possible locations for an object)
-                
-                if not current_object_constraints:
-                    if type(self.background.object_constraints) is list:
-                        current_object_constraints = copy.copy(self.background.object_constraints)
-                    else:
-                        current_object_constraints = [copy.copy(self.background.object_constraints)]                    
-                    shuffle(current_object_constraints)
-                    current_object_constraints = [ObConstraint(**x) for x in current_object_constraints]
-                this_constraint = current_object_constraints.pop()
+                if constraints is all_object_constraints:
+                    if not current_object_constraints:
+                        current_object_constraints = list(all_object_constraints)
+                        shuffle(current_object_constraints)
+                    this_constraint = current_object_constraints.pop()
+                else:
+                    # Only constraints that the object's action fits within
+                    this_constraint = constraints[np.random.randint(len(constraints))]
                 # reset size each iteration as well as position
-                new_ob = copy.copy(ob)
-                if new_ob.action is not None:
-                    is_compatible = self.check_compatibility(self.background, new_ob.action, raise_error=raise_error)
-                    # Check if it is even possible to use the action
-                    if not is_compatible: 
-                        if raise_error:
-                            raise Exception('Action' + new_ob.action.name +'is incompatible with bg' + self.background.name)
-                        pass
+                new_ob = Placement.from_object(ob)
                 if self.background.obstacles:
                     obstacles = self.background.obstacles + objects_to_add
                 else:
@@ -279,8 +294,9 @@ class Scene(MappedClass):
                     new_ob.rot3D = this_constraint.sampleRot(self.camera)
                 if not ob.pos3D:
                     # Sample position last (depends on camera position, It may end up depending on pose, rotation, (or action??)
-                    new_ob.pos3D, new_ob.pos2D = this_constraint.sampleXY(new_ob, self.camera, obstacles=obstacles, edge_dist=edge_dist, object_overlap=object_overlap, raise_error=False, image_position_count=image_position_count, min_size_2d=min_size_2d)
+                    new_ob.pos3D, new_ob.pos2D = this_constraint.sampleXY(new_ob, self.camera, obstacles=obstacles, edge_dist=edge_dist, object_overlap=object_overlap, raise_error=False, image_position_count=image_position_count, min_size_2d=min_size_2d, projection_cache=projection_cache)
                     if new_ob.pos3D is None:
+                        utils.instrument.histogram('Scene.populate.rejections', 'no_position:%s'%ob.name)
                         fail = True
                         break
                 objects_to_add.append(new_ob)
@@ -377,7 +393,9 @@ class Scene(MappedClass):
             target.clear()
 
 
-    def create(self, render_options=None, scn=None, is_working=False, proxy=True, substeps_per_frame=10, fps=15):
+    @utils.instrument.timed('Scene.create')
+    def create(self, render_options=None, scn=None, is_working=False, proxy=True, substeps_per_frame=10, fps=15, 
+               asset_cache=None, physics_cache=None):
         """Creates the stored scene (imports bg, sky, lights, objects, shadows) in Blender
 
         Optionally, applies rendering options 
@@ -388,6 +406,14 @@ class Scene(MappedClass):
             Class to store rendering options (e.g. size, base path, extra meta-information renders, etc.)
         scn : string scene name
             Scene to render within .blend file. Defaults to current scene.
+        asset_cache : bvp.utils.blender.AssetCache | None
+            Cache of linked library data, to re-use across scenes rendered in 
+            the same Blender session (with proxy=True). Clear scenes with 
+            `clear(asset_cache=...)` to keep cached data loaded.
+        physics_cache : bvp.utils.physics.PhysicsCache | None
+            Cache of baked rigid-body simulations. If provided, rigid-body 
+            objects are simulated once (or not at all, if this scene has been 
+            simulated before) and animated with plain keyframes.
         """
         # print(self.camera.fix_location)
         scn = utils.blender.set_scene(scn)
@@ -402,7 +428,8 @@ class Scene(MappedClass):
             scn.cursor.location = (0, 0, 0)
         # Background
         if self.background is not None:
-            self.background.place(proxy=proxy)
+            with utils.instrument.timer('Scene.create.background'):
+                self.background.place(proxy=proxy, asset_cache=asset_cache)
             if self.background.semantic_category is not None and 'indoor' in self.background.semantic_category:
                 if (self.background.real_world_size is not None) and (self.background.real_world_size < 50):
                     # Due to a problem with skies coming inside the corners of rooms
@@ -413,19 +440,25 @@ class Scene(MappedClass):
                 scale = self.background.real_world_size
         # Sky
         if self.sky is not None:
-            self.sky.place(number=self.number, scale=scale, proxy=proxy)
+            with utils.instrument.timer('Scene.create.sky'):
+                self.sky.place(number=self.number, scale=scale, proxy=proxy, asset_cache=asset_cache)
         # Camera
         if self.camera is not None:
             self.camera.place(name='camera%03d'%self.number)
         # Shadow
         if self.shadow is not None:
-            self.shadow.place(scale=self.background.real_world_size)
+            with utils.instrument.timer('Scene.create.shadow'):
+                self.shadow.place(scale=self.background.real_world_size, asset_cache=asset_cache)
         # Objects
+        # Build full objects from placement records (see populate())
+        self.objects = [ob.to_object() if isinstance(ob, Placement) else ob for ob in self.objects]
         for ob in self.objects:
             try:
-                ob.place(proxy=proxy, 
-                         substeps_per_frame=substeps_per_frame,
-                         fps=fps)
+                with utils.instrument.timer('Scene.create.object'):
+                    ob.place(proxy=proxy, 
+                             substeps_per_frame=substeps_per_frame,
+                             fps=fps, 
+                             asset_cache=asset_cache)
             except Exception as e:
                 if not is_working:
                     raise e
@@ -433,6 +466,9 @@ class Scene(MappedClass):
         # Details
         for s in self.scn_params.keys():
             setattr(scn, s, self.scn_params[s])
+        if physics_cache is not None:
+            with utils.instrument.timer('Scene.create.physics'):
+                self.cache_physics(physics_cache, scn=scn, substeps_per_frame=substeps_per_frame, fps=fps)
         if render_options is not None:
             # Set filepath
             filepath = copy.copy(render_options.BVPopts['BasePath'])
@@ -441,12 +477,87 @@ class Scene(MappedClass):
                 filepath = ''.join([filepath, '{scene_name}'])
                 print('New path is:',filepath.format(scene_name=self.fname))
             scn.render.filepath = filepath.format(scene_name=self.fname)
-            # Apply other options
-            render_options.apply_opts()
+            # Apply other options (incl. compositor node setup for render passes)
+            with utils.instrument.timer('Scene.create.render_options'):
+                render_options.apply_opts()
         if bpy.app.version < (2, 80, 0):
             scn.layers = [True]*20
 
-    def render(self, render_options, scn=None):
+    def cache_physics(self, physics_cache, scn=None, substeps_per_frame=10, fps=15):
+        """Replace rigid-body simulation with keyframes from a baked simulation
+
+        Simulated trajectories are looked up in `physics_cache` by a hash of 
+        the background, all objects (names, sizes, start poses, and throw 
+        vectors for rigid-body objects), frame range, and simulation parameters. If the simulation is not yet in the 
+        cache, it is run once (by stepping through frames) and stored.
+
+        Parameters
+        ----------
+        physics_cache : bvp.utils.physics.PhysicsCache
+            cache of baked simulations
+        scn : bpy scene | None
+            scene in which objects have been placed. Defaults to current scene.
+        substeps_per_frame : int
+            simulation substeps per frame (as passed to `create()`)
+        fps : int
+            frame rate (as passed to `create()`)
+
+        Returns
+        -------
+        is_cached : bool
+            whether the simulation was found in the cache
+        """
+        rigid_objects = [ob for ob in self.objects if ob.rigid_body and (ob.action is None) 
+                         and (ob.movement_locations is not None) and (ob.blender_object is not None)]
+        if len(rigid_objects) == 0:
+            return False
+        # All objects & the background are in the key: simulated objects collide with them
+        key = utils.physics.physics_key(self.objects, self.frame_range, 
+                                        substeps_per_frame=substeps_per_frame, fps=fps,
+                                        background=self.background, extra=list(bpy.app.version))
+        blender_objects = [ob.blender_object[-1] for ob in rigid_objects]
+        baked = physics_cache.get(key)
+        is_cached = baked is not None
+        if not is_cached:
+            baked = utils.blender.bake_physics(blender_objects, self.frame_range, scn=scn)
+            physics_cache[key] = baked
+        for bob, location, rotation in zip(blender_objects, baked.location, baked.rotation_euler):
+            utils.blender.apply_baked_animation(bob, baked.frames, location, rotation)
+        return is_cached
+
+    def clear(self, scn=None, asset_cache=None):
+        """Remove this scene's elements from Blender, ready for the next scene
+
+        Parameters
+        ----------
+        scn : string scene name
+            Scene to clear. Defaults to current scene.
+        asset_cache : bvp.utils.blender.AssetCache | None
+            Cache passed to `create()`. Instances are removed, but cached 
+            library data is kept for the next scene.
+        """
+        utils.blender.clear_scene(scn, asset_cache=asset_cache)
+
+    def _render_animation(self, scn):
+        """Render all frames of `scn` (timing each frame, if instrumentation is on)"""
+        if not utils.instrument.enabled:
+            bpy.ops.render.render(animation=True, scene=scn.name)
+            return
+        frame_start = []
+        def start_frame(*args):
+            frame_start.append(time.perf_counter())
+        def end_frame(*args):
+            utils.instrument.add_time('Scene.render.frame', time.perf_counter() - frame_start[-1])
+        bpy.app.handlers.render_pre.append(start_frame)
+        bpy.app.handlers.render_post.append(end_frame)
+        try:
+            bpy.ops.render.render(animation=True, scene=scn.name)
+        finally:
+            bpy.app.handlers.render_pre.remove(start_frame)
+            bpy.app.handlers.render_post.remove(end_frame)
+
+    @utils.instrument.timed('Scene.render')
+    def render(self, render_options, scn=None, render_store=None, video_encoder=None):
         """Renders the scene (immediately, in open instance of Blender)
         
         Parameters
@@ -455,6 +566,20 @@ class Scene(MappedClass):
             Class to specify rendering parameters
         scn : string scene name
             Scene to render. Defaults to current scene.
+        render_store : bvp.utils.render_store.RenderStore | None
+            Shared store of rendered files, keyed by `content_hash()`. If this 
+            scene has already been rendered (e.g. as part of another scene list), 
+            stored files are hard-linked into the output directory instead of 
+            rendering again. Otherwise, newly rendered files are added to the store.
+        video_encoder : bvp.utils.video.VideoEncoder | None
+            If provided, rendered frames (in the Scenes folder) are queued to be 
+            encoded to <render dir>/Movies/<scene name>.mp4 at `frame_rate`. 
+            Encoding runs in background threads (e.g. while the next scene renders).
+
+        Returns
+        -------
+        is_rendered : bool
+            False if files were linked from `render_store` rather than rendered
         """
         scn = utils.blender.set_scene(scn)
         # Reset scene nodes (?)
@@ -467,7 +592,8 @@ class Scene(MappedClass):
         elif '%s' in scn.render.filepath:
             scn.render.filepath = scn.render.filepath%self.fname
         # Apply rendering options
-        render_options.apply_opts()
+        with utils.instrument.timer('Scene.render.render_options'):
+            render_options.apply_opts()
         # Render all layers!
         if bpy.app.version < (2, 80, 0):
             scn.layers = [True]*20 # TODO: Revisit locations where layers are set in this class's methods / in RenderOptions methods
@@ -485,15 +611,133 @@ class Scene(MappedClass):
             scn.frame_step = 4
         else:
             raise Exception("Invalid render type specified!\n   Please use 'FirstFrame', 'FirstAndLastFrame', or 'All'")
-        # Render animation
-        bpy.ops.render.render(animation=True, scene=scn.name)
+        if render_store is not None:
+            key = self.content_hash(render_options)
+            base_dir = self._output_base_dir(scn.render.filepath)
+            scene_name = self.fname.split('#')[0] or None
+            is_rendered = key not in render_store
+        else:
+            is_rendered = True
+        if not is_rendered:
+            utils.instrument.count('Scene.render.store_hits')
+            render_store.link(key, base_dir, scene_name=scene_name)
+        elif render_store is not None:
+            before = utils.render_store.list_scene_files(base_dir, scene_name)
+            # Render animation
+            self._render_animation(scn)
+            after = utils.render_store.list_scene_files(base_dir, scene_name)
+            new_files = [f for f, t in after.items() if before.get(f) != t]
+            render_store.add(key, new_files, base_dir, scene_name=scene_name, 
+                             info=dict(scene_name=self.fname))
+        else:
+            # Render animation
+            self._render_animation(scn)
+        if video_encoder is not None:
+            self._submit_video(video_encoder, os.path.dirname(scn.render.filepath), 
+                               ext=scn.render.file_extension.lstrip('.'))
+        return is_rendered
+
+    def _submit_video(self, video_encoder, frame_dir, ext='png'):
+        """Queue rendered frames in `frame_dir` to be encoded to <frame_dir>/../Movies/<scene name>.mp4"""
+        movie_name = self.fname.split('#')[0].rstrip('_') or 'Sc%07d'%self.number
+        frames = utils.video.frame_files(frame_dir, self.fname.split('#')[0], ext=ext)
+        return video_encoder.submit(frames, 
+                                    os.path.join(os.path.dirname(frame_dir), 'Movies', movie_name + '.mp4'),
+                                    fps=self.frame_rate)
+
+    @staticmethod
+    def _output_base_dir(filepath):
+        """Directory holding all render passes for render file path `filepath`"""
+        # All render passes are written to folders (Scenes, Masks, etc) in one directory
+        if '/Scenes/' in filepath:
+            return filepath.split('/Scenes/')[0]
+        return os.path.dirname(filepath)
+
+    def link_rendered(self, render_options, render_store, video_encoder=None):
+        """Link this scene's output from a render store, if it has been rendered before
+
+        Does not require the scene to be created in Blender, so callers can 
+        skip `create()` and `render()` entirely for scenes already in the store.
 
-    def save(self, fname):
-        """Saves scene data to .json file
+        Parameters
+        ----------
+        render_options : RenderOptions instance
+            render options (with output path in BVPopts['BasePath'])
+        render_store : bvp.utils.render_store.RenderStore
+            shared store of rendered files, keyed by `content_hash()`
+        video_encoder : bvp.utils.video.VideoEncoder | None
+            If provided, linked frames are queued to be encoded to video (as 
+            in `render()`)
+
+        Returns
+        -------
+        is_linked : bool
+            True if stored files were linked into the output directory
+        """
+        filepath = render_options.BVPopts['BasePath']
+        if filepath is None:
+            return False
+        key = self.content_hash(render_options)
+        if key not in render_store:
+            return False
+        # Same output path as set in `create()`
+        if not '{scene_name}' in filepath:
+            filepath = ''.join([filepath, '{scene_name}'])
+        base_dir = self._output_base_dir(filepath.format(scene_name=self.fname))
+        utils.instrument.count('Scene.render.store_hits')
+        files = render_store.link(key, base_dir, scene_name=self.fname.split('#')[0] or None)
+        frame_dir = os.path.join(base_dir, 'Scenes')
+        frames = [f for f in files if os.path.dirname(f) == frame_dir]
+        if (video_encoder is not None) and frames:
+            self._submit_video(video_encoder, frame_dir, ext=os.path.splitext(frames[0])[1].lstrip('.'))
+        return True
+
+    def content_hash(self, render_options=None, blender_version=None):
+        """Canonical hash of everything that determines this scene's rendered output
+
+        Covers all scene elements (background, sky, shadow, objects and their 
+        placements, camera keyframes), frame range & rate, render options, and 
+        bvp & Blender versions, but not the scene number or name, so identical 
+        scenes in different scene lists have the same hash.
+
+        Parameters
+        ----------
+        render_options : RenderOptions | None
+            render options (output paths are not included in the hash)
+        blender_version : tuple | None
+            Blender version. Defaults to version of running Blender, if any.
+
+        Returns
+        -------
+        key : str
+            sha1 hex digest
+        """
+        from .. import __version__ as bvp_version
+        content = utils.serialize.to_datadict(self)
+        content.pop('fname', None)
+        content['frame_range'] = utils.serialize._to_native(self.frame_range)
+        content['frame_rate'] = utils.serialize._to_native(self.frame_rate)
+        if render_options is not None:
+            content['render_options'] = render_options.get_content_dict()
+        if (blender_version is None) and is_blender:
+            blender_version = bpy.app.version
+        content['versions'] = dict(bvp=bvp_version, 
+                                   blender=utils.serialize._to_native(blender_version))
+        return hashlib.sha1(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def save(self, fname, fmt=None):
+        """Saves scene data to .json (or .msgpack) file
 
         Save structured scene to .json file for later loading / rendering.
+        See bvp.utils.serialize (save_many, load_many) for saving / loading 
+        many scenes at once.
         """
-        json.dump(self.get_datadict(), open(fname, 'w'))
+        utils.serialize.save(self, fname, fmt=fmt)
+
+    @classmethod
+    def load(cls, fname, dbi=None, library=None):
+        """Load scene saved with Scene.save()"""
+        return utils.serialize.load(fname, dbi=dbi, library=library)
 
     @classmethod
     def from_blender(cls, scn=None, dbi=None):
@@ -15,12 +15,10 @@ priori, and which must depend on the other elements in a scene.
 """
 
 # Imports
-import re
 import os
 import copy
 import time
 import pickle
-import subprocess
 import numpy as np
 import bvp
 from matplotlib import pyplot as plt
@@ -50,6 +48,8 @@ class SceneList(object):
         self.Name = Name
         self.ScnConstr = ScnConstr # Un-used!
         self.RenderOptions=RenderOptions
+        self.render_store = None # Set by Render()
+        self.video = None # Set by Render()
         # Timing
         self.FrameRate = FrameRate
         # Other??       
@@ -305,16 +305,21 @@ class SceneList(object):
             Cat = Co+Cb+Cs
         return CatMat, Cat
     
-    def update(self, RaiseError=False):
+    def update(self, library=None, dbi=None, RaiseError=False):
         """Bring SceneList up-to-date with library / code changes.
 
         Assure that all objects / backgrounds are up-to-date with library files (semantic cats, real world size, etc.)
         Also updates potentially out-dated functions?? (THIS NEEDS TO BE CLARIFIED / CHANGED)
-        Optionally, raise an error if the "name" (unique string designating each object) has changed in the bvpLibrary
+        Optionally, raise an error if the "name" (unique string designating each object) has changed in the library
         since scene list creation.
 
         Parameters
         ----------
+        library : bvp.LibraryCache
+            cached library metadata. If None, one is created (a single bulk load) from `dbi`. 
+            Pass the same cache to multiple calls to avoid any further database queries.
+        dbi : bvp.DBInterface
+            database interface; only used if `library` is None
         RaiseError : bool | False
             Whether to raise an error if named scene elemements are missing from library.
 
@@ -322,35 +327,40 @@ class SceneList(object):
         -------
         (Nothing - modifies SceneList in place)
         """
-        Lib = bvp.bvpLibrary()
+        if library is None:
+            if dbi is None:
+                dbi = bvp.DBInterface()
+            library = bvp.LibraryCache(dbi)
         Fail=False
         for iS, S in enumerate(self.ScnList):
             # Objects
-            for iO, O in enumerate(S.Obj):
+            for iO, O in enumerate(S.objects):
+                # Placement records share (and update) their library object
+                O = getattr(O, 'source', O)
                 try:
-                    N = bvp.Object(O.name, Lib)
-                    self.ScnList[iS].Obj[iO].semantic_category = N.semantic_category
-                    self.ScnList[iS].Obj[iO].real_world_size = N.real_world_size
-                except:
+                    N = library.lookup(O)
+                    O.semantic_category = N.semantic_category
+                    O.real_world_size = N.real_world_size
+                except KeyError:
                     Fail=True
                     print('Update failed because name has been changed for scene %d object %s!\nNeeds to be manually updated!'%(iS, O.name))
             # Background
             try:
-                N = bvp.Background(S.BG.name, Lib)
-                self.ScnList[iS].BG.semantic_category = N.semantic_category
-                self.ScnList[iS].BG.real_world_size = N.real_world_size
-            except:
+                N = library.lookup(S.background)
+                S.background.semantic_category = N.semantic_category
+                S.background.real_world_size = N.real_world_size
+            except KeyError:
                 Fail=True
-                print('Update failed because name has been changed for scene %d background %s! Needs to be manually updated!'%(iS, S.BG.name))
+                print('Update failed because name has been changed for scene %d background %s! Needs to be manually updated!'%(iS, S.background.name))
             # Skies
             try:
-                N = bvp.Sky(S.Sky.name, Lib)
-                self.ScnList[iS].Sky.semantic_category = N.semantic_category
-                self.ScnList[iS].Sky.real_world_size = N.real_world_size
-            except:
-                if S.Sky.name is not None:
+                N = library.lookup(S.sky)
+                S.sky.semantic_category = N.semantic_category
+                S.sky.real_world_size = N.real_world_size
+            except KeyError:
+                if S.sky.name is not None:
                     Fail=True
-                    print('Update failed because name has been changed for scene %d sky %s! Needs to be manually updated!'%(iS, S.Sky.name))
+                    print('Update failed because name has been changed for scene %d sky %s! Needs to be manually updated!'%(iS, S.sky.name))
         # Update render options
         if hasattr(self.RenderOptions, 'file_format'):
             # Assume both need changing:
@@ -455,21 +465,22 @@ class SceneList(object):
     #       BlenderCmd = [Blender, '-b', BlendFile, '-P', BlenderPyFile]
     #       subprocess.call(BlenderCmd)
     
-    def RenderSlurm(self, RenderType=('Image', ), RenderGroupSize=3, Is_Overwrite=False, memory=7700, nCPUs='2'):
+    def RenderSlurm(self, RenderType=('Image', ), RenderGroupSize=3, Is_Overwrite=False, memory=7700, nCPUs='2', max_concurrent=None):
         """Calls separate instances of Blender via Slurm queue to render the scene list. 
         
         DEPRECATED. Simply calls SceneList.Render(..., Is_Slurm=True). Please use that in the future.
         """
-        self.Render(RenderType=RenderType, Is_Overwrite=Is_Overwrite, Is_Slurm=True, nCPUs=nCPUs, RenderGroupSize=RenderGroupSize, memory=memory)
+        self.Render(RenderType=RenderType, Is_Overwrite=Is_Overwrite, Is_Slurm=True, nCPUs=nCPUs, RenderGroupSize=RenderGroupSize, memory=memory, max_concurrent=max_concurrent)
 
-    def Render(self, RenderType=('Image', ), Is_Overwrite=False, Is_Slurm=False, nCPUs='2', RenderGroupSize=3, memory=7700):
+    def Render(self, RenderType=('Image', ), Is_Overwrite=False, Is_Slurm=False, nCPUs='2', RenderGroupSize=3, memory=7700, 
+               max_concurrent=None, executor=None, render_store=None, video=False, video_options=None):
         """Renders the scene list. 
         
         Writes three different kinds of temporary files associated with the render job:
         
         (1) a pickle (saved as .pik) file ("SLpickleFile" variable below)
-        (2) a python script to read in and do the rendering ("BlenderPyFile" variable below). Two lines written into this file determine (a) the pickled scene list file to load, and (b) the portion or chunk of the scene list to render for each job
-        (3) a shell script for use by sbatch that calls blender with each chunk's python script
+        (2) a python script to read in and do the rendering ("BlenderPyFile" variable below). Two lines written into this file determine (a) the pickled scene list file to load, and (b) the portion or chunk of the scene list to render for each job (from the job array task index)
+        (3) a shell script that calls blender with the python script; this is run once per chunk, as one job array
         
         Parameters
         ----------
@@ -487,9 +498,27 @@ class SceneList(object):
             For Is_Slurm=False, this is not really useful, since all jobs are done serially. This parameter
             will still determines how often Blender closes and re-opens a new instance, which *SHOULD NOT* 
             have any effect so long as each scene is correctly cleared (but there may still be bugs here))
-        memory : int
-            Maximum memory required for the job (in MB). For Is_Slurm=True only. 
-            This is difficult to estimate... Aim high!
+        memory : int | array
+            Maximum memory required for each chunk (in MB). For Is_Slurm=True only. 
+            This is difficult to estimate... Aim high! Can also be an array of measured 
+            peak memory for each scene (see bvp.utils.jobs.scene_memory), from which 
+            memory per chunk is computed.
+        max_concurrent : int | None
+            Maximum number of chunks to render at once (sbatch --array=...%N)
+        executor : bvp.utils.jobs.SlurmArrayExecutor | bvp.utils.jobs.LocalExecutor | None
+            Runs the job array. Defaults to SlurmArrayExecutor() if Is_Slurm is True, 
+            otherwise LocalExecutor() (chunks rendered one at a time on this machine).
+        render_store : str | None
+            Directory of a shared render store (see bvp.utils.render_store). Scenes 
+            already in the store (e.g. rendered as part of another scene list) are 
+            linked into the output directory instead of rendered; newly rendered 
+            scenes are added to the store.
+        video : bool
+            Whether to encode rendered frames of each scene to a video (in the Movies
+            folder of the render directory), while the next scenes in each chunk render.
+        video_options : dict | None
+            Keyword arguments for bvp.utils.video.VideoEncoder (e.g. delete_frames, 
+            max_workers, codec, crf).
 
         TO DO: 
         Add gpu render option??
@@ -606,6 +635,9 @@ class SceneList(object):
         # Save scene list as a temporary pickle file to be loaded by the RenderFile
         rName = 'ScnListRender_%s%s_%s'%(self.Name, LogAdd, time.strftime('%Y%m%d_%H%M%S'))
         SLpickleFile = os.path.join(BaseDir, 'Log', rName+'.pik') 
+        # Render script reads render store path & video options from pickled scene list
+        self.render_store = render_store
+        self.video = dict(video_options or {}) if video else None
         bvpu.basics.save_pik(self, SLpickleFile)
         # Set up text files to be loaded in the render process 
         BlenderPyFileBase = self.RenderOptions.BVPopts['RenderFile']
@@ -614,52 +646,24 @@ class SceneList(object):
             RenderScript = fid.readlines()
         # Set up first of two lines to print into temp file:
         FileToLoadLine = "TempFile = '%s'\n"%SLpickleFile #os.path.join(bvp.__path__[0], 'Scripts', 'CurrentRender.pik')
-        jobIDs = []
-        for x in range(nChunks):
-            if x == nChunks-1:
-                Ch, Leftovers = divmod(self.nScenes, nChunks)
-                if Leftovers:
-                    RenderTo=Leftovers
-                else:
-                    RenderTo=RenderGroupSize
-            else:
-                RenderTo=RenderGroupSize
-            ScnToRenderLine = 'ScnToRender = range(%d, %d)\n'%(x*RenderGroupSize, x*RenderGroupSize+RenderTo)
-            InsertLine1 = RenderScript.index('### --- REPLACE 1 --- ###\n')+1
-            InsertLine2 = RenderScript.index('### --- REPLACE 2 --- ###\n')+1
-            RenderScript[InsertLine1] = FileToLoadLine
-            RenderScript[InsertLine2] = ScnToRenderLine
-            ChunkfNm = '%s_chunk%03d.py'%(rName, x+1)
-            BlenderPyFile = os.path.join(BaseDir, 'Log', ChunkfNm) # Add datestr to "Log" ? 
-            with open(BlenderPyFile, 'w') as fid:
-                fid.writelines(RenderScript)
-
-            if not Is_Slurm:
-                BlenderCmd = [Blender, '-b', BlendFile, '-P', BlenderPyFile]
-                subprocess.call(BlenderCmd)
-            else:
-                ### --- Call via slurm --- ###
-                BlenderCmd = Blender+' -b '+BlendFile+' -P '+BlenderPyFile
-            
-                # Create & call slurm script for this chunk
-                TempScriptName = os.path.join(BaseDir, 'Log', '%s_chunk%03d.sh'%(rName, x+1))
-                with open(TempScriptName, 'wb') as fid:
-                    fid.write('#!/bin/sh\n')
-                    fid.write('#SBATCH\n')
-                    fid.write(BlenderCmd)
-                    # Cleanup (move to .done file instead?)
-                    #fid.write('rm '+BlenderPyFile) 
-                    #fid.write('rm '+TempScriptName) 
-                SlurmOut = os.path.join(BaseDir, 'Log', '%s_chunk%03d_SlurmLog_hID=%%N'%(rName, x+1))
-                #SlurmJob = "BVPrender_Chunk%03d"
-                SlurmCmd = ['sbatch', '-c', nCPUs, '-p', 'all', '--mem', str(memory), '-o', SlurmOut, TempScriptName]
-                #SlurmCmd = ['sbatch', '-c', nCPUs, '-w', 'ibogaine', TempScriptName, '-o', SlurmOut]
-                if bvp.Verbosity_Level>3:
-                    print('Calling:')
-                    print(SlurmCmd)
-                stdOut = subprocess.check_output(SlurmCmd).decode('utf-8')
-                jobID = re.search('(?<=Submitted batch job )[0-9]*', stdOut).group()
-                jobIDs.append(jobID)
+        # One script for all chunks; each array task renders the chunk given by its task ID
+        InsertLine1 = RenderScript.index('### --- REPLACE 1 --- ###\n')+1
+        InsertLine2 = RenderScript.index('### --- REPLACE 2 --- ###\n')+1
+        RenderScript[InsertLine1] = FileToLoadLine
+        RenderScript[InsertLine2] = ('ScnToRender = bvp.utils.jobs.chunk_range(bvp.utils.jobs.task_id(), len(SL.ScnList), %d)\n'%RenderGroupSize)
+        BlenderPyFile = os.path.join(BaseDir, 'Log', '%s.py'%rName)
+        with open(BlenderPyFile, 'w') as fid:
+            fid.writelines(RenderScript)
+        BlenderCmd = ' '.join([Blender, '-b', BlendFile, '-P', BlenderPyFile])
+        TempScriptName = bvpu.jobs.write_array_script(os.path.join(BaseDir, 'Log', '%s.sh'%rName), BlenderCmd)
+        if executor is None:
+            executor = bvpu.jobs.SlurmArrayExecutor() if Is_Slurm else bvpu.jobs.LocalExecutor()
+        if not np.isscalar(memory):
+            memory = bvpu.jobs.task_memory(memory)
+        if bvp.Verbosity_Level>3:
+            print('Submitting %d chunks to %s'%(nChunks, executor))
+        jobIDs = executor.submit(TempScriptName, nChunks, name=rName, log_dir=os.path.join(BaseDir, 'Log'), 
+                                 max_concurrent=max_concurrent, memory=memory, cpus=nCPUs)
         # Re-set SceneList rendering options:
         self.RenderOptions.BVPopts = BVPoptOrig
         if 'Test' in RenderType:
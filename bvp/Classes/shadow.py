@@ -46,8 +46,11 @@ class Shadow(MappedClass):
         S = '\n ~S~ Shadow "%s" ~S~\n'%self.name
         return S
         
-    def place(self, scn=None, scale=None):
+    def place(self, scn=None, scale=None, asset_cache=None):
         """Adds shadow object to Blender scene
+
+        If `asset_cache` (a bvp.utils.blender.AssetCache) is provided, the shadow 
+        is linked only once per Blender session.
         """
         # Make file local, if it isn't already
         self.cloud_download()
@@ -55,7 +58,7 @@ class Shadow(MappedClass):
             scn = bpy.context.scene # Get current scene if input not supplied
         if self.name:
             # Add group of mesh object(s)
-            shadow_ob = add_group(self.name, self.fname, self.path)
+            shadow_ob = add_group(self.name, self.fname, self.path, asset_cache=asset_cache)
         if scale is not None:
             sz = scale / self.real_world_size[0] # most skies are 100x100 in area
             bpy.ops.transform.resize(value=(sz, sz, sz))            
\ No newline at end of file
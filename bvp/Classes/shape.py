@@ -5,15 +5,29 @@ TO DO: generalize so that these can be used outside of Blender? Or do we care, b
 Blender is our storage for all mesh geometry...?
 """
 import bvp
+import os
 import numpy as np
-#from scipy import sparse
-#import scipy.sparse.linalg as la
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.spatial import distance
+import scipy.sparse.linalg as la
+import scipy.linalg
 import functools
+import multiprocessing
 
-if bvp.Is_Blender:
-    from bvp.utils.blender import grab_only
-    import mathutils as bmu
+try:
+    import numexpr as ne
+    has_numexpr = True
+except ImportError:
+    has_numexpr = False
+
+try:
     import bpy
+    import mathutils as bmu
+    from bvp.utils.blender import grab_only
+    is_blender = True
+except ImportError:
+    is_blender = False
 
 
 def _memo(fn):
@@ -193,6 +207,22 @@ class Shape(object):
         polys = np.vstack([poly + n for poly, n in zip(poly_list, to_add)])
         edges = np.vstack([edge + n for edge, n in zip(edge_list, to_add)])
         return pts, polys, edges # pt_list, poly_list #, edge_list
+
+    @classmethod
+    def from_off(cls, fname, cache=True, **kwargs):
+        """Load Shape from an OFF (or COFF / NOFF) mesh file
+
+        Parameters
+        ----------
+        fname : str
+            .off file name
+        cache : bool
+            whether to cache parsed mesh as a .npz file (see bvp.utils.mesh_io.read_off)
+        kwargs : 
+            passed to Shape.__init__ (e.g. `make_object`)
+        """
+        pts, polys = bvp.utils.mesh_io.read_off(fname, cache=cache)
+        return cls(pts, polys, **kwargs)
         
     @property
     @_memo
@@ -208,8 +238,6 @@ class Shape(object):
         """
         npt = len(self.pts)
         npoly = len(self.polys)
-        print(npt)
-        print(npoly)
         return sparse.coo_matrix((np.ones((3*npoly, )), # data
                                   (np.hstack(self.polys.T), # row
                                    np.tile(range(npoly), (1, 3)).squeeze())), # col
@@ -228,7 +256,61 @@ class Shape(object):
         adj3 = sparse.coo_matrix((np.ones((npoly, )), 
                                   (self.polys[:, 1], self.polys[:, 2])), (npt, npt))
         return (adj1 + adj2 + adj3).tocsr()
-    
+
+    @property
+    @_memo
+    def _edge_topology(self):
+        """Unique edges (n_edges, 2), edge index for each side of each face (total_polys, 3), 
+        and number of faces sharing each edge (n_edges, )
+        """
+        return _unique_edges(self.polys)
+
+    @property
+    def mesh_edges(self):
+        """Unique (sorted) vertex index pairs for all edges in the mesh"""
+        return self._edge_topology[0]
+
+    @property
+    @_memo
+    def vertex_neighbors(self):
+        """Symmetric sparse (CSR) vertex adjacency matrix, with one entry per edge.
+        Neighbors of vertex i are vertex_neighbors.indices[indptr[i]:indptr[i+1]].
+        """
+        npt = len(self.pts)
+        edges = self.mesh_edges
+        ii = np.concatenate([edges[:, 0], edges[:, 1]])
+        jj = np.concatenate([edges[:, 1], edges[:, 0]])
+        return sparse.csr_matrix((np.ones(len(ii), dtype=np.int8), (ii, jj)), (npt, npt))
+
+    def neighbors(self, verts):
+        """Indices of all vertices that share an edge with any vertex in `verts` (excluding `verts`)"""
+        verts = np.atleast_1d(verts)
+        nbrs = np.unique(self.vertex_neighbors[verts].indices)
+        return np.setdiff1d(nbrs, verts, assume_unique=True)
+
+    @property
+    def boundary_edges(self):
+        """Edges that belong to only one face (n_boundary_edges, 2)"""
+        edges, face_edges, n_faces = self._edge_topology
+        return edges[n_faces == 1]
+
+    @property
+    @_memo
+    def boundary_loops(self):
+        """List of closed vertex index loops around each hole in the mesh"""
+        return list(trace_poly(self.boundary_edges))
+
+    @property
+    @_memo
+    def connected_components(self):
+        """Labels for connected pieces of the mesh: (n_components, labels)
+
+        n_components is the number of connected components (unreferenced 
+        vertices each count as one); labels is a (total_verts, ) array of the
+        component index for each vertex.
+        """
+        return csgraph.connected_components(self.vertex_neighbors, directed=False)
+
     @property
     @_memo
     def face_normals(self):
@@ -421,10 +503,10 @@ class Shape(object):
         fa = self.face_areas
 
         # numexpr is much faster than doing this using numpy!
-        #gradu = ((fe12.T * pu[:, 2] +
-        #          fe23.T * pu[:, 0] +
-        #          fe31.T * pu[:, 1]) / (2 * self.face_areas)).T
-        gradu = np.nan_to_num(ne.evaluate("(fe12 * pu3 + fe23 * pu1 + fe31 * pu2) / (2 * fa)").T)
+        if has_numexpr:
+            gradu = np.nan_to_num(ne.evaluate("(fe12 * pu3 + fe23 * pu1 + fe31 * pu2) / (2 * fa)").T)
+        else:
+            gradu = np.nan_to_num(((fe12 * pu3 + fe23 * pu1 + fe31 * pu2) / (2 * fa)).T)
         
         if at_verts:
             return (self.connected.dot(gradu).T / self.connected.sum(1).A.squeeze()).T
@@ -606,27 +688,12 @@ class Shape(object):
             vertex in `verts`.
         """
         npt = len(self.pts)
-        if m not in self._rlfac_solvers:
-            B, D, W, V = self.laplace_operator
-            nLC = W - V # negative laplace matrix
-            if not fem:
-                spD = sparse.dia_matrix((D, [0]), (npt, npt)).tocsr() # lumped mass matrix
-            else:
-                spD = B
-            
-            t = m * self.avg_edge_length ** 2 # time of heat evolution
-            lfac = spD - t * nLC # backward Euler matrix
-
-            # Exclude rows with zero weight (these break the sparse LU, that finicky fuck)
-            goodrows = np.nonzero(~np.array(lfac.sum(0) == 0).ravel())[0]
-            self._goodrows = goodrows
-            self._rlfac_solvers[m] = sparse.linalg.dsolve.factorized(lfac[goodrows][:, goodrows])
-            self._nLC_solvers[m] = sparse.linalg.dsolve.factorized(nLC[goodrows][:, goodrows])
+        rlfac_solver, nLC_solver = self._geodesic_solvers(m, fem)
 
         # Solve system to get u, the heat values
         u0 = np.zeros((npt, )) # initial heat values
         u0[verts] = 1.0
-        goodu = self._rlfac_solvers[m](u0[self._goodrows])
+        goodu = rlfac_solver(u0[self._goodrows])
         u = np.zeros((npt, ))
         u[self._goodrows] = goodu
 
@@ -636,8 +703,12 @@ class Shape(object):
         # Compute X (normalized grad u)
         #X = np.nan_to_num((-gradu.T / np.sqrt((gradu**2).sum(1))).T)
         graduT = gradu.T
-        gusum = ne.evaluate("sum(gradu ** 2, 1)")
-        X = np.nan_to_num(ne.evaluate("-graduT / sqrt(gusum)").T)
+        if has_numexpr:
+            gusum = ne.evaluate("sum(gradu ** 2, 1)")
+            X = np.nan_to_num(ne.evaluate("-graduT / sqrt(gusum)").T)
+        else:
+            gusum = (gradu ** 2).sum(1)
+            X = np.nan_to_num((-graduT / np.sqrt(gusum)).T)
 
         # Compute integrated divergence of X at each vertex
         ppts = self.ppts
@@ -651,7 +722,7 @@ class Shape(object):
         divx = conn1.dot(x1) + conn2.dot(x2) + conn3.dot(x3)
 
         # Compute phi (distance)
-        goodphi = self._nLC_solvers[m](divx[self._goodrows])
+        goodphi = nLC_solver(divx[self._goodrows])
         phi = np.zeros((npt, ))
         phi[self._goodrows] = goodphi - goodphi.min()
 
@@ -660,6 +731,106 @@ class Shape(object):
 
         return phi
 
+    def _geodesic_solvers(self, m, fem=False):
+        """Sparse LU solvers for heat (backward Euler) & Poisson steps of geodesic distance computation
+
+        Solvers are cached per `m`, and accept either vectors or (n, k) arrays (for
+        solving for k right-hand sides at once).
+        """
+        npt = len(self.pts)
+        if m not in self._rlfac_solvers:
+            B, D, W, V = self.laplace_operator
+            nLC = W - V # negative laplace matrix
+            if not fem:
+                spD = sparse.dia_matrix((D, [0]), (npt, npt)).tocsr() # lumped mass matrix
+            else:
+                spD = B
+            
+            t = m * self.avg_edge_length ** 2 # time of heat evolution
+            lfac = spD - t * nLC # backward Euler matrix
+
+            # Exclude rows with zero weight (these break the sparse LU, that finicky fuck)
+            goodrows = np.nonzero(~np.array(lfac.sum(0) == 0).ravel())[0]
+            self._goodrows = goodrows
+            self._rlfac_solvers[m] = la.splu(lfac[goodrows][:, goodrows].tocsc()).solve
+            self._nLC_solvers[m] = la.splu(nLC[goodrows][:, goodrows].tocsc()).solve
+        return self._rlfac_solvers[m], self._nLC_solvers[m]
+
+    def geodesic_distance_matrix(self, sources, m=2.0, fem=False, out=None, chunk_size=32, dtype=np.double):
+        """Geodesic distance from each of many source vertices (or vertex sets) to every vertex
+
+        Batched version of `geodesic_distance`. Heat and Poisson systems are solved for 
+        `chunk_size` sources at once (as multiple right-hand sides to the same cached 
+        sparse LU factorizations), and rows of the distance matrix are written to 
+        `out` one chunk at a time, so `out` can be a memory-mapped file larger than 
+        memory.
+
+        Parameters
+        ----------
+        sources : list
+            list of source vertex indices, or of lists of vertex indices (row `i` of the 
+            output is the distance to the closest vertex in `sources[i]`)
+        m : float, optional
+            Reverse Euler step length (see `geodesic_distance`)
+        fem : bool, optional
+            Whether to use Finite Element Method mass matrix (see `geodesic_distance`)
+        out : str or array, optional
+            .npy file name for a memory-mapped output array, or an existing 
+            (n_sources, total_verts) array (or memmap) to fill. If None, a new array is created.
+        chunk_size : int, optional
+            number of sources to solve for at once. Memory use scales with 
+            chunk_size * total_polys.
+        dtype : np.dtype, optional
+            data type of output, if a new output array is created
+
+        Returns
+        -------
+        dist : 2D ndarray or memmap, shape (n_sources, total_verts)
+            Geodesic distance from each source (set) to each vertex in the surface.
+        """
+        npt = len(self.pts)
+        n_sources = len(sources)
+        if out is None:
+            out = np.zeros((n_sources, npt), dtype=dtype)
+        elif isinstance(out, str):
+            out = np.lib.format.open_memmap(out, mode='w+', dtype=dtype, shape=(n_sources, npt))
+        npoly = len(self.polys)
+        rlfac_solver, nLC_solver = self._geodesic_solvers(m, fem)
+        goodrows = self._goodrows
+        grad = self._gradient_operator
+        div = self._divergence_operator
+        for start in range(0, n_sources, chunk_size):
+            chunk = sources[start:start + chunk_size]
+            n = len(chunk)
+            # Initial heat values, one column per source set
+            rows = np.concatenate([np.ravel(v) for v in chunk]).astype(np.int64)
+            cols = np.repeat(np.arange(n), [np.size(v) for v in chunk])
+            u0 = np.zeros((npt, n))
+            u0[rows, cols] = 1.0
+            # Solve heat systems
+            u = np.zeros((npt, n))
+            u[goodrows] = rlfac_solver(u0[goodrows])
+            # Normalized (negative) gradient of u at each face: (total_polys, 3, n)
+            gradu = grad.dot(u).reshape(npoly, 3, n)
+            if has_numexpr:
+                gunorm = np.sqrt(ne.evaluate("sum(gradu ** 2, 1)"))[:, np.newaxis, :]
+                X = np.nan_to_num(ne.evaluate("-gradu / gunorm"))
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    X = np.nan_to_num(-gradu / np.sqrt((gradu ** 2).sum(1))[:, np.newaxis, :])
+            # Integrated divergence of X at each vertex
+            divx = div.dot(X.reshape(3 * npoly, n))
+            # Solve Poisson systems to get distance
+            goodphi = nLC_solver(divx[goodrows])
+            phi = np.zeros((npt, n))
+            phi[goodrows] = goodphi - goodphi.min(0)
+            # Ensure that distance is zero for source verts
+            phi[rows, cols] = 0.0
+            out[start:start + n] = phi.T
+            if isinstance(out, np.memmap):
+                out.flush()
+        return out
+
     @property
     @_memo
     def _cot_edge(self):
@@ -673,6 +844,43 @@ class Shape(object):
         c21 = c2 - c1
         return c32, c13, c21
 
+    @property
+    @_memo
+    def _gradient_operator(self):
+        """Sparse (3 * total_polys, total_verts) matrix mapping vertex values to 
+        per-face gradients (flattened (total_polys, 3) rows), as in `surface_gradient`"""
+        npt = len(self.pts)
+        npoly = len(self.polys)
+        fa2 = 2 * self.face_areas[:, np.newaxis]
+        rows = np.arange(3 * npoly).reshape(npoly, 3)
+        data, ii, jj = [], [], []
+        # fe12 weights the 3rd vertex, fe23 the 1st, fe31 the 2nd
+        for fe, vert in zip(self._facenorm_cross_edge, (2, 0, 1)):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                w = fe / fa2
+            w[~np.isfinite(w)] = 0
+            data.append(w.ravel())
+            ii.append(rows.ravel())
+            jj.append(np.repeat(self.polys[:, vert], 3))
+        return sparse.coo_matrix((np.concatenate(data), (np.concatenate(ii), np.concatenate(jj))), 
+                                 (3 * npoly, npt)).tocsr()
+
+    @property
+    @_memo
+    def _divergence_operator(self):
+        """Sparse (total_verts, 3 * total_polys) matrix mapping per-face vectors 
+        (flattened (total_polys, 3) rows) to integrated divergence at each vertex"""
+        npt = len(self.pts)
+        npoly = len(self.polys)
+        cols = np.arange(3 * npoly)
+        data, ii, jj = [], [], []
+        for c, vert in zip(self._cot_edge, (0, 1, 2)):
+            data.append(0.5 * c.ravel())
+            ii.append(np.repeat(self.polys[:, vert], 3))
+            jj.append(cols)
+        return sparse.coo_matrix((np.concatenate(data), (np.concatenate(ii), np.concatenate(jj))), 
+                                 (npt, 3 * npoly)).tocsr()
+
     @property
     @_memo
     def _polyconn(self):
@@ -690,31 +898,63 @@ class Shape(object):
         """NetworkX undirected graph representing this Surface.
         """
         import networkx as nx
-        def iter_surfedges(tris):
-            for a, b, c in tris:
-                yield a, b
-                yield b, c
-                yield a, c
-
-        def make_surface_graph(tris):
-            graph = nx.Graph()
-            graph.add_edges_from(iter_surfedges(tris))
-            return graph
-
-        return make_surface_graph(self.polys)
+        graph = nx.Graph()
+        graph.add_edges_from(self.mesh_edges.tolist())
+        return graph
     # ML additions:
     #@property
     #@_memo
     # Don't want _memo, b/c input k makes it complicated...?
-    def evecs(self, k=None):
+    def evecs(self, k=None, sigma=-0.01):
+        """Eigenvalues & eigenvectors of the Laplace-Beltrami operator with the smallest eigenvalues
+
+        Solves the generalized eigenproblem A x = lambda B x (A is the stiffness
+        matrix, B is the FEM mass matrix) in shift-invert mode around `sigma`. The 
+        factorization of (A - sigma B) is cached, so subsequent calls (e.g. with 
+        larger `k`) are much faster. 
+
+        Parameters
+        ----------
+        k : int | None
+            number of eigenpairs to compute. If None (or if k is close to the number 
+            of vertices), all eigenpairs are computed with a dense solver.
+        sigma : float
+            shift for shift-invert mode. Should be slightly below zero (the smallest 
+            eigenvalue), so that (A - sigma B) is not singular.
+
+        Returns
+        -------
+        evals : array
+            (k, ) eigenvalues, in ascending order
+        evecs : array
+            (n_vertices, k) eigenvectors
+        """
+        npt = len(self.pts)
         B, D, W, V = self.laplace_operator
-        A = V-W
-        if k is None:
+        A = (V-W).tocsr()
+        B = B.tocsr()
+        # Exclude unreferenced vertices (zero rows make the factorization singular)
+        goodrows = np.nonzero(np.asarray(B.sum(0)).ravel() != 0)[0]
+        n_good = len(goodrows)
+        if (k is None) or (k >= n_good - 1):
             # All eigenvectors of LBO
-            n = int(len(self.pts)-1)
+            A_, B_ = A[goodrows][:, goodrows], B[goodrows][:, goodrows]
+            evals, goodvecs = scipy.linalg.eigh(A_.toarray(), B_.toarray())
+            if k is not None:
+                evals, goodvecs = evals[:k], goodvecs[:, :k]
         else:
-            n = k
-        evals, evecs = la.eigsh(A, M=B, k=n, which="SM")
+            key = ('evecs_solver', sigma)
+            if key not in self._cache:
+                A_, B_ = A[goodrows][:, goodrows], B[goodrows][:, goodrows]
+                lu = la.splu((A_ - sigma * B_).tocsc())
+                OPinv = la.LinearOperator((n_good, n_good), matvec=lu.solve, dtype=np.double)
+                self._cache[key] = (A_, B_, OPinv)
+            A_, B_, OPinv = self._cache[key]
+            evals, goodvecs = la.eigsh(A_, M=B_, k=k, sigma=sigma, which='LM', OPinv=OPinv)
+            order = np.argsort(evals)
+            evals, goodvecs = evals[order], goodvecs[:, order]
+        evecs = np.zeros((npt, len(evals)))
+        evecs[goodrows] = goodvecs
         return evals, evecs
 
     def evec_varexp(self, nevs=None):
@@ -832,40 +1072,33 @@ class Shape(object):
         node = seed
         if seed is None:
             node = np.random.randint(len(self.pts))
+        # Breadth-first rank of each vertex; each face is added with its first-visited vertex
+        order = csgraph.breadth_first_order(self.vertex_neighbors, node, directed=False, 
+                                            return_predecessors=False)
+        rank = np.full(len(self.pts), len(self.pts))
+        rank[order] = np.arange(len(order))
+        face_rank = rank[self.polys].min(1)
+        reached = np.sort(face_rank[face_rank < len(self.pts)])
+        if len(reached) > nfaces:
+            # Stop after the vertex that brings the number of faces to nfaces
+            faces = np.nonzero(face_rank <= reached[nfaces - 1])[0]
+        else:
+            faces = np.nonzero(face_rank < len(self.pts))[0]
+        faces = faces[np.argsort(face_rank[faces], kind='stable')]
 
-        ptmap = dict()
-        queue = [node]
-        faces = set()
-        visited = set([node])
-        while len(faces) < nfaces and len(queue) > 0:
-            node = queue.pop(0)
-            for face in self.connected[node].indices:
-                if face not in faces:
-                    faces.add(face)
-                    for pt in self.polys[face]:
-                        if pt not in visited:
-                            visited.add(pt)
-                            queue.append(pt)
-
-        pts, aux, polys = [], [], []
-        for face in faces:
-            for pt in self.polys[face]:
-                if pt not in ptmap:
-                    ptmap[pt] = len(pts)
-                    pts.append(self.pts[pt])
-                    if auxpts is not None:
-                        aux.append(auxpts[pt])
-            polys.append([ptmap[p] for p in self.polys[face]])
-
+        ptidx, polys = np.unique(self.polys[faces], return_inverse=True)
+        polys = polys.reshape(-1, 3)
+        pts = self.pts[ptidx]
         if auxpts is not None:
-            return np.array(pts), np.array(aux), np.array(polys)
+            return pts, np.asarray(auxpts)[ptidx], polys
 
-        return np.array(pts), np.array(polys)
+        return pts, polys
 
     def polyhedra(self, wm):
         """Iterates through the polyhedra that make up the closest volume to a certain vertex"""
-        for p, facerow in enumerate(self.connected):
-            faces = facerow.indices
+        connected = self.connected
+        for p in range(connected.shape[0]):
+            faces = connected.indices[connected.indptr[p]:connected.indptr[p + 1]]
             pts, polys = _ptset(), _quadset()
             if len(faces) > 0:
                 poly = np.roll(self.polys[faces[0]], -np.nonzero(self.polys[faces[0]] == p)[0][0])
@@ -915,8 +1148,9 @@ class Shape(object):
             stack = np.vstack([mid, left, right, pts[p]])
             return stack[(distance.cdist(stack, stack) == 0).sum(0) == 1]
 
-        for p, facerow in enumerate(self.connected):
-            faces = facerow.indices
+        connected = self.connected
+        for p in range(connected.shape[0]):
+            faces = connected.indices[connected.indptr[p]:connected.indptr[p + 1]]
             if len(faces) > 0:
                 if n == 1:
                     if auxpts is not None:
@@ -1037,48 +1271,67 @@ def make_cube(center=(.5, .5, .5), size=1):
                       (0, 6, 2), (0, 4, 6), (4, 7, 6), (4, 5, 7)], dtype=np.uint32)
     return pts * size + center, polys
 
+def _unique_edges(polys):
+    """Unique edges of a mesh, with faces per edge
+
+    Parameters
+    ----------
+    polys : array
+        (n_faces, 3) array of vertex indices
+
+    Returns
+    -------
+    edges : array
+        (n_edges, 2) sorted vertex index pairs, in lexicographic order
+    face_edges : array
+        (n_faces, 3) index into `edges` for edges (0, 1), (1, 2), (0, 2) of each face
+    n_faces : array
+        (n_edges, ) number of faces that share each edge
+    """
+    polys = np.asarray(polys, dtype=np.int64)
+    all_edges = np.sort(polys[:, [[0, 1], [1, 2], [0, 2]]], axis=2).reshape(-1, 2)
+    if len(all_edges) == 0:
+        return np.zeros((0, 2), dtype=np.int64), np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    n = all_edges.max() + 1
+    keys = all_edges[:, 0] * n + all_edges[:, 1]
+    ukeys, face_edges, n_faces = np.unique(keys, return_inverse=True, return_counts=True)
+    edges = np.vstack([ukeys // n, ukeys % n]).T
+    return edges, face_edges.reshape(-1, 3), n_faces
+
 def boundary_edges(polys):
     """Returns the edges that are on the boundary of a mesh, as defined by belonging to only 1 face"""
     # AKA non-manifold edges? 
-    edges = dict()
-    for i, poly in enumerate(np.sort(polys)):
-        for a, b in [(0, 1), (1, 2), (0, 2)]:
-            key = poly[a], poly[b]
-            if key not in edges:
-                edges[key] = []
-            edges[key].append(i)
-
-    epts = []
-    for edge, faces in edges.items():
-        if len(faces) == 1:
-            epts.append(edge)
-
-    return np.array(epts)
+    edges, face_edges, n_faces = _unique_edges(polys)
+    return edges[n_faces == 1]
 
 def trace_poly(edges):
     """Given a disjoint set of edges, yield complete linked polygons"""
-    idx = dict((i, set([])) for i in np.unique(edges))
-    for i, (x, y) in enumerate(edges):
-        idx[x].add(i)
-        idx[y].add(i)
-
-    eset = set(range(len(edges)))
-    while len(eset) > 0:
-        eidx = eset.pop()
-        poly = list(edges[eidx])
-        stack = set([eidx])
-        while poly[-1] != poly[0] or len(poly) == 1:
-            next = list(idx[poly[-1]] - stack)[0]
-            eset.remove(next)
-            stack.add(next)
-            if edges[next][0] == poly[-1]:
-                poly.append(edges[next][1])
-            elif edges[next][1] == poly[-1]:
-                poly.append(edges[next][0])
-            else:
-                raise Exception
-
-        yield poly
+    edges = np.asarray(edges, dtype=np.int64)
+    if len(edges) == 0:
+        # No boundary (e.g. closed mesh)
+        return
+    verts, ee = np.unique(edges, return_inverse=True)
+    ee = ee.reshape(-1, 2)
+    nv = len(verts)
+    # Two neighbors for each vertex
+    src = np.concatenate([ee[:, 0], ee[:, 1]])
+    dst = np.concatenate([ee[:, 1], ee[:, 0]])
+    if np.any(np.bincount(src, minlength=nv) != 2):
+        raise ValueError('Edges do not form disjoint closed loops')
+    nbr = dst[np.argsort(src, kind='stable')].reshape(nv, 2)
+    graph = sparse.csr_matrix((np.ones(len(src)), (src, dst)), (nv, nv))
+    n_loops, labels = csgraph.connected_components(graph, directed=False)
+    # Walk around all loops at once, from one start vertex per loop
+    _, starts, lengths = np.unique(labels, return_index=True, return_counts=True)
+    walk = np.zeros((lengths.max(), n_loops), dtype=np.int64)
+    prev, cur = starts, starts
+    for step in range(lengths.max()):
+        walk[step] = cur
+        nxt = np.where(nbr[cur, 0] == prev, nbr[cur, 1], nbr[cur, 0])
+        prev, cur = cur, nxt
+    for i in range(n_loops):
+        poly = verts[walk[:lengths[i], i]].tolist()
+        yield poly + poly[:1]
 
 def rasterize(poly, shape=(256, 256)):
     #ImageDraw sucks at its job, so we'll use imagemagick to do rasterization
@@ -1286,6 +1539,134 @@ def make_vertex_color_material(ob):
 def show_ica(ob, ):
     pass
 
+class SpectralStore(object):
+    """On-disk store of Laplace-Beltrami eigenpairs for many shapes, keyed by object ID
+
+    Each object's eigenpairs are stored in a separate .npz file in `path`, so 
+    results can be written as they are computed (by `batch_evecs`) and partial
+    results survive an interrupted run.
+    """
+    def __init__(self, path):
+        """Open (or create) a store
+
+        Parameters
+        ----------
+        path : str
+            directory for .npz files
+        """
+        self.path = path
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def _fname(self, key):
+        return os.path.join(self.path, '%s.npz'%key)
+
+    def __contains__(self, key):
+        return os.path.exists(self._fname(key))
+
+    def __getitem__(self, key):
+        """Get (evals, evecs) for object `key`"""
+        if not key in self:
+            raise KeyError(key)
+        with np.load(self._fname(key), allow_pickle=False) as npz:
+            return npz['evals'], npz['evecs']
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        return sorted(os.path.splitext(f)[0] for f in os.listdir(self.path) if f.endswith('.npz'))
+
+    def n_evecs(self, key):
+        """Number of eigenpairs stored for object `key` (0 if none)"""
+        if not key in self:
+            return 0
+        with np.load(self._fname(key), allow_pickle=False) as npz:
+            return len(npz['evals'])
+
+    def save(self, key, evals, evecs):
+        """Save eigenpairs for object `key` (written to a temp file first, so files are never partial)"""
+        tmp = self._fname(key)[:-4] + '_tmp.npz'
+        np.savez(tmp, evals=evals, evecs=evecs.astype(np.float32))
+        os.replace(tmp, self._fname(key))
+
+
+def _load_shape(mesh):
+    """Shape from a Shape, a (pts, polys) tuple, or an OFF file name"""
+    if isinstance(mesh, Shape):
+        return mesh
+    if isinstance(mesh, str):
+        return Shape.from_off(mesh)
+    pts, polys = mesh
+    return Shape(np.asarray(pts), np.asarray(polys))
+
+
+def _shape_evecs(args):
+    key, mesh, k, sigma = args
+    evals, evecs = _load_shape(mesh).evecs(k=k, sigma=sigma)
+    return key, evals, evecs
+
+
+def batch_evecs(meshes, k=100, store=None, sigma=-0.01, n_jobs=None, overwrite=False, is_verbose=False):
+    """Compute the first `k` Laplace-Beltrami eigenpairs for many meshes in parallel
+
+    Meshes are processed in a process pool, and results are written to a 
+    SpectralStore as each mesh is finished. Meshes that already have at least `k` 
+    eigenpairs in the store are skipped, so an interrupted run can be resumed
+    by calling this function again with the same arguments.
+
+    Parameters
+    ----------
+    meshes : dict or list
+        {object_id: mesh} dict or list of (object_id, mesh) tuples. Each mesh can be
+        a Shape, a (pts, polys) tuple, or the name of an OFF file.
+    k : int
+        number of eigenpairs per mesh
+    store : str or SpectralStore
+        store (or directory for store) for results. If None, results are only returned.
+    sigma : float
+        shift for shift-invert mode (see Shape.evecs)
+    n_jobs : int
+        number of processes. Defaults to number of CPUs; 1 computes in this process.
+    overwrite : bool
+        if True, recompute eigenpairs already in the store
+    is_verbose : bool
+        print progress
+
+    Returns
+    -------
+    store : SpectralStore or dict
+        store with results, or {object_id: (evals, evecs)} dict if `store` is None
+    """
+    if isinstance(meshes, dict):
+        meshes = list(meshes.items())
+    if isinstance(store, str):
+        store = SpectralStore(store)
+    results = {} if store is None else store
+    to_do = [(key, mesh, k, sigma) for key, mesh in meshes
+             if overwrite or (store is None) or (store.n_evecs(key) < k)]
+    if is_verbose:
+        print('Computing eigenpairs for %d of %d meshes'%(len(to_do), len(meshes)))
+    if n_jobs == 1:
+        output = (_shape_evecs(args) for args in to_do)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(n_jobs)
+        output = pool.imap_unordered(_shape_evecs, to_do)
+    try:
+        for i, (key, evals, evecs) in enumerate(output):
+            if store is None:
+                results[key] = (evals, evecs)
+            else:
+                store.save(key, evals, evecs)
+            if is_verbose:
+                print('Done with %s (%d/%d)'%(key, i+1, len(to_do)))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return results
+
 # Test script:
 """
 from bvp.utils import shape
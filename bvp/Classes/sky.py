@@ -155,8 +155,11 @@ class Sky(MappedClass):
                 'environment_color': 'SKY_COLOR',
             })
 
-    def place(self, number=0, scn=None, scale=None, proxy=False):
+    def place(self, number=0, scn=None, scale=None, proxy=False, asset_cache=None):
         """Adds sky to Blender scene
+
+        If `asset_cache` (a bvp.utils.blender.AssetCache) is provided and `proxy` 
+        is True, the sky is linked only once per Blender session.
         """
         # Make file local, if it isn't already
         self.cloud_download()
@@ -171,7 +174,7 @@ class Sky(MappedClass):
         if not self.name in [None, 'default_indoor', 'default_outdoor', 'none']:
             # Add proxies of mesh objects
             sky_ob = utils.blender.add_group(
-                self.name, self.fname, self.path, proxy=proxy)
+                self.name, self.fname, self.path, proxy=proxy, asset_cache=asset_cache)
             if scale is not None:
                 print('Resizing...')
                 sz = scale / self.real_world_size  # most skies are 100x100 in area
@@ -28,6 +28,8 @@ import sys
 import os
 import time
 import json
+import copy
+import types
 from .options import config
 from . import dbqueries
 
@@ -35,6 +37,7 @@ from .Classes.action import Action
 from .Classes.background import Background
 from .Classes.camera import Camera
 #from .Classes.constraint import  ObConstraint, CamConstraint
+from .Classes.constraint import CompatibilityIndex
 from .Classes.material import Material
 from .Classes.object import Object
 #from .Classes.render_options import RenderOptions
@@ -327,7 +330,7 @@ class DBInterface(docdb.couchclient.CouchDocDBClient):
         """
         # Imports
         import re, os
-        from scipy.ndimage.morphology import binary_fill_holes as imfill # Fills holes in multi-dim images
+        from .utils.voxels import voxelize_verts
         
         if not obj:
             obj = self.objects
@@ -340,28 +343,9 @@ class DBInterface(docdb.couchclient.CouchDocDBClient):
                     print('Could not find .verts file for %s'%o['name'])
                     print('(Searched for %s'%fNm)
                 continue
-            # Get voxelized vert list
-            with open(fNm, 'r') as fid:
-                Pt = fid.readlines()
-            vL = np.array([[float(x) for x in k.split(', ')] for k in Pt])
-            # Get dimensions 
-            dim = [len(np.unique(vL.T[i])) for i in range(3)]
-            # Create blank matrix
-            z = np.zeros((vRes+buf, vRes+buf, vRes+buf*2), dtype=bool)
-            # Normalize matrix to indices for volume
-            vLn = vL/(10./vRes) -.5 + buf/2. # .5 is a half-voxel shift down
-            vLn.T[0:2]+= vRes/2. # Move X, Y to center
-            vLn.T[2] += buf/2. # Move Z up (off floor) by "buf"/2 again
-            # Check for closeness of values to rounded values
-            S = np.sqrt(np.sum((np.round(vLn)-vLn)**2))/len(vLn.flatten())
-            if S>.001:
-                raise Exception('Your voxelized coordinates do not round to whole number indices!')
-            # Index into volume
-            idx = np.cast['int'](np.round(vLn))
-            z[tuple(idx.T)] = True
-            # Fill holes w/ python 
-            # May need fancier strel (structure element - 2nd argumnet) for some objects 
-            hh = imfill(z)
+            # Get voxelized vert list, fill holes
+            # (see bvp.utils.voxels.VoxelStore for compressed, incrementally updated volumes)
+            hh = voxelize_verts(fNm, vRes=vRes, buf=buf)
             # Trim?? for more efficient computation? 
             # ?
             # Save volume in binary format for pfSkel (or other) code:
@@ -425,3 +409,159 @@ class DBInterface(docdb.couchclient.CouchDocDBClient):
     # @property
     # def n_shadow(self):
     #   return len(self.shadows)
+
+
+# Classes whose metadata can be cached by LibraryCache
+_element_classes = dict(Action=Action, Background=Background, Camera=Camera, Material=Material,
+                        Object=Object, Shadow=Shadow, Sky=Sky)
+
+
+class ElementMetadata(object):
+    """Immutable record of the database metadata for one library element"""
+    __slots__ = ('_id', '_rev', 'type', 'name', 'fname', 'semantic_category', 
+                 'wordnet_label', 'real_world_size', 'doc')
+
+    def __init__(self, doc):
+        """Parse a database document once into a read-only record
+
+        Parameters
+        ----------
+        doc : dict
+            database document for an Object, Background, Sky, etc.
+        """
+        doc = dict((k, None if v == 'None' else v) for k, v in doc.items())
+        real_world_size = doc.get('real_world_size')
+        if isinstance(real_world_size, (list, tuple)):
+            real_world_size = real_world_size[0]
+        values = dict(_id=doc.get('_id'),
+                      _rev=doc.get('_rev'),
+                      type=doc.get('type'),
+                      name=doc.get('name'),
+                      fname=doc.get('fname'),
+                      semantic_category=_to_tuple(doc.get('semantic_category')),
+                      wordnet_label=_to_tuple(doc.get('wordnet_label')),
+                      real_world_size=real_world_size,
+                      doc=types.MappingProxyType(doc))
+        for k, v in values.items():
+            object.__setattr__(self, k, v)
+
+    def __setattr__(self, k, v):
+        raise AttributeError("ElementMetadata records are read-only")
+
+    def __repr__(self):
+        return '<ElementMetadata %s "%s" (_id=%s, _rev=%s)>'%(self.type, self.name, self._id, self._rev)
+
+    def to_element(self, dbi=None):
+        """Create a new bvp Object, Background, Sky, etc. from this record (no db query)"""
+        cls = _element_classes[self.type]
+        doc = copy.deepcopy(dict(self.doc))
+        return cls.from_docdict(doc, dbi)
+
+
+def _to_tuple(value):
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+class LibraryCache(object):
+    """In-memory cache of library element metadata, keyed by database `_id` and `_rev`"""
+    def __init__(self, dbi, element_types=('Object', 'Background', 'Sky')):
+        """Bulk-load metadata for all library elements of the given types
+
+        Records are only re-parsed when the `_rev` of an element's database 
+        document changes (see `refresh()`); all other lookups are served from 
+        memory, without database queries.
+
+        Parameters
+        ----------
+        dbi : DBInterface
+            database interface for the library
+        element_types : tuple
+            types of database elements to load
+        """
+        self.dbi = dbi
+        self.element_types = tuple(element_types)
+        self._records = {}
+        self._names = {}
+        self.n_queries = 0
+        self.refresh()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, _id):
+        return _id in self._records
+
+    def _add(self, doc):
+        old = self._records.get(doc['_id'])
+        if (old is not None) and (old._rev == doc.get('_rev')):
+            return old
+        record = ElementMetadata(doc)
+        self._records[record._id] = record
+        self._names[(record.type, record.name)] = record
+        return record
+
+    def refresh(self):
+        """Re-load metadata in bulk (one query per element type); only changed documents are re-parsed"""
+        for element_type in self.element_types:
+            docs = self.dbi.query_documents(type=element_type)
+            self.n_queries += 1
+            for doc in docs:
+                self._add(doc)
+
+    def get(self, _id, _rev=None):
+        """Get metadata record for element `_id`
+
+        If `_rev` is given and does not match the cached record, the record 
+        is re-loaded from the database.
+        """
+        record = self._records.get(_id)
+        if (record is None) or ((_rev is not None) and (record._rev != _rev)):
+            doc = self.dbi.query_documents(1, _id=_id)
+            self.n_queries += 1
+            if not doc:
+                raise KeyError('No element with _id=%s in database'%_id)
+            record = self._add(doc)
+        return record
+
+    def by_name(self, element_type, name):
+        """Get metadata record for element of type `element_type` named `name`"""
+        try:
+            return self._names[(element_type, name)]
+        except KeyError:
+            raise KeyError('No %s named "%s" in library cache'%(element_type, name))
+
+    def lookup(self, element):
+        """Get metadata record for a bvp element (by `_id` if present, otherwise by name)"""
+        _id = getattr(element, '_id', None)
+        if (_id is not None) and (_id != 'None'):
+            return self.get(_id)
+        return self.by_name(element.type, element.name)
+
+    def to_element(self, _id, dbi=None):
+        """Create a new bvp element (Object, Background, Sky...) from cached metadata"""
+        if dbi is None:
+            dbi = self.dbi
+        return self.get(_id).to_element(dbi)
+
+    def compatibility(self):
+        """Action x background compatibility index for all cached actions & backgrounds
+
+        Computed once (vectorized; see `bvp.Classes.constraint.compatibility_matrix`)
+        and re-computed only when actions or backgrounds are added, removed, or 
+        change `_rev`. Actions and backgrounds are loaded if they are not among 
+        `element_types`.
+        """
+        for element_type in ('Action', 'Background'):
+            if element_type not in self.element_types:
+                self.element_types += (element_type,)
+                self.refresh()
+        actions = sorted((r for r in self._records.values() if r.type == 'Action'), key=lambda r: r._id)
+        backgrounds = sorted((r for r in self._records.values() if r.type == 'Background'), key=lambda r: r._id)
+        key = CompatibilityIndex.revision_key(actions, backgrounds)
+        index = getattr(self, '_compatibility', None)
+        if (index is None) or (index.key != key):
+            index = CompatibilityIndex.from_records(actions, backgrounds)
+            self._compatibility = index
+        return index
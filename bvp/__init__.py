@@ -28,29 +28,54 @@ __version__ = '0.2a'
 
 # Imports
 import os
-import time
-import textwrap
-import subprocess
-from . import utils 
-from .options import config
-
-# Classes
-from .Classes.action import Action
-from .Classes.background import Background
-from .Classes.camera import Camera
-from .Classes.constraint import  ObConstraint, CamConstraint
-from .Classes.material import Material
-from .Classes.object import Object
-from .Classes.render_options import RenderOptions
-from .Classes.scene import Scene
-#from .Classes.SceneList import SceneList # STILL WIP
-from .Classes.shadow import Shadow
-#from .Classes.Shape import Shape # STILL WIP Move to Object...?
-from .Classes.sky import Sky
-
-from . import DB
-from . import files
-from .DB import DBInterface
+import importlib
+
+# Classes, database interface & submodules are imported on first access (see
+# `__getattr__` below), so that `import bvp` is fast (e.g. for short-lived 
+# render worker processes and scripts run with `blender -P`). 
+# name : (module, attribute name)
+_lazy_attributes = dict(
+    # Classes
+    Action=('.Classes.action', 'Action'),
+    Background=('.Classes.background', 'Background'),
+    Camera=('.Classes.camera', 'Camera'),
+    ObConstraint=('.Classes.constraint', 'ObConstraint'),
+    CamConstraint=('.Classes.constraint', 'CamConstraint'),
+    CompatibilityIndex=('.Classes.constraint', 'CompatibilityIndex'),
+    Material=('.Classes.material', 'Material'),
+    Object=('.Classes.object', 'Object'),
+    Placement=('.Classes.placement', 'Placement'),
+    RenderOptions=('.Classes.render_options', 'RenderOptions'),
+    Scene=('.Classes.scene', 'Scene'),
+    #SceneList=('.Classes.SceneList', 'SceneList'), # STILL WIP
+    Shadow=('.Classes.shadow', 'Shadow'),
+    #Shape=('.Classes.Shape', 'Shape'), # STILL WIP Move to Object...?
+    Sky=('.Classes.sky', 'Sky'),
+    # Database
+    DBInterface=('.DB', 'DBInterface'),
+    LibraryCache=('.DB', 'LibraryCache'),
+    # Options
+    config=('.options', 'config'),
+    )
+_lazy_modules = ('utils', 'DB', 'files', 'options', 'dbqueries', 'Classes')
+
+
+def __getattr__(name):
+    """Import classes and submodules on first access"""
+    if name in _lazy_attributes:
+        module, attribute = _lazy_attributes[name]
+        value = getattr(importlib.import_module(module, __name__), attribute)
+    elif name in _lazy_modules:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError("module %r has no attribute %r"%(__name__, name))
+    # Cache, so that __getattr__ is only called once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes) | set(_lazy_modules))
 
 # NOTE: UPDATE LIST BELOW WHEN CLASSES ARE ALL DONE
 
@@ -59,6 +84,10 @@ bvp_dir = os.path.dirname(__file__)
 def set_scn(fname='bvp_test', ropts=None, cam=None, sky=None):
     """Quickie default setup of camera + lighting for an object
     """    
+    from .Classes.camera import Camera
+    from .Classes.render_options import RenderOptions
+    from .Classes.scene import Scene
+    from .Classes.sky import Sky
     if cam is None:
         cam = Camera()
     if ropts is None:
@@ -145,7 +174,9 @@ def blend(script, blend_file=None, is_local=True, blender_binary=None,
         script = '\n'.join(lines)
 
     # Run 
+    import subprocess
     if blender_binary is None:
+        from .options import config
         blender_binary = config.get('path', 'blender_cmd') #Settings['Paths']['BlenderCmd']
     blender_cmd = [blender_binary, '-b', blend_file, '--python-expr', script]
     if is_local:
@@ -174,5 +205,6 @@ def blend(script, blend_file=None, is_local=True, blender_binary=None,
         return jobid
 
 __all__ = ['Action', 'Background', 'Camera', 'ObConstraint', 'CamConstraint', 'Material', 
-           'Object', 'RenderOptions', 'Scene', 'Shadow', 'Sky', 'DBInterface',
+           'Object', 'Placement', 'RenderOptions', 'Scene', 'Shadow', 'Sky', 'DBInterface', 'LibraryCache', 
+           'CompatibilityIndex',
            'utils','config', 'files'] 
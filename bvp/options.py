@@ -3,22 +3,44 @@ try:
     import configparser
 except ImportError:
     import ConfigParser as configparser
-# Find appropriate directories for config files 
-# in each OS (*nix, windows, whatever). 
-import appdirs
 
 cwd = os.path.dirname(__file__)
-userdir = appdirs.user_config_dir("bvp", appauthor="MarkLescroart") #(not sure if args here are right)
-usercfg = os.path.join(userdir, "options.cfg")
 
-config = configparser.ConfigParser()
-config.read(os.path.join(cwd, 'defaults.cfg'))
 
-# Update defaults with user-sepecifed values in user config
-files_successfully_read = config.read(usercfg)
+def _user_config_file():
+    # Find appropriate directories for config files
+    # in each OS (*nix, windows, whatever).
+    import appdirs
+    userdir = appdirs.user_config_dir("bvp", appauthor="MarkLescroart") #(not sure if args here are right)
+    return userdir, os.path.join(userdir, "options.cfg")
 
-# If user config doesn't exist, create it
-if len(files_successfully_read) == 0:
-    os.makedirs(userdir)
-    with open(usercfg, 'w') as fp:
-        config.write(fp)
\ No newline at end of file
+
+def load_config():
+    """Read default options, updated with user-specified values in user config file"""
+    userdir, usercfg = _user_config_file()
+    config = configparser.ConfigParser()
+    config.read(os.path.join(cwd, 'defaults.cfg'))
+    # Update defaults with user-sepecifed values in user config
+    files_successfully_read = config.read(usercfg)
+    # If user config doesn't exist, create it
+    if len(files_successfully_read) == 0:
+        try:
+            if not os.path.exists(userdir):
+                os.makedirs(userdir)
+            with open(usercfg, 'w') as fp:
+                config.write(fp)
+        except OSError:
+            # e.g. read-only home directory on render nodes; defaults are still usable
+            pass
+    return config
+
+
+def __getattr__(name):
+    # Config is only read (and user config directory only created) on first access
+    if name == 'config':
+        globals()['config'] = load_config()
+        return globals()['config']
+    if name in ('userdir', 'usercfg'):
+        userdir, usercfg = _user_config_file()
+        return dict(userdir=userdir, usercfg=usercfg)[name]
+    raise AttributeError("module %r has no attribute %r"%(__name__, name))
@@ -4,6 +4,18 @@ Couple handy-dandy functions:
 """
 from __future__ import absolute_import
 
-from . import basics
-from . import blender
-from . import math
\ No newline at end of file
+import importlib
+
+# Submodules are imported on first access (e.g. `bvp.utils.blender`), so that 
+# importing bvp does not import all of them (and their dependencies)
+_submodules = ('basics', 'blender', 'math', 'serialize', 'mesh_io', 'voxels', 'physics', 'render_store', 'video', 'instrument', 'jobs', 'plot')
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module %r has no attribute %r"%(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules))
\ No newline at end of file
@@ -2,8 +2,10 @@
 B.lender V.ision P.roject basic utility functions
 """
 
+import io
 import os
 import time
+import base64
 import subprocess
 import pickle # replace with json? bson? 
 import numpy as np
@@ -53,6 +55,26 @@ def make_blender_safe(data, Type='int'):
     return out
     
 
+def encode_array(data, dtype=np.float32):
+    """Encodes a numpy array as a base64 string (of a .npy file), for storage in json / database docs
+
+    Parameters
+    ----------
+    data : array-like
+        array to encode
+    dtype : numpy dtype
+        data type to store. Defaults to float32 (compact)
+    """
+    buf = io.BytesIO()
+    np.save(buf, np.asarray(data, dtype=dtype), allow_pickle=False)
+    return base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def decode_array(data):
+    """Decodes a numpy array encoded by `encode_array`"""
+    return np.load(io.BytesIO(base64.b64decode(data)), allow_pickle=False)
+
+
 def load_pik(pikFile):
     """Convenience function for simple loading of pickle files
     """
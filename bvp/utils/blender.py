@@ -7,9 +7,11 @@ import os
 import copy
 import re
 import numpy as np
+from collections import OrderedDict
 
 from ..options import config
 from . import math as bvpmath
+from . import instrument
 
 try:
     import bpy
@@ -143,6 +145,83 @@ def make_physics_animation(ob, frames=(1, 4), substeps_per_frame=10, fps=15, **k
     ob.keyframe_insert(data_path='rigid_body.kinematic', frame=frames[1]+1)
 
 
+def bake_physics(obs, frames, scn=None):
+    """Simulate rigid-body physics and record the resulting trajectories
+
+    Parameters
+    ----------
+    obs : list of bpy objects
+        objects set up for simulation with `make_physics_animation`
+    frames : tuple
+        (first, last) frame to simulate
+    scn : bpy scene | None
+        scene containing the rigid body world. Defaults to current scene.
+
+    Returns
+    -------
+    baked : bvp.utils.physics.BakedPhysics
+        per-frame location & rotation of each object, to be stored (see
+        `bvp.utils.physics.PhysicsCache`) and applied with `apply_baked_animation`
+    """
+    from .physics import BakedPhysics
+    if scn is None:
+        scn = bpy.context.scene
+    frame_list = np.arange(int(frames[0]), int(frames[-1]) + 1)
+    point_cache = scn.rigidbody_world.point_cache
+    point_cache.frame_start = frame_list[0]
+    point_cache.frame_end = max(frame_list[-1], point_cache.frame_start + 1)
+    current_frame = scn.frame_current
+    location = np.zeros((len(obs), len(frame_list), 3))
+    rotation = np.zeros((len(obs), len(frame_list), 3))
+    # The simulation must be stepped through frames in order
+    for ifr, fr in enumerate(frame_list):
+        scn.frame_set(fr)
+        for iob, ob in enumerate(obs):
+            loc, quat, _ = ob.matrix_world.decompose()
+            location[iob, ifr] = loc
+            rotation[iob, ifr] = quat.to_euler('XYZ')
+    scn.frame_set(current_frame)
+    return BakedPhysics(frame_list, location, rotation, names=[ob.name for ob in obs])
+
+
+def apply_baked_animation(ob, frames, location, rotation_euler, action_name='ObjectMotion'):
+    """Replace rigid-body simulation of an object with keyframes from a baked simulation
+
+    Parameters
+    ----------
+    ob : bpy object
+        object set up for simulation with `make_physics_animation`
+    frames : array
+        (n_frames,) frame numbers
+    location : array
+        (n_frames, 3) locations
+    rotation_euler : array
+        (n_frames, 3) XYZ euler rotations (radians)
+    action_name : str
+        name for new action
+    """
+    if ob.rigid_body is not None:
+        grab_only(ob)
+        bpy.ops.rigidbody.object_remove()
+    ob.rotation_mode = 'XYZ'
+    act = bpy.data.actions.new(action_name)
+    for data_path, values in (('location', location), ('rotation_euler', rotation_euler)):
+        values = np.asarray(values, dtype=np.float32)
+        for i in range(3):
+            fc = act.fcurves.new(data_path, index=i, action_group="LocRotScale")
+            fc.keyframe_points.add(len(frames))
+            co = np.column_stack([frames, values[:, i]]).astype(np.float32)
+            fc.keyframe_points.foreach_set('co', co.ravel())
+            for kp in fc.keyframe_points:
+                kp.interpolation = 'LINEAR'
+            fc.update()
+    ob.animation_data_create()
+    old_action = ob.animation_data.action
+    ob.animation_data.action = act
+    if (old_action is not None) and (old_action.users == 0):
+        bpy.data.actions.remove(old_action)
+
+
 def add_selected_to_group(group_name):
     """Adds all selected objects to group named `group_name`
     """
@@ -153,7 +232,7 @@ def add_selected_to_group(group_name):
         grp.objects.link(o)
 
 
-def clear_scene(scn=None):
+def clear_scene(scn=None, asset_cache=None):
     """Resets scene to empty, ready for next.
 
     Removes all objects, lights, background; resets world settings; clears
@@ -165,6 +244,10 @@ def clear_scene(scn=None):
     ----------
     scn : string scene name
         Scene to clear of all elements.
+    asset_cache : AssetCache | None
+        If provided, instances of cached groups are removed, but data linked 
+        from library files (objects, meshes, actions, armatures, groups) is 
+        kept for re-use in the next scene.
 
     Notes
     -----
@@ -174,9 +257,18 @@ def clear_scene(scn=None):
 
     ### --- Removing objects for next scene: --- ### 
     scn = set_scene(scn)
+    if asset_cache is not None:
+        asset_cache.clear_instances()
+    def keep(x):
+        # Keep data linked from library files, if it is cached
+        return (asset_cache is not None) and (x.library is not None)
     # Enumerate mesh objects to remove
     mesh_objects = list()
     for o in bpy.data.objects:
+        if keep(o):
+            if o.name in scn.objects:
+                scn.objects.unlink(o)
+            continue
         if o.type=='MESH': 
             mesh_objects.append(o.data)
         if o.name in scn.objects:
@@ -185,6 +277,8 @@ def clear_scene(scn=None):
         bpy.data.objects.remove(o)      
     # Remove mesh objects
     for m in mesh_objects:
+        if keep(m):
+            continue
         m.user_clear()
         bpy.data.meshes.remove(m)
     # Remove all textures:
@@ -195,14 +289,20 @@ def clear_scene(scn=None):
     # To come
     # Remove all actions/poses:
     for act in bpy.data.actions:
+        if keep(act):
+            continue
         act.user_clear()
         bpy.data.actions.remove(act)
     # Remove all armatures:
     for arm in bpy.data.armatures:
+        if keep(arm):
+            continue
         arm.user_clear()
         bpy.data.armatures.remove(arm)
     # Remove all groups:
     for g in bpy.data.groups:
+        if keep(g):
+            continue
         g.user_clear()
         bpy.data.groups.remove(g)
     # Remove all rendering nodes
@@ -1125,7 +1225,8 @@ def add_action(action_name, fname, fpath=os.path.join(config.get('path','db_dir'
     a = bpy.data.actions[action_name]
     return a
 
-def add_group(name, fname, fpath=os.path.join(config.get('path','db_dir'), 'Object'), proxy=True):
+@instrument.timed('blender.add_group')
+def add_group(name, fname, fpath=os.path.join(config.get('path','db_dir'), 'Object'), proxy=True, asset_cache=None):
     """Add a Blender group to the current scene. 
 
     Add a group of Blender objects (all the parts of a single object, most likely) from another 
@@ -1145,11 +1246,16 @@ def add_group(name, fname, fpath=os.path.join(config.get('path','db_dir'), 'Obje
         Path of directory in which .blend file resides
     proxy : bool
         Whether to add a proxy object (True) or full group (False)
+    asset_cache : AssetCache | None
+        If provided (and proxy is True), the group is linked only once per 
+        Blender session, and instanced from the cache (see AssetCache)
     
     Notes
     -----
     Counts objects currently in scene and increments count.
     """ 
+    if proxy and (asset_cache is not None):
+        return asset_cache.instance(name, fname, fpath)
 
     #if (name in bpy.data.groups): # and proxy:
     #    # Only add a dupli group if past group is proxy object?
@@ -1194,6 +1300,149 @@ def add_group(name, fname, fpath=os.path.join(config.get('path','db_dir'), 'Obje
         ob = new_obs[0]
     return ob
 
+
+class AssetCache(object):
+    """Linked library groups (collections), kept loaded across scenes in one Blender session
+
+    `add_group(..., proxy=True)` links a group from its .blend file each time it 
+    is called, and `clear_scene()` then removes it again. With an AssetCache, 
+    each group is linked once, and each scene gets a new instance of it (an 
+    empty that instances the linked group, as for proxy objects). 
+    `clear_scene(asset_cache=...)` removes the instances but keeps the linked 
+    library data for the next scene.
+
+    Groups are evicted (least recently used first) when the total size of their 
+    .blend files exceeds `max_bytes` (file size is used as a rough proxy for 
+    memory use). Eviction happens only in `clear_instances()` (i.e. between 
+    scenes), and never removes a group that still has instances.
+    """
+    def __init__(self, max_bytes=2 * 1024**3, max_items=None):
+        """
+        Parameters
+        ----------
+        max_bytes : int | None
+            memory budget, in bytes of .blend files for cached groups
+        max_items : int | None
+            maximum number of cached groups
+        """
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        # (filepath, name) : (group / collection, n bytes), least recently used first
+        self._groups = OrderedDict()
+        # (key, instance) for instances (empties) created for the current scene
+        self._instances = []
+        self.n_loaded = 0
+        self.n_hits = 0
+
+    def __len__(self):
+        return len(self._groups)
+
+    def __repr__(self):
+        return '<AssetCache: %d groups, %.1f MB, %d loaded, %d hits>'%(len(self), 
+            self.n_bytes / 1024.**2, self.n_loaded, self.n_hits)
+
+    @property
+    def n_bytes(self):
+        return sum(n for grp, n in self._groups.values())
+
+    @staticmethod
+    def _data_attribute():
+        return 'groups' if bpy.app.version < (2, 80, 0) else 'collections'
+
+    @staticmethod
+    def _key(name, fname, fpath):
+        return (os.path.abspath(os.path.join(fpath, fname)), name)
+
+    def get(self, name, fname, fpath):
+        """Linked group (collection) `name` from file `fname` in directory `fpath` (linked if not cached)
+
+        Cached groups are not evicted here (see `clear_instances()`), so groups
+        used in the current scene stay valid while the scene is built.
+        """
+        key = self._key(name, fname, fpath)
+        if key in self._groups:
+            self._groups.move_to_end(key)
+            self.n_hits += 1
+            instrument.count('AssetCache.hits')
+            return self._groups[key][0]
+        attribute = self._data_attribute()
+        with instrument.timer('AssetCache.load'):
+            with bpy.data.libraries.load(key[0], link=True) as (data_from, data_to):
+                if name not in getattr(data_from, attribute):
+                    raise ValueError('No group named %s in %s'%(name, key[0]))
+                setattr(data_to, attribute, [name])
+        grp = getattr(data_to, attribute)[0]
+        self._groups[key] = (grp, os.path.getsize(key[0]))
+        self.n_loaded += 1
+        return grp
+
+    def instance(self, name, fname, fpath, scn=None):
+        """Add an instance of a (cached) linked group to a scene 
+
+        Returns the instance object (selected & active), as `add_group(..., proxy=True)` does.
+        """
+        grp = self.get(name, fname, fpath)
+        if scn is None:
+            scn = bpy.context.scene
+        ob = bpy.data.objects.new(name, None)
+        if bpy.app.version < (2, 80, 0):
+            ob.dupli_type = 'GROUP'
+            ob.dupli_group = grp
+            scn.objects.link(ob)
+        else:
+            ob.instance_type = 'COLLECTION'
+            ob.instance_collection = grp
+            scn.collection.objects.link(ob)
+        self._instances.append((self._key(name, fname, fpath), ob))
+        grab_only(ob)
+        return ob
+
+    def clear_instances(self):
+        """Remove all instances created for the current scene, then evict groups over budget
+
+        Library data for groups within the budget stays loaded.
+        """
+        for key, ob in self._instances:
+            try:
+                bpy.data.objects.remove(ob, do_unlink=True)
+            except ReferenceError:
+                # Already removed
+                pass
+        self._instances = []
+        self._evict()
+
+    def _over_budget(self):
+        return ((self.max_bytes is not None and self.n_bytes > self.max_bytes) or
+                (self.max_items is not None and len(self._groups) > self.max_items))
+
+    def _evict(self):
+        # Least recently used first; never evict groups with instances, and 
+        # keep at least the most recently used group
+        live = set(key for key, ob in self._instances)
+        for key in list(self._groups):
+            if len(self._groups) <= 1 or not self._over_budget():
+                break
+            if key in live:
+                continue
+            grp, n = self._groups.pop(key)
+            self._remove(grp)
+
+    def _remove(self, grp):
+        library = grp.library
+        in_use = [g for g, n in self._groups.values() if g.library == library]
+        if (library is not None) and (len(in_use) == 0):
+            # Removes all data linked from the library file
+            bpy.data.libraries.remove(library)
+        else:
+            getattr(bpy.data, self._data_attribute()).remove(grp)
+
+    def clear(self):
+        """Remove instances and all cached library data"""
+        self.clear_instances()
+        while len(self._groups) > 0:
+            key, (grp, n) = self._groups.popitem(last=False)
+            self._remove(grp)
+
 # Belongs in Object or Shape
 def meshify(ob):
     """
@@ -1753,15 +2002,7 @@ def set_zoom(bvp_camera, bvp_object,
     n_frames = frame_end - frame_start + 1
     if fixation_fps is None:
         fixation_fps = fps
-    # Get camera and object positions by frame
-    camera_locations = get_framewise_location(
-        bvp_camera.blender_camera,
-        bone_name=None,
-        frame_start=frame_start,
-        frame_end=frame_end,
-        center_upward=center_upward)
-    if len(camera_locations) == 1:
-        camera_locations *= len(bvp_camera.fix_location)
+    # Get object positions by frame
     if bone_name is None:
         ob = bvp_object.blender_object[0]
     else:
@@ -1772,39 +2013,21 @@ def set_zoom(bvp_camera, bvp_object,
         frame_start=frame_start,
         frame_end=frame_end,
         center_upward=center_upward)
+    # Camera positions for the same frames (computed from keyframes, w/o stepping through frames)
+    location_frames = np.arange(frame_start, frame_start + len(object_locations))
+    camera_locations, _, _ = bvp_camera.framewise(location_frames)
 
+    object_locations = np.array(object_locations)
     # Check on distance from objects. Too far means objects are too small; zoom in
-    cam_to_obj_vectors = np.array(
-        object_locations) - np.array(camera_locations)
-    cam_to_obj_distances = np.linalg.norm(cam_to_obj_vectors, axis=1)
     # Move camera toward object along current vector to object
-    if distance_to_set == 'median':
-        # Set median distance
-        median_distance = np.median(cam_to_obj_distances)
-        # option 1:
-        #median_vector = np.median(cam_to_obj_vectors, axis=0)
-        # option 2:
-        med_dist_i = np.nonzero(median_distance == cam_to_obj_distances)[0][0]
-        median_vector = cam_to_obj_vectors[med_dist_i]
-
-        if median_distance > max_distance:
-            pct = (median_distance - max_distance) / median_distance
-            vec_adjust = median_vector * pct
-            new_camera_locations = [(np.array(loc) + vec_adjust).tolist()
-                                    for loc in camera_locations]
-    elif distance_to_set == 'framewise':
-        pct_framewise = (cam_to_obj_distances -
-                         absolute_distance) / cam_to_obj_distances
-
-        new_camera_locations = [(np.array(loc) + (cam_to_obj_vec * pct)).tolist()
-                                for loc, cam_to_obj_vec, pct in zip(camera_locations, cam_to_obj_vectors, pct_framewise)]
-    else:
-        raise ValueError("Unknown value for `distance_to_set`!")
+    new_camera_locations = bvpmath.camera_distance_locations(camera_locations, object_locations,
+                                                             distance_to_set=distance_to_set,
+                                                             absolute_distance=absolute_distance,
+                                                             max_distance=max_distance)
     # Set fixation & image position
-    new_fixation_locations = [bvpmath.aim_camera(ob_loc, im_location, cam_loc,
-                                                        camera_lens=bvp_camera.lens,
-                                                        aspect_ratio=aspect_ratio)
-                              for ob_loc, cam_loc in zip(object_locations, new_camera_locations)]
+    new_fixation_locations = bvpmath.aim_camera_array(object_locations, im_location, new_camera_locations,
+                                                      camera_lens=bvp_camera.lens,
+                                                      aspect_ratio=aspect_ratio)
 
     if track_position:
         # Smooth a bit
@@ -1818,10 +2041,8 @@ def set_zoom(bvp_camera, bvp_object,
     else:
         camera_frames = bvp_camera.frames
 
-    new_camera_locations = [new_camera_locations[fr]
-                            for fr in camera_frames]
-    new_fixation_locations = [new_fixation_locations[fr]
-                              for fr in fixation_frames]
+    new_camera_locations = new_camera_locations[np.asarray(camera_frames)].tolist()
+    new_fixation_locations = new_fixation_locations[np.asarray(fixation_frames)].tolist()
 
     bvp_camera.set_location(
         (camera_frames + 1).tolist(), new_camera_locations, handle_type='VECTOR')
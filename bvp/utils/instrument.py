@@ -0,0 +1,191 @@
+"""BVP instrumentation: timers, counters, histograms and recorded values
+
+Lightweight measurements of where time goes in scene generation and rendering
+(sampling of object & camera positions, reasons positions are rejected, asset
+loading, compositor setup, per-frame render time, memory per scene). Off by
+default; when off, `timer()` returns a shared no-op context manager and
+`count()` / `histogram()` / `record()` return immediately, so instrumented code
+runs at (nearly) full speed.
+
+Usage:
+    from bvp.utils import instrument
+    instrument.enable()
+    scene.populate(objects)
+    print(instrument.summary())
+    instrument.save('timing.json')
+
+Setting the environment variable BVP_INSTRUMENT=1 (or true, yes) enables
+instrumentation at import (e.g. for render scripts run in separate Blender
+processes); any other value (e.g. 0) leaves it off.
+"""
+
+import os
+import json
+import time
+import functools
+import threading
+
+enabled = os.environ.get('BVP_INSTRUMENT', '').strip().lower() in ('1', 'true', 'yes')
+
+# name -> [n, total, min, max] (seconds)
+_timers = {}
+# name -> count
+_counters = {}
+# name -> {key: count}
+_histograms = {}
+# name -> {key: value}
+_values = {}
+_lock = threading.Lock()
+
+
+class _NullTimer(object):
+    """Context manager that does nothing (for when instrumentation is off)"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_null_timer = _NullTimer()
+
+
+class _Timer(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        add_time(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+def enable(reset=True):
+    """Turn instrumentation on (and optionally clear previous measurements)"""
+    global enabled
+    if reset:
+        clear()
+    enabled = True
+
+
+def disable():
+    """Turn instrumentation off (measurements are kept)"""
+    global enabled
+    enabled = False
+
+
+def clear():
+    """Remove all measurements"""
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _histograms.clear()
+        _values.clear()
+
+
+def timer(name):
+    """Context manager that adds the time spent within it to timer `name`"""
+    if not enabled:
+        return _null_timer
+    return _Timer(name)
+
+
+def timed(name):
+    """Decorator that adds the time spent in each call of a function to timer `name`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_time(name, seconds):
+    """Add a duration (e.g. measured by a Blender handler) to timer `name`"""
+    if not enabled:
+        return
+    with _lock:
+        t = _timers.get(name)
+        if t is None:
+            _timers[name] = [1, seconds, seconds, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+            t[2] = min(t[2], seconds)
+            t[3] = max(t[3], seconds)
+
+
+def count(name, n=1):
+    """Add `n` to counter `name`"""
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def histogram(name, key, n=1):
+    """Add `n` to bin `key` of histogram `name` (e.g. reasons a sample was rejected)"""
+    if not enabled:
+        return
+    with _lock:
+        hist = _histograms.setdefault(name, {})
+        hist[key] = hist.get(key, 0) + n
+
+
+def record(name, key, value):
+    """Set entry `key` of recorded values `name` to `value` (e.g. a measurement per scene)
+
+    Unlike histogram bins, values are not summed: a later value for the same
+    key replaces the earlier one.
+    """
+    if not enabled:
+        return
+    with _lock:
+        _values.setdefault(name, {})[key] = value
+
+
+def report():
+    """All measurements, as a json-serializable dict"""
+    with _lock:
+        timers = dict((name, dict(n=n, total=total, mean=total / n, min=mn, max=mx))
+                      for name, (n, total, mn, mx) in _timers.items())
+        return dict(timers=timers, counters=dict(_counters),
+                    histograms=dict((k, dict(v)) for k, v in _histograms.items()),
+                    values=dict((k, dict(v)) for k, v in _values.items()))
+
+
+def save(fname):
+    """Save measurements to a json file"""
+    with open(fname, 'w') as fid:
+        json.dump(report(), fid, indent=2, sort_keys=True)
+
+
+def summary():
+    """Measurements formatted as a table (string)"""
+    rep = report()
+    lines = ['%-44s %8s %10s %10s %10s'%('timer', 'n', 'total(s)', 'mean(ms)', 'max(ms)')]
+    for name, t in sorted(rep['timers'].items(), key=lambda x: -x[1]['total']):
+        lines.append('%-44s %8d %10.3f %10.2f %10.2f'%(name, t['n'], t['total'],
+                                                       t['mean'] * 1000, t['max'] * 1000))
+    if rep['counters']:
+        lines.append('')
+        lines.append('%-44s %8s'%('counter', 'n'))
+        for name, n in sorted(rep['counters'].items()):
+            lines.append('%-44s %8d'%(name, n))
+    for name, hist in sorted(rep['histograms'].items()):
+        lines.append('')
+        lines.append('%-44s %8s'%(name, 'n'))
+        for key, n in sorted(hist.items(), key=lambda x: -x[1]):
+            lines.append('  %-42s %8d'%(key, n))
+    for name, values in sorted(rep['values'].items()):
+        lines.append('')
+        lines.append('%-44s %10s'%(name, 'value'))
+        for key, value in sorted(values.items(), key=lambda x: str(x[0])):
+            lines.append('  %-42s %10.4g'%(key, value))
+    return '\n'.join(lines)
@@ -0,0 +1,265 @@
+"""BVP render job submission
+
+Renders of long scene lists are split into chunks of scenes, and each chunk is
+rendered by a separate Blender process. All chunks are submitted at once as
+a job array: a single shell script is run once per chunk, with the chunk
+index given by the environment variable SLURM_ARRAY_TASK_ID (plus 
+BVP_TASK_OFFSET, if the array is split; see `task_id()`).
+
+`SlurmArrayExecutor` submits the array with one call to sbatch per (at most)
+`max_array_size` tasks (with an optional limit on the number of tasks that run 
+at once, and memory per task).
+`LocalExecutor` runs the same script for each task as local processes, so that
+chunking and submission can be tested (or small jobs run) on a machine
+without a scheduler.
+"""
+
+import os
+import json
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+task_id_variable = 'SLURM_ARRAY_TASK_ID'
+task_offset_variable = 'BVP_TASK_OFFSET'
+
+
+def n_chunks(n_items, chunk_size):
+    """Number of chunks of (at most) `chunk_size` items"""
+    return int(np.ceil(float(n_items) / chunk_size))
+
+
+def chunk_range(task_id, n_items, chunk_size):
+    """Indices of items in chunk `task_id`"""
+    return range(task_id * chunk_size, min((task_id + 1) * chunk_size, n_items))
+
+
+def task_id(default=0):
+    """Array task index of this process (from the environment)
+
+    Task indices count across all arrays that a job was split into (see 
+    `SlurmArrayExecutor.submit()`), i.e. they include the offset of this 
+    process's array.
+    """
+    return int(os.environ.get(task_id_variable, default)) + int(os.environ.get(task_offset_variable, 0))
+
+
+def peak_memory_mb():
+    """Peak memory use (resident set size, MB) of this process so far
+
+    On linux, this is the peak since the last call to `reset_peak_memory()`.
+    """
+    try:
+        with open('/proc/self/status') as fid:
+            for line in fid:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.
+    except (IOError, OSError):
+        pass
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes on linux
+    return peak / 1024.**2 if sys.platform == 'darwin' else peak / 1024.
+
+
+def reset_peak_memory():
+    """Reset peak memory use of this process (see `peak_memory_mb()`) to current use
+
+    Only possible on linux; elsewhere, peak memory keeps counting from process start.
+
+    Returns
+    -------
+    is_reset : bool
+        whether peak memory was reset
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as fid:
+            fid.write('5')
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def scene_memory(report_files, n_scenes, default=np.nan):
+    """Measured peak memory (MB) per scene, from instrumentation reports of render scripts
+
+    Parameters
+    ----------
+    report_files : list
+        json files saved by render scripts run with BVP_INSTRUMENT=1 (see
+        bvp/BlendScripts/BlenderRender.py), with peak memory per scene index in
+        recorded values 'BlenderRender.peak_memory_mb'
+    n_scenes : int
+        number of scenes
+    default : float
+        value for scenes with no measurement
+    """
+    memory = np.full(n_scenes, default)
+    for fname in report_files:
+        with open(fname) as fid:
+            values = json.load(fid).get('values', {}).get('BlenderRender.peak_memory_mb', {})
+        for k, v in values.items():
+            memory[int(k)] = np.fmax(memory[int(k)], v)
+    return memory
+
+
+def task_memory(scene_memory_mb, safety=1.25, minimum=1000):
+    """Memory (MB) to request per array task, given measured memory per scene
+
+    Scenes in each chunk are rendered one after another in one Blender process
+    (and cleared in between), so each task needs roughly the memory of the
+    most expensive scene in its chunk. All tasks in an array share one
+    request, so this is the memory of the most expensive scene overall.
+
+    Parameters
+    ----------
+    scene_memory_mb : array
+        peak memory (MB) for each scene (nan for unmeasured scenes, which are
+        ignored; see `scene_memory`)
+    safety : float
+        factor by which to scale measured memory
+    minimum : int
+        minimum memory per task
+    """
+    scene_memory_mb = np.asarray(scene_memory_mb, dtype=float)
+    measured = scene_memory_mb[np.isfinite(scene_memory_mb)]
+    if len(measured) == 0:
+        return int(minimum)
+    return int(max(minimum, np.ceil(measured.max() * safety)))
+
+
+def write_array_script(fname, command):
+    """Write shell script run by each array task (`command` may use $SLURM_ARRAY_TASK_ID and $BVP_TASK_OFFSET)"""
+    with open(fname, 'w') as fid:
+        fid.write('#!/bin/sh\n')
+        fid.write(command + '\n')
+    os.chmod(fname, 0o755)
+    return fname
+
+
+class SlurmArrayExecutor(object):
+    """Submit array jobs to a Slurm scheduler"""
+    def __init__(self, partition='all', sbatch='sbatch', extra_args=(), max_array_size=1000):
+        """
+        Parameters
+        ----------
+        partition : str | None
+            Slurm partition
+        sbatch : str
+            sbatch command
+        extra_args : tuple
+            any additional arguments for sbatch
+        max_array_size : int
+            maximum number of tasks in one array. Must be less than Slurm's 
+            MaxArraySize (1001 by default), since task IDs go up to n_tasks-1.
+        """
+        self.partition = partition
+        self.sbatch = sbatch
+        self.extra_args = list(extra_args)
+        self.max_array_size = max_array_size
+
+    def __repr__(self):
+        return '<SlurmArrayExecutor: partition=%s>'%self.partition
+
+    def submit(self, script, n_tasks, name='bvp', log_dir=None, max_concurrent=None, memory=None, cpus=None):
+        """Submit `script` as an array of `n_tasks` tasks
+
+        Arrays of more than `max_array_size` tasks are split into several 
+        arrays. Each array gets the index of its first task in the environment
+        variable BVP_TASK_OFFSET, so that `task_id()` counts across arrays.
+
+        Parameters
+        ----------
+        script : str
+            shell script to run for each task
+        n_tasks : int
+            number of tasks (task IDs are 0 to n_tasks-1)
+        name : str
+            job name
+        log_dir : str | None
+            directory for log. Output from all tasks is appended to one file.
+        max_concurrent : int | None
+            maximum number of tasks running at once (per array)
+        memory : int | None
+            memory per task (MB)
+        cpus : int | None
+            cpus per task
+
+        Returns
+        -------
+        job_ids : list
+            Slurm job ID for each array
+        """
+        job_ids = []
+        for offset in range(0, n_tasks, self.max_array_size):
+            array = '0-%d'%(min(n_tasks - offset, self.max_array_size) - 1)
+            if max_concurrent is not None:
+                array += '%%%d'%max_concurrent
+            cmd = [self.sbatch, '--parsable', '--array=' + array, '-J', name, 
+                   '--export=ALL,%s=%d'%(task_offset_variable, offset)]
+            if self.partition is not None:
+                cmd += ['-p', self.partition]
+            if cpus is not None:
+                cmd += ['-c', str(cpus)]
+            if memory is not None:
+                cmd += ['--mem', str(int(memory))]
+            if log_dir is not None:
+                cmd += ['-o', os.path.join(log_dir, '%s_%%A.log'%name), '--open-mode=append']
+            cmd += self.extra_args + [script]
+            out = subprocess.check_output(cmd).decode('utf-8').strip()
+            # --parsable output is "job_id" or "job_id;cluster"
+            job_ids.append(out.split(';')[0])
+        return job_ids
+
+
+class LocalExecutor(object):
+    """Run array jobs as local processes (stand-in for a scheduler)"""
+    def __init__(self, max_workers=1, shell='sh'):
+        """
+        Parameters
+        ----------
+        max_workers : int
+            maximum number of tasks running at once
+        shell : str
+            shell used to run scripts
+        """
+        self.max_workers = max_workers
+        self.shell = shell
+
+    def __repr__(self):
+        return '<LocalExecutor: max_workers=%d>'%self.max_workers
+
+    def submit(self, script, n_tasks, name='bvp', log_dir=None, max_concurrent=None, memory=None, cpus=None):
+        """Run `script` once per task, with task index in SLURM_ARRAY_TASK_ID
+
+        Same arguments as `SlurmArrayExecutor.submit()`; `memory` and `cpus`
+        are ignored. Blocks until all tasks are done.
+
+        Returns
+        -------
+        returncodes : list
+            exit status of each task
+        """
+        n_workers = self.max_workers if max_concurrent is None else min(self.max_workers, max_concurrent)
+        log = None if log_dir is None else os.path.join(log_dir, '%s_local.log'%name)
+        lock = threading.Lock()
+
+        def run(i):
+            env = dict(os.environ)
+            env[task_id_variable] = str(i)
+            env[task_offset_variable] = '0'
+            env['SLURM_ARRAY_JOB_ID'] = 'local'
+            proc = subprocess.run([self.shell, script], env=env,
+                                  stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            if log is not None:
+                with lock:
+                    with open(log, 'ab') as fid:
+                        fid.write(('### --- %s task %d (exit %d) --- ###\n'%(name, i, proc.returncode)).encode('utf-8'))
+                        fid.write(proc.stdout)
+            return proc.returncode
+
+        with ThreadPoolExecutor(max_workers=max(1, n_workers)) as pool:
+            return list(pool.map(run, range(n_tasks)))
@@ -422,6 +422,194 @@ def perspective_projection(location,
     return make_blender_safe([im_x, im_y], 'float')
 
 
+def get_camera_matrices(camera_locations, fix_locations):
+    """Get (n, 3, 3) array of camera matrices for n camera / fixation locations
+
+    Vectorized version of `get_camera_matrix()` (right-handed coordinates only).
+
+    Parameters
+    ----------
+    camera_locations : array-like
+        (n, 3) array of (x, y, z) camera locations
+    fix_locations : array-like
+        (n, 3) array of (x, y, z) camera target (fixation) locations
+    """
+    camera_locations = np.atleast_2d(np.asarray(camera_locations, dtype=float))
+    fix_locations = np.atleast_2d(np.asarray(fix_locations, dtype=float))
+    up = np.array([0., 0., 1.])
+    L = fix_locations - camera_locations
+    L = L / np.linalg.norm(L, axis=-1, keepdims=True)
+    s = np.cross(L, up)
+    s = s / np.linalg.norm(s, axis=-1, keepdims=True)
+    u = np.cross(s, L)
+    return np.stack([s, u, -L], axis=-2)
+
+
+def _keyframe_handles(keyframes, values, handle_type, flat_ends=True):
+    """Left & right Bezier handles for keyframes, as computed by Blender for F-curves
+
+    Returns (left, right) arrays of handle (frame, value...) points, each (n_keys, 1 + n_dims)
+    """
+    x = keyframes[:, None]
+    pts = np.hstack([x, values])
+    n = len(keyframes)
+    # Previous & next keys (mirrored past the ends, as in Blender)
+    prev = np.vstack([2 * pts[:1] - pts[1:2], pts[:-1]])
+    nxt = np.vstack([pts[1:], 2 * pts[-1:] - pts[-2:-1]])
+    dvec_a = pts - prev
+    dvec_b = nxt - pts
+    len_a = dvec_a[:, :1].copy()
+    len_b = dvec_b[:, :1].copy()
+    len_a[len_a == 0] = 1.
+    len_b[len_b == 0] = 1.
+    # AUTO handles: along the sum of the unit (in time) vectors to the neighboring keys
+    tvec = dvec_b / len_b + dvec_a / len_a
+    tlen = tvec[:, :1] * 2.5614
+    tlen[tlen == 0] = 1.
+    auto_left = pts - tvec * len_a / tlen
+    auto_right = pts + tvec * len_b / tlen
+    if flat_ends:
+        # First & last AUTO handles are flat for constant extrapolation
+        auto_left[[0, -1], 1:] = pts[[0, -1], 1:]
+        auto_right[[0, -1], 1:] = pts[[0, -1], 1:]
+    # VECTOR handles: 1/3 of the way to the neighboring keys
+    vector_left = pts - dvec_a / 3.
+    vector_right = pts + dvec_b / 3.
+    if isinstance(handle_type, str):
+        handle_type = [handle_type] * n
+    handle_type = [[h] * 2 if isinstance(h, str) else list(h) * 2 if len(h) == 1 else list(h)
+                   for h in handle_type]
+    left, right = np.empty_like(pts), np.empty_like(pts)
+    for side, (out, auto, vector) in enumerate([(left, auto_left, vector_left), (right, auto_right, vector_right)]):
+        types = np.array([h[side] for h in handle_type])
+        bad = set(types) - set(['AUTO', 'VECTOR'])
+        if bad:
+            raise ValueError('Unsupported handle type(s): %s'%', '.join(sorted(bad)))
+        is_auto = (types == 'AUTO')[:, None]
+        out[:] = np.where(is_auto, auto, vector)
+    return left, right
+
+
+def interpolate_keyframes(keyframes, values, frames, handle_type='VECTOR', flat_ends=True):
+    """Evaluate Blender-style (Bezier F-curve) keyframe animation at many frames
+
+    Vectorized emulation of Blender's F-curve evaluation for AUTO and VECTOR 
+    keyframe handles (VECTOR handles give linear interpolation), with constant 
+    extrapolation before the first and after the last keyframe. 
+
+    Parameters
+    ----------
+    keyframes : array-like
+        (n_keys, ) frame numbers of keyframes, in increasing order
+    values : array-like
+        (n_keys, n_dims) values at each keyframe (e.g. (x, y, z) locations)
+    frames : array-like
+        (n_frames, ) frames at which to evaluate the animation (can be fractional)
+    handle_type : str or list
+        'AUTO' or 'VECTOR', or a list of handle types (or (left, right) handle
+        type pairs) for each keyframe, as for bvp.utils.blender.make_locrotscale_animation
+    flat_ends : bool
+        whether AUTO handles at first & last keyframes are flat (as Blender sets 
+        them for constant extrapolation)
+
+    Returns
+    -------
+    out : array
+        (n_frames, n_dims) interpolated values
+    """
+    keyframes = np.asarray(keyframes, dtype=float).ravel()
+    values = np.asarray(values, dtype=float)
+    values = values.reshape(len(keyframes), -1)
+    frames = np.asarray(frames, dtype=float).ravel()
+    if len(keyframes) == 1:
+        return np.repeat(values, len(frames), axis=0)
+    left, right = _keyframe_handles(keyframes, values, handle_type, flat_ends=flat_ends)
+    seg = np.clip(np.searchsorted(keyframes, frames, side='right') - 1, 0, len(keyframes) - 2)
+    p0 = np.hstack([keyframes[:, None], values])[seg]
+    p1 = right[seg]
+    p2 = left[seg + 1]
+    p3 = np.hstack([keyframes[:, None], values])[seg + 1]
+    # Shorten handles that overlap in time (as in Blender's correct_bezpart)
+    h1 = p0 - p1
+    h2 = p3 - p2
+    len1, len2 = np.abs(h1[:, :1]), np.abs(h2[:, :1])
+    seg_len = p3[:, :1] - p0[:, :1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fac = np.where(len1 + len2 > seg_len, seg_len / (len1 + len2), 1.)
+    p1 = p0 - fac * h1
+    p2 = p3 - fac * h2
+    # Find Bezier parameter u at which curve reaches each frame (frame is monotonic in u)
+    t = np.clip(frames, p0[:, 0], p3[:, 0])
+    lo, hi = np.zeros(len(frames)), np.ones(len(frames))
+    def bezier(u, i):
+        v = 1 - u
+        return v**3 * p0[:, i] + 3 * v**2 * u * p1[:, i] + 3 * v * u**2 * p2[:, i] + u**3 * p3[:, i]
+    for _ in range(50):
+        mid = (lo + hi) / 2.
+        below = bezier(mid, 0) < t
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+    u = ((lo + hi) / 2.)[:, None]
+    v = 1 - u
+    out = v**3 * p0 + 3 * v**2 * u * p1 + 3 * v * u**2 * p2 + u**3 * p3
+    return out[:, 1:]
+
+
+def euler_to_matrices(rotation_euler):
+    """(n, 3, 3) rotation matrices for (n, 3) XYZ euler angles (in radians, as in Blender)"""
+    rx, ry, rz = np.atleast_2d(np.asarray(rotation_euler, dtype=float)).T
+    cx, sx, cy, sy, cz, sz = np.cos(rx), np.sin(rx), np.cos(ry), np.sin(ry), np.cos(rz), np.sin(rz)
+    # R = Rz * Ry * Rx
+    return np.stack([np.stack([cz*cy, cz*sy*sx - sz*cx, cz*sy*cx + sz*sx], axis=-1),
+                     np.stack([sz*cy, sz*sy*sx + cz*cx, sz*sy*cx - cz*sx], axis=-1),
+                     np.stack([-sy, cy*sx, cy*cx], axis=-1)], axis=-2)
+
+
+def perspective_projection_array(locations,
+                                 camera_locations,
+                                 camera_matrices,
+                                 camera_fov=None,
+                                 camera_lens=None,
+                                 image_size=(1., 1.),
+                                 sensor_size=36):
+    """Map many 3D locations to 2D locations, for one or more camera positions
+
+    Vectorized version of `perspective_projection()`.
+
+    Parameters
+    ----------
+    locations : array-like
+        (n, k, 3) array of k (x, y, z) locations to project for each of n
+        camera positions
+    camera_locations : array-like
+        (n, 3) array of camera locations
+    camera_matrices : array-like
+        (n, 3, 3) array of camera matrices (see `get_camera_matrices()`)
+    camera_fov, camera_lens : scalar
+        specify EITHER field of view (degrees) OR lens (mm)
+    image_size : array-like
+        image size (e.g. [500, 500]); default = (1., 1.) (for pct of image)
+
+    Returns
+    -------
+    image_locations : array
+        (n, k, 2) array of (x, y) image locations. Locations behind the
+        camera are nan.
+    """
+    assert sum([(camera_lens is None), (camera_fov is None)]) == 1, 'Please specify EITHER `camera_lens` or `camera_fov` input'
+    if camera_lens is not None:
+        camera_fov = 2*atand(sensor_size/(2*camera_lens))
+    x_sz, y_sz = image_size
+    d = np.einsum('nij,nkj->nki', camera_matrices,
+                  np.asarray(locations, dtype=float) - np.asarray(camera_locations, dtype=float)[:, None, :])
+    dx, dy, dz = d[..., 0], d[..., 1], d[..., 2]
+    # Camera looks down -z; anything else is not in the image
+    dz = np.where(dz < 0, dz, np.nan)
+    im_x = x_sz / 2. - dx / dz * (x_sz / 2.) / (tand(camera_fov / 2.))
+    im_y = dy / dz * (y_sz / 2.) / (tand(camera_fov / 2.)) + y_sz / 2.
+    return np.stack([im_x, im_y], axis=-1)
+
+
 def perspective_projection_inv(image_location, 
                                camera_location, 
                                fix_location,
@@ -562,6 +750,170 @@ def aim_camera(object_location,
     return fix_location_3d
     
 
+def perspective_projection_inv_array(image_locations,
+                                     camera_locations,
+                                     fix_locations,
+                                     Z,
+                                     camera_fov=None,
+                                     camera_lens=None,
+                                     image_size=(1., 1.),
+                                     aspect_ratio=1.,
+                                     sensor_size=36.):
+    """Compute many object locations from image locations + distances (inverse perspective projection)
+
+    Vectorized version of `perspective_projection_inv()` (right-handed coordinates only),
+    e.g. for all frames of a camera trajectory at once.
+
+    Parameters
+    ----------
+    image_locations : array-like
+        (n, 2) or (2, ) x, y image position(s), as a fraction of the image (in range 0-1),
+        or in pixels if an integer array is provided
+    camera_locations : array-like
+        (n, 3) camera locations
+    fix_locations : array-like
+        (n, 3) camera fixation (target) locations
+    Z : scalar or array-like
+        (n, ) distance(s) from camera for inverse computation
+    camera_fov, camera_lens : scalar
+        specify EITHER field of view (degrees) OR lens (mm)
+    image_size : array-like
+        image size
+    aspect_ratio : scalar
+        aspect ratio of camera sensor (x / y)
+    sensor_size : scalar
+        size of sensor (mm)
+
+    Returns
+    -------
+    locations : array
+        (n, 3) array of 3D locations
+    """
+    assert sum([(camera_lens is None), (camera_fov is None)]) == 1, 'Please specify EITHER `camera_lens` or `camera_fov` input'
+    if camera_lens is not None:
+        camera_fov = [2 * atand(ss / (2 * camera_lens)) for ss in [sensor_size, sensor_size / aspect_ratio]]
+    if not isinstance(camera_fov, (list, tuple)):
+        camera_fov_x = camera_fov_y = camera_fov
+    else:
+        camera_fov_x, camera_fov_y = camera_fov
+    camera_locations = np.atleast_2d(np.asarray(camera_locations, dtype=float))
+    camera_matrices = get_camera_matrices(camera_locations, fix_locations)
+    Z = -np.abs(np.asarray(Z, dtype=float)) # ensure that Z < 0
+    image_locations = np.asarray(image_locations)
+    x_sz, y_sz = image_size
+    if np.issubdtype(image_locations.dtype, np.integer):
+        # Pixel coordinates
+        x_pos = (image_locations[..., 0] - x_sz / 2.) / (x_sz / 2.)
+        y_pos = (image_locations[..., 1] - y_sz / 2.) / (y_sz / 2.)
+        if x_sz > y_sz:
+            x_frac, y_frac = x_sz / y_sz, 1.0
+        else:
+            x_frac, y_frac = 1.0, x_sz / y_sz
+    else:
+        x_pos = (image_locations[..., 0] - 0.5) / 0.5
+        y_pos = (image_locations[..., 1] - 0.5) / 0.5
+        x_frac, y_frac = x_sz, y_sz
+    dx = -x_pos * tand(camera_fov_x / 2.) * (x_frac / 2.) * Z
+    dy = y_pos * tand(camera_fov_y / 2.) * (y_frac / 2.) * Z
+    d = np.stack(np.broadcast_arrays(2 * dx, 2 * dy, Z), axis=-1).reshape(-1, 3)
+    # Rotate & shift from camera coordinates (camera matrices are orthonormal; inverse is transpose)
+    return np.einsum('nji,nj->ni', camera_matrices, d) + camera_locations
+
+
+def aim_camera_array(object_locations,
+                     image_location,
+                     camera_locations,
+                     camera_fov=None,
+                     camera_lens=None,
+                     image_size=(1., 1.),
+                     aspect_ratio=1.):
+    """Fixation locations that put an object at a specified 2D location, for many frames at once
+
+    Vectorized version of `aim_camera()` (right-handed coordinates only). 
+
+    Parameters
+    ----------
+    object_locations : array-like
+        (n, 3) locations of object (e.g. for each frame)
+    image_location : array-like
+        (2, ) or (n, 2) image coordinate(s) at which object should appear
+    camera_locations : array-like
+        (n, 3) camera locations
+    camera_fov, camera_lens : scalar
+        specify EITHER field of view (degrees) OR lens (mm)
+    image_size : array-like
+        size of image in which `image_location` is specified
+    aspect_ratio : scalar
+        aspect ratio of camera sensor
+
+    Returns
+    -------
+    fix_locations : array
+        (n, 3) fixation locations
+    """
+    object_locations = np.atleast_2d(np.asarray(object_locations, dtype=float))
+    camera_locations = np.atleast_2d(np.asarray(camera_locations, dtype=float))
+    image_location = np.asarray(image_location)
+    image_size = np.array(image_size)
+    if all(image_size > 1):
+        # Pixel coordinates specified; flip about image center
+        fix_location_image = (image_size - image_location).astype(int)
+    else:
+        fix_location_image = 1 - image_location
+    Z = -np.linalg.norm(object_locations - camera_locations, axis=-1)
+    return perspective_projection_inv_array(fix_location_image,
+                                            camera_locations,
+                                            object_locations,
+                                            Z,
+                                            camera_fov=camera_fov,
+                                            camera_lens=camera_lens,
+                                            image_size=image_size,
+                                            aspect_ratio=aspect_ratio)
+
+
+def camera_distance_locations(camera_locations, object_locations, distance_to_set='framewise',
+                              absolute_distance=10, max_distance=10):
+    """Move cameras toward (or away from) objects along the camera-object vector
+
+    Parameters
+    ----------
+    camera_locations : array-like
+        (n, 3) camera locations (e.g. for each frame)
+    object_locations : array-like
+        (n, 3) object locations
+    distance_to_set : str
+        'framewise' to set the distance to `absolute_distance` in every frame, 
+        or 'median' to move the camera by the same vector in every frame, such that the 
+        median distance to the object is at most `max_distance`
+    absolute_distance : scalar
+        distance for 'framewise'
+    max_distance : scalar
+        maximum median distance for 'median'
+
+    Returns
+    -------
+    new_camera_locations : array
+        (n, 3) camera locations
+    """
+    camera_locations = np.atleast_2d(np.asarray(camera_locations, dtype=float))
+    cam_to_obj_vectors = np.asarray(object_locations, dtype=float) - camera_locations
+    cam_to_obj_distances = np.linalg.norm(cam_to_obj_vectors, axis=1)
+    if distance_to_set == 'median':
+        # Set median distance
+        median_distance = np.median(cam_to_obj_distances)
+        med_dist_i = np.argmin(np.abs(cam_to_obj_distances - median_distance))
+        median_vector = cam_to_obj_vectors[med_dist_i]
+        if median_distance > max_distance:
+            pct = (median_distance - max_distance) / median_distance
+            return camera_locations + median_vector * pct
+        return camera_locations.copy()
+    elif distance_to_set == 'framewise':
+        pct_framewise = (cam_to_obj_distances - absolute_distance) / cam_to_obj_distances
+        return camera_locations + cam_to_obj_vectors * pct_framewise[:, None]
+    else:
+        raise ValueError("Unknown value for `distance_to_set`!")
+
+
 class ImPosCount(object):
     def __init__(self, x_bin_edges, y_bin_edges, image_size, n_bins=None, e=1):
         """
@@ -0,0 +1,232 @@
+"""BVP mesh file input / output
+
+Reads and writes OFF mesh files (including COFF, NOFF and CNOFF variants, as
+used by the Princeton Shape Benchmark) to and from numpy arrays, with optional
+caching of parsed meshes as .npz files. Does not require Blender.
+"""
+
+import os
+import re
+import numpy as np
+
+# Optional prefixes (in this order) before "OFF" in OFF file headers
+_off_header = re.compile(r'^(ST)?(C)?(N)?(4)?(n)?OFF(.*)$')
+
+
+def _clean_lines(text):
+    """Strip comments & blank lines"""
+    lines = (line.split('#', 1)[0].strip() for line in text.splitlines())
+    return [line for line in lines if line]
+
+
+def _parse_rows(lines, n_rows, dtype=float):
+    """Parse lines with the same number of values on each line to an (n_rows, n_values) array"""
+    if n_rows == 0:
+        return np.zeros((0, 0), dtype=dtype)
+    values = np.array(' '.join(lines).split(), dtype=dtype)
+    return values.reshape(n_rows, -1)
+
+
+def triangulate(faces):
+    """Split polygons into triangles (as triangle fans)
+
+    Parameters
+    ----------
+    faces : list or array
+        list of vertex index lists (of any length >= 3), or (n_faces, k) array
+
+    Returns
+    -------
+    polys : array
+        (n_triangles, 3) array of vertex indices
+    """
+    if isinstance(faces, np.ndarray):
+        k = faces.shape[1]
+        if k == 3:
+            return faces
+        tris = [np.stack([faces[:, 0], faces[:, i], faces[:, i+1]], axis=1) for i in range(1, k-1)]
+        return np.stack(tris, axis=1).reshape(-1, 3)
+    tris = [(f[0], f[i], f[i+1]) for f in faces for i in range(1, len(f)-1)]
+    return np.array(tris, dtype=np.int64).reshape(-1, 3)
+
+
+def _faces_from_rows(faces, n_vertices):
+    """Triangles (and face colors) from uniform (n_faces, n_values) face rows, or None if not uniform"""
+    k = int(faces[0, 0])
+    if (faces.shape[1] < k + 1) or np.any(faces[:, 0] != k):
+        return None
+    polys = faces[:, 1:k + 1]
+    if np.any(polys != np.round(polys)) or np.any(polys >= n_vertices) or np.any(polys < 0):
+        return None
+    face_colors = None
+    if faces.shape[1] > k + 1:
+        face_colors = np.repeat(faces[:, k + 1:], k - 2, axis=0)
+    return triangulate(polys.astype(np.int64)), face_colors
+
+
+def parse_off(text):
+    """Parse the text of an OFF / COFF / NOFF / CNOFF file
+
+    Parameters
+    ----------
+    text : str
+        contents of file
+
+    Returns
+    -------
+    mesh : dict
+        dictionary with fields:
+        pts : (n_vertices, 3) array of vertex locations
+        polys : (n_triangles, 3) array of vertex indices for each triangle
+            (polygons with more than 3 vertices are split into triangles)
+        vertex_normals : (n_vertices, 3) array or None (for NOFF files)
+        vertex_colors : (n_vertices, 3 or 4) array or None (for COFF files)
+        face_colors : (n_triangles, 3 or 4) array or None (if specified in file)
+    """
+    # Read header line(s), skipping comments
+    header_lines, pos = [], 0
+    while (len(header_lines) < 2) and (pos < len(text)):
+        end = text.find('\n', pos)
+        end = len(text) if end < 0 else end + 1
+        line = text[pos:end].split('#', 1)[0].strip()
+        pos = end
+        if line:
+            header_lines.append(line)
+            header = _off_header.match(header_lines[0])
+            if header is None:
+                raise ValueError('Not an OFF file (header: %s)'%header_lines[0])
+            if header.group(6).strip():
+                # Counts follow header on the same line (e.g. "OFF490 518 0")
+                break
+    _, has_color, has_normals, is_4d, is_ndim, rest = header.groups()
+    if is_4d or is_ndim:
+        raise NotImplementedError('4OFF and nOFF files are not supported')
+    counts = (rest if rest.strip() else header_lines[1]).split()
+    n_vertices, n_faces = int(counts[0]), int(counts[1])
+    body = text[pos:]
+    polys, face_colors = None, None
+    values = None
+    if '#' not in body:
+        # Fast path: parse all values at once
+        values = np.fromstring(body, sep=' ')
+        n_cols = len(body.lstrip().split('\n', 1)[0].split()) if n_vertices > 0 else 3
+        n_values = n_vertices * n_cols
+    if (values is not None) and (len(values) >= n_values):
+        vertices = values[:n_values].reshape(n_vertices, n_cols)
+        face_values = values[n_values:]
+        if n_faces == 0:
+            polys = np.zeros((0, 3), dtype=np.int64)
+        elif len(face_values) % n_faces == 0:
+            out = _faces_from_rows(face_values.reshape(n_faces, -1), n_vertices)
+            if out is not None:
+                polys, face_colors = out
+    if polys is None:
+        # Slower path: parse line by line
+        lines = _clean_lines(body)
+        vertices = _parse_rows(lines[:n_vertices], n_vertices)
+        face_lines = lines[n_vertices:n_vertices + n_faces]
+        if len(face_lines) < n_faces:
+            raise ValueError('OFF file is truncated (%d of %d faces)'%(len(face_lines), n_faces))
+        faces = [line.split() for line in face_lines]
+        n_tokens = set(len(f) for f in faces)
+        out = None
+        if len(n_tokens) == 1:
+            out = _faces_from_rows(_parse_rows(face_lines, n_faces), n_vertices)
+        if out is not None:
+            polys, face_colors = out
+        else:
+            # Mixed polygons
+            polys = triangulate([[int(v) for v in f[1:int(f[0]) + 1]] for f in faces])
+    # Vertices: x y z [nx ny nz] [r g b [a]]
+    pts = vertices[:, :3]
+    col = 3
+    vertex_normals, vertex_colors = None, None
+    if has_normals:
+        vertex_normals = vertices[:, col:col + 3]
+        col += 3
+    if has_color:
+        vertex_colors = vertices[:, col:]
+    return dict(pts=pts, polys=polys, vertex_normals=vertex_normals,
+                vertex_colors=vertex_colors, face_colors=face_colors)
+
+
+def _cache_file(fname, cache_dir=None):
+    if cache_dir is None:
+        return os.path.splitext(fname)[0] + '.npz'
+    return os.path.join(cache_dir, os.path.splitext(os.path.basename(fname))[0] + '.npz')
+
+
+def read_off(fname, cache=False, cache_dir=None, return_dict=False):
+    """Read mesh from an OFF / COFF / NOFF / CNOFF file
+
+    Parameters
+    ----------
+    fname : str
+        file name
+    cache : bool
+        if True, parsed meshes are saved to (and loaded from, if the cache file
+        is newer than the OFF file) a .npz file.
+    cache_dir : str | None
+        directory for .npz cache files. Defaults to the directory of the OFF file.
+    return_dict : bool
+        if True, return a dict with vertex normals & colors (see `parse_off`)
+        rather than only (pts, polys)
+
+    Returns
+    -------
+    pts : array
+        (n_vertices, 3) array of vertex locations
+    polys : array
+        (n_triangles, 3) array of vertex indices (ready for `bvp.Classes.shape.Shape(pts, polys)`)
+    """
+    cache_file = _cache_file(fname, cache_dir)
+    if (cache and os.path.exists(cache_file) and
+            os.path.getmtime(cache_file) >= os.path.getmtime(fname)):
+        with np.load(cache_file, allow_pickle=False) as npz:
+            mesh = dict((k, None) for k in ('vertex_normals', 'vertex_colors', 'face_colors'))
+            mesh.update((k, npz[k]) for k in npz.files)
+    else:
+        with open(fname, 'r') as fid:
+            mesh = parse_off(fid.read())
+        if cache:
+            np.savez(cache_file, **dict((k, v) for k, v in mesh.items() if v is not None))
+    if return_dict:
+        return mesh
+    return mesh['pts'], mesh['polys']
+
+
+def write_off(fname, pts, polys, vertex_normals=None, vertex_colors=None, fmt='%.16g'):
+    """Write mesh to an OFF file (NOFF / COFF / CNOFF if normals / colors are provided)
+
+    Parameters
+    ----------
+    fname : str
+        file name
+    pts : array
+        (n_vertices, 3) array of vertex locations
+    polys : array or list
+        (n_faces, k) array of vertex indices, or list of vertex index lists
+    vertex_normals : array | None
+        (n_vertices, 3) array of vertex normals
+    vertex_colors : array | None
+        (n_vertices, 3 or 4) array of vertex colors
+    fmt : str
+        format for vertex values
+    """
+    pts = np.asarray(pts, dtype=float).reshape(-1, 3)
+    columns = [pts]
+    header = 'OFF'
+    if vertex_normals is not None:
+        columns.append(np.asarray(vertex_normals, dtype=float))
+        header = 'N' + header
+    if vertex_colors is not None:
+        columns.append(np.asarray(vertex_colors, dtype=float))
+        header = 'C' + header
+    with open(fname, 'w') as fid:
+        fid.write('%s\n%d %d 0\n'%(header, len(pts), len(polys)))
+        np.savetxt(fid, np.hstack(columns), fmt=fmt)
+        if isinstance(polys, np.ndarray) and polys.ndim == 2:
+            k = np.full((len(polys), 1), polys.shape[1], dtype=np.int64)
+            np.savetxt(fid, np.hstack([k, polys.astype(np.int64)]), fmt='%d')
+        else:
+            fid.write(''.join('%d %s\n'%(len(p), ' '.join('%d'%v for v in p)) for p in polys))
@@ -0,0 +1,158 @@
+"""BVP rigid-body physics bake cache
+
+Rigid-body simulations (see `bvp.utils.blender.make_physics_animation`) are
+re-run by Blender every time a scene is rendered. This module stores the
+simulated trajectories (per-frame location and rotation of each rigid-body
+object) as small .npz files, keyed by a hash of everything that determines the
+simulation: background, objects, start poses, throw vectors, frame range, and
+simulation substeps. Cached trajectories can be applied as plain keyframes (see
+`bvp.utils.blender.apply_baked_animation`), so that re-renders and multi-pass
+renders of the same scene skip the simulation. Does not require Blender.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+
+def _round(x, decimals=6):
+    """Round (nested lists of) floats for stable hashing"""
+    if x is None:
+        return None
+    return np.round(np.asarray(x, dtype=float), decimals).tolist()
+
+
+def physics_key(objects, frames, substeps_per_frame=10, fps=15, background=None, extra=None):
+    """Hash of all inputs that determine a rigid-body simulation
+
+    Parameters
+    ----------
+    objects : list
+        all bvp Objects in the scene. Objects with `rigid_body=True` are
+        simulated; all other objects are part of the key too, since simulated
+        objects can collide with them.
+    frames : tuple
+        (first, last) frame simulated
+    substeps_per_frame : int
+        simulation substeps per frame
+    fps : int
+        frame rate
+    background : bvp Background | None
+        scene background (the ground & other surfaces objects collide with);
+        identified by name and database `_id` & `_rev`
+    extra : object | None
+        any other json-serializable value that should change the key (e.g.
+        the Blender version, since simulation results vary across versions)
+
+    Returns
+    -------
+    key : str
+        sha1 hex digest
+    """
+    obs = []
+    for ob in objects:
+        action = getattr(ob, 'action', None)
+        spec = dict(name=ob.name,
+                    size3D=_round(ob.size3D),
+                    pos3D=_round(ob.pos3D),
+                    rot3D=_round(ob.rot3D),
+                    action=None if action is None else action.name,
+                    rigid_body=bool(getattr(ob, 'rigid_body', False)))
+        if spec['rigid_body']:
+            spec.update(movement_locations=_round(ob.movement_locations),
+                        movement_frames=_round(ob.movement_frames),
+                        movement_rotation_euler=_round(ob.movement_rotation_euler))
+        obs.append(spec)
+    if background is not None:
+        background = dict(name=background.name,
+                          _id=getattr(background, '_id', None),
+                          _rev=getattr(background, '_rev', None))
+    spec = dict(objects=obs, background=background, frames=[int(f) for f in frames],
+                substeps_per_frame=int(substeps_per_frame), fps=int(fps), extra=extra)
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class BakedPhysics(object):
+    """Simulated rigid-body trajectories for one scene"""
+    def __init__(self, frames, location, rotation_euler, names=None):
+        """
+        Parameters
+        ----------
+        frames : array
+            (n_frames,) frame numbers
+        location : array
+            (n_objects, n_frames, 3) object locations at each frame
+        rotation_euler : array
+            (n_objects, n_frames, 3) object rotations (XYZ euler angles, radians)
+            at each frame
+        names : list | None
+            object names (for reference only)
+        """
+        self.frames = np.asarray(frames, dtype=np.int32)
+        self.location = np.asarray(location, dtype=np.float32)
+        self.rotation_euler = np.asarray(rotation_euler, dtype=np.float32)
+        self.names = list(names) if names is not None else [None] * len(self.location)
+        if self.location.shape != self.rotation_euler.shape or self.location.shape[1:] != (len(self.frames), 3):
+            raise ValueError('location and rotation_euler must both be (n_objects, n_frames, 3) arrays')
+
+    def __len__(self):
+        return len(self.location)
+
+    def __repr__(self):
+        return '<BakedPhysics: %d objects, frames %d-%d>'%(len(self), self.frames[0], self.frames[-1])
+
+    def save(self, fname):
+        """Save to .npz file (written to a temporary file first, so partial files are never read)"""
+        tmp = fname + '.tmp.npz'
+        np.savez_compressed(tmp, frames=self.frames, location=self.location,
+                            rotation_euler=self.rotation_euler,
+                            names=np.array([str(n) for n in self.names]))
+        os.replace(tmp, fname)
+
+    @classmethod
+    def load(cls, fname):
+        with np.load(fname, allow_pickle=False) as npz:
+            return cls(npz['frames'], npz['location'], npz['rotation_euler'], names=npz['names'].tolist())
+
+
+class PhysicsCache(object):
+    """Directory of baked rigid-body simulations, keyed by `physics_key`"""
+    def __init__(self, path):
+        """Open (or create) a physics cache
+
+        Parameters
+        ----------
+        path : str
+            directory for baked simulation files
+        """
+        self.path = path
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def __repr__(self):
+        return '<PhysicsCache %s: %d simulations>'%(self.path, len(self.keys()))
+
+    def _fname(self, key):
+        return os.path.join(self.path, '%s.npz'%key)
+
+    def __contains__(self, key):
+        return os.path.exists(self._fname(key))
+
+    def __getitem__(self, key):
+        if not key in self:
+            raise KeyError(key)
+        return BakedPhysics.load(self._fname(key))
+
+    def __setitem__(self, key, baked):
+        baked.save(self._fname(key))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return sorted(os.path.splitext(f)[0] for f in os.listdir(self.path)
+                      if f.endswith('.npz') and not f.endswith('.tmp.npz'))
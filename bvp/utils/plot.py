@@ -5,7 +5,6 @@ import glob
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.colors import Normalize, LinearSegmentedColormap
-import skimage.color as skcol
 
 from .math import circ_dist
 
@@ -18,10 +17,14 @@ try:
 except:
     pass
 
-try: 
-    import cv2
-except ImportError:
-    print("Missing cv2, some plot functions won't work")
+
+def _cv2():
+    # Imported on first use (slow to import, and only needed for .exr files)
+    try: 
+        import cv2
+    except ImportError:
+        raise ImportError("Missing cv2, required to load .exr files")
+    return cv2
 
 def plot_cam_location(camera_list, n, fig=None, ax=None):
     FigSz = (8, 8)
@@ -52,6 +55,7 @@ def plot_cam_location(camera_list, n, fig=None, ax=None):
 
 def load_exr_normals(f, xflip=True, yflip=True, zflip=True, clip=True):
     """Load exr file with assumption that values are surface normals"""
+    cv2 = _cv2()
     img = cv2.imread(f, cv2.IMREAD_UNCHANGED)
     imc = img-1
     y, z, x = imc.T
@@ -90,6 +94,7 @@ def norm_color_image(tilt, slant, cmap=ret, vmin_t=0, vmax_t=2 * np.pi,
     # Convert normalized tilt to RGB color
     tilt_rgb_orig = cmap(norm_t(tilt))
     # Convert to HSV, replace saturation w/ normalized slant value
+    import skimage.color as skcol
     tilt_hsv = skcol.rgb2hsv(tilt_rgb_orig[...,:3])
     tilt_hsv[:,:,1] = norm_s(slant)
     # Convert back to RGB
@@ -113,6 +118,7 @@ def load_exr_zdepth(f, thresh=1000):
     thresh : scalar
 
     """
+    cv2 = _cv2()
     img = cv2.imread(f, cv2.IMREAD_UNCHANGED)
     z = img[..., 0]
     z[z > thresh] = np.nan
@@ -0,0 +1,151 @@
+"""BVP shared render store
+
+Rendered output files, stored by scene content hash (see
+`bvp.Scene.content_hash`), so that a scene that has already been rendered (as
+part of any scene list) can be hard-linked into a new output directory instead
+of being rendered again.
+
+Layout: <path>/<key[:2]>/<key>/ holds the rendered files (with relative paths
+as in the original output directory, and the scene name replaced by
+'{scene_name}'), and a manifest.json listing them. The manifest is written
+last, so entries without one are incomplete and are ignored.
+"""
+
+import os
+import glob
+import json
+import shutil
+
+
+def link_or_copy(src, dst):
+    """Hard-link `src` to `dst` (copy if hard links are not possible, e.g. across file systems)"""
+    dst_dir = os.path.dirname(dst)
+    if dst_dir and not os.path.exists(dst_dir):
+        os.makedirs(dst_dir)
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def list_files(path):
+    """{relative file name: modification time} for all files under `path`"""
+    out = {}
+    if not os.path.exists(path):
+        return out
+    for root, _, files in os.walk(path):
+        for f in files:
+            fname = os.path.join(root, f)
+            out[os.path.relpath(fname, path)] = os.path.getmtime(fname)
+    return out
+
+
+def list_scene_files(base_dir, scene_name=None):
+    """{relative file name: modification time} for one scene's files in render output directory `base_dir`
+
+    Only files named <scene_name>* in `base_dir` and in each render pass folder 
+    (Scenes, Masks, etc) directly under it are listed, so that the cost does not
+    grow with the number of scenes rendered to the same directory. If `scene_name`
+    is None, all files under `base_dir` are listed.
+    """
+    if scene_name is None:
+        return list_files(base_dir)
+    pattern = glob.escape(scene_name) + '*'
+    out = {}
+    for fname in glob.glob(os.path.join(glob.escape(base_dir), pattern)) + \
+            glob.glob(os.path.join(glob.escape(base_dir), '*', pattern)):
+        if os.path.isfile(fname):
+            out[os.path.relpath(fname, base_dir)] = os.path.getmtime(fname)
+    return out
+
+
+class RenderStore(object):
+    """Directory of rendered files, keyed by scene content hash"""
+    manifest = 'manifest.json'
+
+    def __init__(self, path):
+        """Open (or create) a render store
+
+        Parameters
+        ----------
+        path : str
+            directory for stored renders
+        """
+        self.path = path
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def __repr__(self):
+        return '<RenderStore %s>'%self.path
+
+    def _dir(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self._dir(key), self.manifest))
+
+    def keys(self):
+        return sorted(k for d in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, d))
+                      for k in os.listdir(os.path.join(self.path, d)) if k in self)
+
+    def files(self, key):
+        """Stored (relative) file names for `key`"""
+        if not key in self:
+            raise KeyError(key)
+        with open(os.path.join(self._dir(key), self.manifest)) as fid:
+            return json.load(fid)['files']
+
+    def add(self, key, files, base_dir, scene_name=None, info=None):
+        """Add rendered files to the store
+
+        Parameters
+        ----------
+        key : str
+            scene content hash
+        files : list
+            file names, relative to `base_dir`
+        base_dir : str
+            render output directory
+        scene_name : str | None
+            scene name (as used in output file names); replaced by '{scene_name}'
+            in stored names, so files can be linked for scenes with other names
+        info : dict | None
+            any extra (json-serializable) information to save in the manifest
+        """
+        stored = []
+        for f in files:
+            name = f.replace(scene_name, '{scene_name}') if scene_name else f
+            link_or_copy(os.path.join(base_dir, f), os.path.join(self._dir(key), name))
+            stored.append(name)
+        manifest = dict(files=sorted(stored), info=info)
+        tmp = os.path.join(self._dir(key), self.manifest + '.tmp')
+        with open(tmp, 'w') as fid:
+            json.dump(manifest, fid)
+        os.replace(tmp, os.path.join(self._dir(key), self.manifest))
+
+    def link(self, key, base_dir, scene_name=None):
+        """Hard-link stored files for `key` into `base_dir`
+
+        Parameters
+        ----------
+        key : str
+            scene content hash
+        base_dir : str
+            render output directory
+        scene_name : str | None
+            scene name to substitute into stored file names
+
+        Returns
+        -------
+        files : list
+            full paths of linked files
+        """
+        out = []
+        for name in self.files(key):
+            f = name.replace('{scene_name}', scene_name) if scene_name else name
+            dst = os.path.join(base_dir, f)
+            link_or_copy(os.path.join(self._dir(key), name), dst)
+            out.append(dst)
+        return out
@@ -0,0 +1,236 @@
+"""BVP serialization utilities
+
+Fast save / load of scenes (and other bvp data classes) to and from data
+dictionaries (the same format produced by `MappedClass.get_datadict()` and
+read by `MappedClass.from_datadict()`), with optional orjson / msgpack backends
+and batch functions for whole scene lists.
+"""
+
+import os
+import json
+import inspect
+import importlib
+import numpy as np
+
+try:
+    import orjson
+    has_orjson = True
+except ImportError:
+    has_orjson = False
+
+try:
+    import msgpack
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+# Per-class schemas: class -> (data fields, 'module.ClassName' tag)
+_schemas = {}
+# 'module.ClassName' tag -> (class, whether class __init__ takes `dbi` arg)
+_classes = {}
+
+
+def _get_schema(ob):
+    cls = type(ob)
+    if cls not in _schemas:
+        # Placement records are saved as the objects they place
+        target = type(getattr(ob, 'source', ob))
+        # `_data_fields` are the same for all instances of each class
+        fields = tuple(f for f in ob._data_fields if f != '_id')
+        tag = '.'.join([target.__module__.split('.')[-1], target.__name__])
+        _schemas[cls] = (fields, tag)
+    return _schemas[cls]
+
+
+def _get_class(tag):
+    if tag not in _classes:
+        module, clsname = tag.split('.')
+        module = importlib.import_module('bvp.Classes.%s'%module)
+        cls = getattr(module, clsname)
+        takes_dbi = 'dbi' in inspect.signature(cls.__init__).parameters
+        _classes[tag] = (cls, takes_dbi)
+    return _classes[tag]
+
+
+def _is_data_object(value):
+    # MappedClass instances or Placement records
+    return hasattr(value, 'get_datadict')
+
+
+_scalar_types = frozenset([str, int, float, bool, type(None)])
+
+
+def _to_native(value):
+    """Convert tuples, numpy arrays & numpy scalars to json-native types"""
+    t = type(value)
+    if t in _scalar_types:
+        return value
+    elif isinstance(value, (list, tuple)):
+        return [v if type(v) in _scalar_types else _to_native(v) for v in value]
+    elif isinstance(value, dict):
+        return dict((k, _to_native(v)) for k, v in value.items())
+    elif isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+
+def to_datadict(ob):
+    """Data dictionary for a bvp object
+
+    Equivalent to json.loads(json.dumps(ob.get_datadict())), but uses
+    precompiled field lists per class and produces json-native values
+    (lists, floats, etc) directly.
+
+    Parameters
+    ----------
+    ob : bvp.Scene, bvp.Object, bvp.Placement, etc
+        object to convert
+    """
+    fields, tag = _get_schema(ob)
+    output = dict()
+    for field in fields:
+        tmp = getattr(ob, field)
+        if tmp is None:
+            # Skip all None attrs; those should have defaults.
+            continue
+        if isinstance(tmp, (list, tuple)) and len(tmp) > 0 and _is_data_object(tmp[0]):
+            output[field] = [to_datadict(t) for t in tmp]
+        elif _is_data_object(tmp):
+            output[field] = to_datadict(tmp)
+        else:
+            output[field] = _to_native(tmp)
+    _id = getattr(ob, '_id', None)
+    if _id is not None:
+        output['_id'] = _id
+    output['bvp_object'] = tag
+    return output
+
+
+def from_datadict(datadict, dbi=None, library=None):
+    """Create a bvp object from a data dictionary
+
+    Equivalent to MappedClass.from_datadict(), but with cached class lookups.
+    Database documents for database elements (with an `_id`) are taken from
+    `library` (a bvp.LibraryCache) if provided, else queried from `dbi`.
+    `datadict` is not modified.
+
+    Parameters
+    ----------
+    datadict : dict
+        data dictionary (as created by `to_datadict()`)
+    dbi : bvp.DBInterface
+        database interface
+    library : bvp.LibraryCache
+        cache of library element metadata, to avoid database queries.
+    """
+    if not (isinstance(datadict, dict) and 'bvp_object' in datadict):
+        return datadict
+    cls, takes_dbi = _get_class(datadict['bvp_object'])
+    kw = {}
+    for key, value in datadict.items():
+        if key in ('bvp_object', '_id'):
+            continue
+        if isinstance(value, dict):
+            value = from_datadict(value, dbi=dbi, library=library)
+        elif isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
+            value = [from_datadict(v, dbi=dbi, library=library) for v in value]
+        kw[key] = value
+    # Get database info for database mapped objects
+    if '_id' in datadict:
+        if library is not None:
+            docdict = library.get(datadict['_id']).doc
+        else:
+            docdict = dbi.query_documents(1, _id=datadict['_id'])
+        docdict = dict(docdict)
+        docdict.update(kw)
+        kw = docdict
+    ob = cls.__new__(cls)
+    if takes_dbi:
+        # For database classes
+        kw['dbi'] = dbi
+    ob.__init__(**kw)
+    return ob
+
+
+def _get_format(fname, fmt):
+    if fmt is None:
+        fmt = 'msgpack' if os.path.splitext(fname)[1].lower() in ('.msgpack', '.mpk') else 'json'
+    if fmt not in ('json', 'msgpack'):
+        raise ValueError('Unknown serialization format: %s'%fmt)
+    if (fmt == 'msgpack') and not has_msgpack:
+        raise ImportError('msgpack is required to save / load .msgpack files')
+    return fmt
+
+
+def dumps(data, fmt='json'):
+    """Encode json-native data (e.g. from `to_datadict()`) as bytes
+
+    json is encoded with orjson if it is available.
+    """
+    if fmt == 'msgpack':
+        return msgpack.packb(data, use_bin_type=True)
+    if has_orjson:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+
+def loads(b, fmt='json'):
+    """Decode bytes encoded by `dumps()`"""
+    if fmt == 'msgpack':
+        return msgpack.unpackb(b, raw=False)
+    if has_orjson:
+        return orjson.loads(b)
+    return json.loads(b)
+
+
+def _write(data, fname, fmt):
+    with open(fname, 'wb') as fid:
+        fid.write(dumps(data, fmt=_get_format(fname, fmt)))
+
+
+def save(ob, fname, fmt=None):
+    """Save a bvp object (e.g. a Scene) to a .json or .msgpack file"""
+    _write(to_datadict(ob), fname, fmt)
+
+
+def load(fname, dbi=None, library=None, fmt=None):
+    """Load a bvp object (e.g. a Scene) from a .json or .msgpack file"""
+    return load_many(fname, dbi=dbi, library=library, fmt=fmt)
+
+
+def save_many(obs, fname, fmt=None):
+    """Save a list of bvp objects (e.g. all scenes in a scene list) to one file
+
+    Parameters
+    ----------
+    obs : list
+        list of bvp Scenes (or other objects with `_data_fields`)
+    fname : str
+        file name. File format is determined by extension (.json or .msgpack)
+        unless `fmt` is provided.
+    fmt : str
+        'json' or 'msgpack'
+    """
+    _write([to_datadict(ob) for ob in obs], fname, fmt)
+
+
+def load_many(fname, dbi=None, library=None, fmt=None):
+    """Load bvp object(s) saved by `save_many()` or `save()`
+
+    Parameters
+    ----------
+    fname : str
+        file name
+    dbi : bvp.DBInterface
+        database interface, for database elements in saved data
+    library : bvp.LibraryCache
+        cache of library metadata; if provided, no database queries are made.
+    fmt : str
+        'json' or 'msgpack'; determined from file extension by default.
+    """
+    fmt = _get_format(fname, fmt)
+    with open(fname, 'rb') as fid:
+        data = loads(fid.read(), fmt=fmt)
+    if isinstance(data, list):
+        return [from_datadict(d, dbi=dbi, library=library) for d in data]
+    return from_datadict(data, dbi=dbi, library=library)
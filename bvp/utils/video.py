@@ -0,0 +1,208 @@
+"""BVP video encoding
+
+Encodes rendered frame sequences (e.g. Scenes/Sc0000001_01.png, ...) to one
+video per scene by streaming frame files through a pipe into an ffmpeg
+subprocess. `VideoEncoder` runs encoding jobs in a bounded pool of threads, so
+that each scene can be encoded while the next scenes render, and can delete
+frames once a video has been verified (by counting its frames with ffprobe).
+"""
+
+import os
+import re
+import glob
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from ..options import config
+
+# Codecs for ffmpeg's image2pipe demuxer, by frame file extension
+_pipe_codecs = dict(png='png', jpg='mjpeg', jpeg='mjpeg', bmp='bmp', tif='tiff', tiff='tiff')
+
+
+def _ffmpeg_cmd():
+    return config.get('path', 'ffmpeg_cmd', fallback='ffmpeg')
+
+
+def _ffprobe_cmd(ffmpeg):
+    # ffprobe is installed alongside ffmpeg
+    head, tail = os.path.split(ffmpeg)
+    return os.path.join(head, tail.replace('ffmpeg', 'ffprobe'))
+
+
+def frame_files(directory, scene_name, ext='png'):
+    """Rendered frames for one scene, sorted by frame number
+
+    Parameters
+    ----------
+    directory : str
+        directory of rendered frames (e.g. <render_dir>/Scenes)
+    scene_name : str
+        file name prefix for the scene (scene fname up to '#' frame number
+        placeholders, e.g. 'Sc0000001_')
+    ext : str
+        image file extension
+    """
+    pattern = re.compile(re.escape(scene_name) + r'(\d+)\.' + re.escape(ext) + '$')
+    files = []
+    for f in glob.glob(os.path.join(glob.escape(directory), glob.escape(scene_name) + '*.' + ext)):
+        m = pattern.match(os.path.basename(f))
+        if m is not None:
+            files.append((int(m.group(1)), f))
+    return [f for _, f in sorted(files)]
+
+
+def encode_frames(frames, fname, fps=15, codec='libx264', crf=18, pix_fmt='yuv420p',
+                  input_format=None, ffmpeg=None, extra_args=()):
+    """Encode a list of frame files to a video file, streaming frames through a pipe to ffmpeg
+
+    Parameters
+    ----------
+    frames : list
+        frame file names, in order
+    fname : str
+        output video file name
+    fps : scalar
+        frame rate of video
+    codec : str
+        ffmpeg video codec
+    crf : int | None
+        constant rate factor (quality; lower is better) for codec
+    pix_fmt : str
+        output pixel format
+    input_format : str | None
+        codec of frame files (for ffmpeg's image2pipe demuxer). Defaults to
+        codec for extension of first frame file (png, jpg, bmp, tif).
+    ffmpeg : str | None
+        ffmpeg command. Defaults to `ffmpeg_cmd` in [path] section of bvp config.
+    extra_args : tuple
+        additional output arguments for ffmpeg
+
+    Returns
+    -------
+    fname : str
+        output file name
+    """
+    if len(frames) == 0:
+        raise ValueError('No frames to encode for %s'%fname)
+    if ffmpeg is None:
+        ffmpeg = _ffmpeg_cmd()
+    if input_format is None:
+        ext = os.path.splitext(frames[0])[1].lstrip('.').lower()
+        if ext not in _pipe_codecs:
+            raise ValueError('Unsupported frame file type for video encoding: %s'%ext)
+        input_format = _pipe_codecs[ext]
+    out_dir = os.path.dirname(fname)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    cmd = [ffmpeg, '-y', '-loglevel', 'error',
+           '-f', 'image2pipe', '-framerate', str(fps), '-vcodec', input_format, '-i', '-',
+           '-vcodec', codec, '-pix_fmt', pix_fmt, '-r', str(fps)]
+    if crf is not None:
+        cmd += ['-crf', str(crf)]
+    # Even frame dimensions are required for yuv420p
+    cmd += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2'] + list(extra_args) + [fname]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    try:
+        for f in frames:
+            with open(f, 'rb') as fid:
+                proc.stdin.write(fid.read())
+    except BrokenPipeError:
+        # ffmpeg exited early; error is reported below
+        pass
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+    err = proc.stderr.read()
+    proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError('ffmpeg failed to encode %s:\n%s'%(fname, err.decode('utf-8', 'replace')))
+    return fname
+
+
+def count_frames(fname, ffprobe=None):
+    """Number of video frames in a file (from ffprobe)"""
+    if ffprobe is None:
+        ffprobe = _ffprobe_cmd(_ffmpeg_cmd())
+    cmd = [ffprobe, '-v', 'error', '-select_streams', 'v:0', '-count_packets',
+           '-show_entries', 'stream=nb_read_packets', '-of', 'csv=p=0', fname]
+    out = subprocess.check_output(cmd)
+    return int(out.decode('utf-8').strip().split(',')[0])
+
+
+class VideoEncoder(object):
+    """Bounded pool of threads that encode frame sequences to videos"""
+    def __init__(self, max_workers=2, delete_frames=False, ffmpeg=None, **encode_kwargs):
+        """
+        Parameters
+        ----------
+        max_workers : int
+            maximum number of concurrent encoding jobs (each runs one ffmpeg process)
+        delete_frames : bool
+            whether to delete frame files after a video is encoded and its
+            frame count has been verified
+        ffmpeg : str | None
+            ffmpeg command. Defaults to `ffmpeg_cmd` in [path] section of bvp config.
+        encode_kwargs :
+            passed to `encode_frames` (codec, crf, etc)
+        """
+        self.max_workers = max_workers
+        self.delete_frames = delete_frames
+        self.ffmpeg = _ffmpeg_cmd() if ffmpeg is None else ffmpeg
+        self.encode_kwargs = encode_kwargs
+        self.futures = []
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __repr__(self):
+        n_done = sum(f.done() for f in self.futures)
+        return '<VideoEncoder: %d of %d videos done>'%(n_done, len(self.futures))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        self.close()
+        if exc_type is None:
+            # Raise encoding errors (unless already raising another error)
+            self.wait()
+
+    def _encode(self, frames, fname, fps):
+        encode_frames(frames, fname, fps=fps, ffmpeg=self.ffmpeg, **self.encode_kwargs)
+        if self.delete_frames:
+            n_frames = count_frames(fname, ffprobe=_ffprobe_cmd(self.ffmpeg))
+            if n_frames != len(frames):
+                raise RuntimeError('%s has %d frames, expected %d; not deleting frames'%(
+                    fname, n_frames, len(frames)))
+            for f in frames:
+                os.remove(f)
+        return fname
+
+    def submit(self, frames, fname, fps=15):
+        """Queue a frame sequence for encoding
+
+        Parameters
+        ----------
+        frames : list
+            frame file names, in order
+        fname : str
+            output video file name
+        fps : scalar
+            frame rate of video (e.g. Scene.frame_rate)
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            result is output file name
+        """
+        future = self._pool.submit(self._encode, list(frames), fname, fps)
+        self.futures.append(future)
+        return future
+
+    def wait(self):
+        """Wait for all queued videos; returns output file names (raises the first error, if any)"""
+        return [f.result() for f in self.futures]
+
+    def close(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,291 @@
+"""BVP voxel volume storage
+
+Filled, voxelized object volumes (as computed from .verts files by
+`DBInterface.CreateSolidVol`) stored as bit-packed, zlib-compressed chunks with
+a json header giving volume shape, voxel resolution, and a hash of the source
+file. Files are memory-mapped when read, and chunks are only decompressed when
+they are accessed.
+
+File layout: magic string, 4-byte (little-endian) header length, json header,
+then compressed chunks (slabs along the first volume axis) back to back.
+"""
+
+import os
+import json
+import zlib
+import struct
+import hashlib
+import multiprocessing
+import numpy as np
+
+_magic = b'BVPVOX1\n'
+
+
+def file_hash(fname, block_size=2**20):
+    """sha1 hash of file contents"""
+    h = hashlib.sha1()
+    with open(fname, 'rb') as fid:
+        for block in iter(lambda: fid.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def voxelize_verts(fname, vRes=96, buf=4):
+    """Create a filled object mask volume from a .verts file of voxelized surface coordinates
+
+    Parameters
+    ----------
+    fname : str
+        .verts file (one comma-separated x, y, z coordinate per line, for objects
+        scaled to 10 blender units)
+    vRes : int
+        voxel resolution (number of voxels across 10 blender units)
+    buf : int
+        number of buffer voxels around object
+
+    Returns
+    -------
+    vol : array
+        (vRes+buf, vRes+buf, vRes+buf*2) boolean volume
+    """
+    from scipy.ndimage import binary_fill_holes as imfill # Fills holes in multi-dim images
+    vL = np.loadtxt(fname, delimiter=',', ndmin=2)
+    # Create blank matrix
+    z = np.zeros((vRes+buf, vRes+buf, vRes+buf*2), dtype=bool)
+    # Normalize matrix to indices for volume
+    vLn = vL/(10./vRes) -.5 + buf/2. # .5 is a half-voxel shift down
+    vLn.T[0:2] += vRes/2. # Move X, Y to center
+    vLn.T[2] += buf/2. # Move Z up (off floor) by "buf"/2 again
+    # Check for closeness of values to rounded values
+    S = np.sqrt(np.sum((np.round(vLn)-vLn)**2))/len(vLn.flatten())
+    if S > .001:
+        raise Exception('Your voxelized coordinates do not round to whole number indices!')
+    idx = np.round(vLn).astype(int)
+    z[tuple(idx.T)] = True
+    # May need fancier strel (structure element - 2nd argument) for some objects
+    return imfill(z)
+
+
+def write_voxels(fname, vol, resolution=None, origin=None, chunk_size=16, source_hash=None, level=6):
+    """Write a boolean volume to a compressed, chunked voxel file
+
+    Parameters
+    ----------
+    fname : str
+        output file name
+    vol : array
+        3D boolean volume
+    resolution : float | None
+        size of each voxel (blender units)
+    origin : tuple | None
+        location of the corner of the first voxel (blender units)
+    chunk_size : int
+        number of slices (along first axis) per compressed chunk
+    source_hash : str | None
+        hash of the source file the volume was computed from (see `file_hash`)
+    level : int
+        zlib compression level
+    """
+    vol = np.asarray(vol, dtype=bool)
+    chunks = []
+    for i in range(0, vol.shape[0], chunk_size):
+        chunks.append(zlib.compress(np.packbits(vol[i:i+chunk_size], axis=None).tobytes(), level))
+    header = dict(shape=list(vol.shape), resolution=resolution, origin=origin,
+                  chunk_size=chunk_size, chunk_bytes=[len(c) for c in chunks],
+                  source_hash=source_hash)
+    header = json.dumps(header).encode('utf-8')
+    tmp = fname + '.tmp'
+    with open(tmp, 'wb') as fid:
+        fid.write(_magic)
+        fid.write(struct.pack('<I', len(header)))
+        fid.write(header)
+        for c in chunks:
+            fid.write(c)
+    os.replace(tmp, fname)
+
+
+def read_header(fname):
+    """Read header (shape, resolution, source hash, etc) of a voxel file without reading data"""
+    with open(fname, 'rb') as fid:
+        n = _header_length(fid.read(len(_magic) + 4))
+        return json.loads(fid.read(n).decode('utf-8'))
+
+
+def _header_length(start):
+    if start[:len(_magic)] != _magic:
+        raise ValueError('Not a bvp voxel file')
+    return struct.unpack('<I', start[len(_magic):])[0]
+
+
+class VoxelVolume(object):
+    """Memory-mapped reader for voxel files written by `write_voxels`
+
+    Index like a numpy array (e.g. vol[10:20]); only chunks that overlap the
+    requested slices along the first axis are decompressed.
+    """
+    def __init__(self, fname):
+        """Open voxel file
+
+        Parameters
+        ----------
+        fname : str
+            voxel file name
+        """
+        self.fname = fname
+        self._data = np.memmap(fname, dtype=np.uint8, mode='r')
+        header_start = len(_magic) + 4
+        data_start = header_start + _header_length(self._data[:header_start].tobytes())
+        self.header = json.loads(self._data[header_start:data_start].tobytes().decode('utf-8'))
+        self.shape = tuple(self.header['shape'])
+        self.resolution = self.header['resolution']
+        self.origin = self.header['origin']
+        self.source_hash = self.header['source_hash']
+        self.chunk_size = self.header['chunk_size']
+        self._offsets = data_start + np.concatenate([[0], np.cumsum(self.header['chunk_bytes'])])
+        self._chunks = {}
+
+    def __repr__(self):
+        return '<VoxelVolume %s: shape=%s, resolution=%s>'%(self.fname, self.shape, self.resolution)
+
+    @property
+    def n_chunks(self):
+        return len(self._offsets) - 1
+
+    def chunk(self, i):
+        """Decompressed boolean array for chunk `i` (cached)"""
+        if i not in self._chunks:
+            raw = zlib.decompress(self._data[self._offsets[i]:self._offsets[i+1]])
+            n_slices = min(self.chunk_size, self.shape[0] - i * self.chunk_size)
+            chunk_shape = (n_slices,) + self.shape[1:]
+            bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8), count=int(np.prod(chunk_shape)))
+            self._chunks[i] = bits.reshape(chunk_shape).astype(bool)
+        return self._chunks[i]
+
+    def __getitem__(self, idx):
+        if not isinstance(idx, tuple):
+            idx = (idx,)
+        first, rest = idx[0], idx[1:]
+        if isinstance(first, slice) and first.step in (None, 1):
+            start, stop, _ = first.indices(self.shape[0])
+            stop = max(start, stop)
+            slices = slice(0, stop - start)
+        elif isinstance(first, (int, np.integer)):
+            start = first % self.shape[0]
+            stop = start + 1
+            slices = 0
+        else:
+            return self.to_array()[idx]
+        c0, c1 = start // self.chunk_size, (stop - 1) // self.chunk_size + 1
+        if stop > start:
+            vol = np.concatenate([self.chunk(i) for i in range(c0, c1)], axis=0)
+            vol = vol[start - c0 * self.chunk_size:stop - c0 * self.chunk_size]
+        else:
+            vol = np.zeros((0,) + self.shape[1:], dtype=bool)
+        return vol[(slices,) + rest]
+
+    def to_array(self):
+        """Full boolean volume"""
+        return self[:]
+
+    def to_vol_file(self, fname):
+        """Write raw column-major bytes (as used by skeletonization code, e.g. pfSkel)"""
+        with open(fname, 'wb') as fid:
+            self.to_array().T.tofile(fid)
+
+
+def _make_volume(args):
+    key, src, fname, source_hash, vRes, buf, chunk_size = args
+    vol = voxelize_verts(src, vRes=vRes, buf=buf)
+    write_voxels(fname, vol, resolution=10./vRes, chunk_size=chunk_size, source_hash=source_hash)
+    return key
+
+
+class VoxelStore(object):
+    """Directory of voxel files for library objects, keyed by object ID"""
+    def __init__(self, path, vRes=96, buf=4, chunk_size=16):
+        """Open (or create) a voxel store
+
+        Parameters
+        ----------
+        path : str
+            directory for voxel files
+        vRes : int
+            voxel resolution (voxels per 10 blender units)
+        buf : int
+            buffer voxels around each object
+        chunk_size : int
+            slices per compressed chunk
+        """
+        self.path = path
+        self.vRes = vRes
+        self.buf = buf
+        self.chunk_size = chunk_size
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def _fname(self, key):
+        return os.path.join(self.path, '%s.vox'%key)
+
+    def __contains__(self, key):
+        return os.path.exists(self._fname(key))
+
+    def __getitem__(self, key):
+        """Memory-mapped VoxelVolume for object `key`"""
+        if not key in self:
+            raise KeyError(key)
+        return VoxelVolume(self._fname(key))
+
+    def keys(self):
+        return sorted(os.path.splitext(f)[0] for f in os.listdir(self.path) if f.endswith('.vox'))
+
+    @property
+    def shape(self):
+        """Volume shape for this store's resolution & buffer (see `voxelize_verts`)"""
+        return [self.vRes + self.buf, self.vRes + self.buf, self.vRes + self.buf * 2]
+
+    def is_current(self, key, source_hash):
+        """Whether stored volume for `key` was computed from a source file with hash 
+        `source_hash`, with this store's resolution, buffer and chunk size"""
+        if not key in self:
+            return False
+        header = read_header(self._fname(key))
+        return (header['source_hash'] == source_hash and 
+                header['shape'] == self.shape and
+                header['resolution'] is not None and 
+                np.isclose(header['resolution'], 10. / self.vRes) and
+                header['chunk_size'] == self.chunk_size)
+
+    def update(self, sources, n_jobs=None, overwrite=False, is_verbose=False):
+        """Compute volumes for all objects whose source files are new or have changed
+
+        Parameters
+        ----------
+        sources : dict
+            {object_id: .verts file name}
+        n_jobs : int
+            number of processes. Defaults to number of CPUs; 1 computes in this process.
+        overwrite : bool
+            if True, recompute all volumes
+        is_verbose : bool
+            print progress
+
+        Returns
+        -------
+        updated : list
+            object IDs for which volumes were (re-)computed
+        """
+        to_do = []
+        for key, src in sources.items():
+            source_hash = file_hash(src)
+            if overwrite or not self.is_current(key, source_hash):
+                to_do.append((key, src, self._fname(key), source_hash, self.vRes, self.buf, self.chunk_size))
+        if is_verbose:
+            print('Computing %d of %d volumes'%(len(to_do), len(sources)))
+        if n_jobs == 1:
+            return [_make_volume(args) for args in to_do]
+        pool = multiprocessing.Pool(n_jobs)
+        try:
+            return pool.map(_make_volume, to_do)
+        finally:
+            pool.close()
+            pool.join()